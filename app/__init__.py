@@ -13,13 +13,76 @@ def create_app(config_class=Config):
     from app.routes.main_routes import main_bp
     from app.routes.search_routes import search_bp
     from app.routes.file_operation_routes import file_op_bp
+    from app.routes.metrics_routes import metrics_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(search_bp)
     app.register_blueprint(file_op_bp)
+    app.register_blueprint(metrics_bp)
+    
+    # Governor keeping background work out of the way of interactive searches
+    from app.search.governor import ResourceGovernor
+    governor = ResourceGovernor.from_config(app.config)
+    app.extensions['governor'] = governor
+    
+    # Walker concurrency budgets per device, shared by searches and index builds
+    from app.search.concurrency import ConcurrencyManager
+    concurrency = ConcurrencyManager(adaptive=app.config.get('ADAPTIVE_CONCURRENCY', True),
+                                     default_threads=app.config.get('SEARCH_THREADS') or 4)
+    app.extensions['concurrency'] = concurrency
+    
+    # Shared search index, used by the search engine for covered directories.
+    # Multi-worker deployments point all workers at one index service instead.
+    if app.config.get('INDEX_SERVICE_SOCKET'):
+        from app.search.index_service import IndexClient
+        app.extensions['search_index'] = IndexClient(app.config['INDEX_SERVICE_SOCKET'])
+    else:
+        from app.search.indexer import SearchIndex
+        app.extensions['search_index'] = SearchIndex(
+            cache_dir=app.config.get('INDEX_CACHE_DIR'),
+            expiry_time=app.config.get('INDEX_EXPIRY', 3600),
+            exclude_patterns=app.config.get('EXCLUDE_PATTERNS', []),
+            use_ignore_files=app.config.get('USE_IGNORE_FILES', False),
+            governor=governor,
+            concurrency=concurrency,
+            memory_budget=app.config.get('INDEX_MEMORY_BUDGET'),
+            journal_fsync=app.config.get('INDEX_JOURNAL_FSYNC', False),
+            compact_ratio=app.config.get('INDEX_JOURNAL_COMPACT_RATIO', 0.25),
+            compact_min_bytes=app.config.get('INDEX_JOURNAL_COMPACT_MIN', 1024 * 1024)
+        )
+    
+    # Usage tracking, and background warming of indexes for the most used directories
+    from app.search.usage import UsageTracker, IndexWarmer, default_usage_path
+    tracker = UsageTracker(half_life=app.config.get('USAGE_HALF_LIFE', 86400),
+                           persist_path=app.config.get('USAGE_FILE') or default_usage_path())
+    app.extensions['usage_tracker'] = tracker
+    if not app.testing:
+        # Saved on a timer and at exit, independently of index warming
+        tracker.start_autosave(app.config.get('USAGE_SAVE_INTERVAL', 300))
+    if app.config.get('INDEX_WARMING', True) and not app.testing \
+            and not app.config.get('INDEX_SERVICE_SOCKET'):
+        warmer = IndexWarmer(app.extensions['search_index'], tracker,
+                             top_n=app.config.get('INDEX_WARM_TOP_N', 5),
+                             interval=app.config.get('INDEX_WARM_INTERVAL', 60),
+                             duty_cycle=app.config.get('INDEX_WARM_DUTY_CYCLE', 0.25),
+                             governor=governor)
+        app.extensions['index_warmer'] = warmer
+        warmer.start()
+    
+    # Load persisted indexes for the default and hot roots in the background;
+    # /health reports readiness while this runs
+    from app.startup import StartupState, IndexPreloader
+    state = StartupState()
+    app.extensions['startup'] = state
+    if app.config.get('INDEX_PRELOAD', True) and not app.testing:
+        hot_roots = [path for path, _ in tracker.top(app.config.get('INDEX_WARM_TOP_N', 5))]
+        IndexPreloader(app.extensions['search_index'],
+                       app.config.get('DEFAULT_SEARCH_PATHS', []) + hot_roots, state).start()
+    else:
+        state.finish()
     
     # Initialize logging
-    if not app.debug:
+    if not app.debug and not app.testing:
         import logging
         from logging.handlers import RotatingFileHandler
         import os
@@ -0,0 +1,205 @@
+# fastique/app/asgi.py
+# Async (ASGI) serving mode: requests are awaited on bounded executors instead of pinning threads
+
+import io
+import sys
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app import create_app
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ExecutorLane:
+    """
+    A bounded thread pool plus an admission limit. Up to `workers` requests run at once;
+    up to `max_pending` more wait without holding a thread; beyond that clients get a 503.
+    """
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'fastique-{name}')
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.pending = 0
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        return self._slots
+
+    def full(self) -> bool:
+        """Whether the lane should refuse new work"""
+        return self.pending >= self.workers + self.max_pending
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False)
+
+class FastiqueASGI:
+    """
+    ASGI application serving the Flask blueprints. Each request body is read asynchronously,
+    the WSGI app runs on the executor lane for its route prefix (searches and file operations
+    get dedicated lanes) and the response is streamed chunk by chunk, awaiting the server's
+    flow control between chunks.
+    """
+    def __init__(self, flask_app):
+        """
+        Wrap a Flask application
+
+        Args:
+            flask_app: Application created by create_app()
+        """
+        self.flask_app = flask_app
+        config = flask_app.config
+        max_pending = config.get('ASGI_MAX_PENDING', 256)
+        self.lanes = {
+            '/search': ExecutorLane('search', config.get('ASGI_SEARCH_WORKERS', 8), max_pending),
+            '/file': ExecutorLane('file', config.get('ASGI_FILE_WORKERS', 4), max_pending),
+        }
+        self.default_lane = ExecutorLane('default', config.get('ASGI_DEFAULT_WORKERS', 4), max_pending)
+        self.max_body_size = config.get('ASGI_MAX_BODY_SIZE', 16 * 1024 * 1024)
+
+    def lane_for(self, path: str) -> ExecutorLane:
+        """Pick the executor lane for a request path"""
+        for prefix, lane in self.lanes.items():
+            if path == prefix or path.startswith(prefix + '/'):
+                return lane
+        return self.default_lane
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for lane in list(self.lanes.values()) + [self.default_lane]:
+                    lane.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _http(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        # Read the request body without holding a worker thread
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.extend(message.get('body', b''))
+            if len(body) > self.max_body_size:
+                await self._simple_response(send, 413, b'Request body too large')
+                return
+            if not message.get('more_body', False):
+                break
+
+        lane = self.lane_for(scope['path'])
+        if lane.full():
+            await self._simple_response(send, 503, b'Server busy, retry later', [(b'retry-after', b'1')])
+            return
+
+        lane.pending += 1
+        try:
+            async with lane.slots:
+                await self._run_wsgi(lane, scope, bytes(body), send)
+        finally:
+            lane.pending -= 1
+
+    async def _run_wsgi(self, lane: ExecutorLane, scope: Dict[str, Any], body: bytes, send: Callable) -> None:
+        loop = asyncio.get_running_loop()
+        environ = self._build_environ(scope, body)
+        response_start: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            response_start['status'] = int(status.split(' ', 1)[0])
+            response_start['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                         for name, value in headers]
+            return lambda data: None
+
+        def first_chunk():
+            iterable = self.flask_app(environ, start_response)
+            iterator = iter(iterable)
+            return iterable, iterator, next(iterator, None)
+
+        iterable, iterator, chunk = await loop.run_in_executor(lane.executor, first_chunk)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response_start['status'],
+                'headers': response_start['headers'],
+            })
+            # Stream chunk by chunk; each send waits for the client to drain (backpressure)
+            while True:
+                next_chunk = None
+                if chunk is not None:
+                    next_chunk = await loop.run_in_executor(lane.executor, next, iterator, None)
+                more_body = next_chunk is not None
+                if chunk or not more_body:
+                    await send({'type': 'http.response.body', 'body': chunk or b'', 'more_body': more_body})
+                if not more_body:
+                    break
+                chunk = next_chunk
+        finally:
+            close = getattr(iterable, 'close', None)
+            if close is not None:
+                await loop.run_in_executor(lane.executor, close)
+
+    @staticmethod
+    def _build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+        """Translate an ASGI HTTP scope into a WSGI environ"""
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif name == 'CONTENT_LENGTH':
+                continue
+            else:
+                key = f'HTTP_{name}'
+                environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+    @staticmethod
+    async def _simple_response(send: Callable, status: int, body: bytes,
+                               headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')] + (headers or []),
+        })
+        await send({'type': 'http.response.body', 'body': body, 'more_body': False})
+
+def create_asgi_app(config_class=Config) -> FastiqueASGI:
+    """Create the Flask application and wrap it for ASGI servers (e.g. uvicorn)"""
+    return FastiqueASGI(create_app(config_class))
\ No newline at end of file
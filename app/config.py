@@ -23,5 +23,86 @@ class Config:
     ENABLE_CACHE = True
     CACHE_EXPIRY = 600  # 10 minutes
     
+    # Index settings
+    INDEX_CACHE_DIR = None  # Defaults to ~/.fastique/cache
+    INDEX_EXPIRY = 3600     # Seconds before an index is considered stale
+    INDEX_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of in-memory indexes; LRU roots beyond it
+                                             # are evicted to disk and reloaded on demand (None: unbounded)
+    INDEX_JOURNAL_FSYNC = False              # fsync every change journal append
+    INDEX_JOURNAL_COMPACT_RATIO = 0.25       # Compact a journal into a new snapshot at this fraction
+    INDEX_JOURNAL_COMPACT_MIN = 1024 * 1024  # of the snapshot's size, and at least this many bytes
+    # Unix socket of a shared index service (python -m app.search.index_service);
+    # when set, workers query it instead of each holding their own indexes
+    INDEX_SERVICE_SOCKET = os.environ.get('FASTIQUE_INDEX_SOCKET')
+    
+    # Usage tracking and index warming for frequently used directories
+    USAGE_FILE = None              # Defaults to ~/.fastique/usage.json
+    USAGE_HALF_LIFE = 86400        # Seconds for an unused directory's score to halve
+    USAGE_SAVE_INTERVAL = 300      # Seconds between saves of the usage scores (also saved at exit)
+    INDEX_WARMING = True           # Keep indexes of the hottest directories built and fresh
+    INDEX_WARM_TOP_N = 5           # Number of hot directories kept warm
+    INDEX_WARM_INTERVAL = 60       # Seconds between warming cycles
+    INDEX_WARM_DUTY_CYCLE = 0.25   # Fraction of wall time indexing may take
+    INDEX_PRELOAD = True           # Load persisted indexes in the background at startup
+    
+    # Resource governor for background work (index warming and rebuilds, duplicate hashing)
+    BACKGROUND_ENTRIES_PER_SECOND = 20000           # Directory entries walked per second (None: unlimited)
+    BACKGROUND_BYTES_PER_SECOND = 32 * 1024 * 1024  # Bytes read per second for hashing (None: unlimited)
+    BACKGROUND_NICE = 10               # Nice value of background threads (None to leave it)
+    BACKGROUND_IO_PRIORITY = 'idle'    # Linux I/O class of background threads: 'idle', 'best-effort' or None
+    BACKGROUND_PAUSE_FOR_SEARCH = True # Pause background work while searches are running
+    BACKGROUND_MAX_PAUSE = 5.0         # Longest single pause in seconds, so background work can't starve
+    
     # Search settings
-    SEARCH_THREADS = 4
\ No newline at end of file
+    ADAPTIVE_CONCURRENCY = True  # Tune walker threads per device (filesystem type, AIMD on latency)
+    SEARCH_THREADS = None        # Optional cap on walker threads per device for one search;
+                                 # the fixed per-device count when ADAPTIVE_CONCURRENCY is off
+    SUBTREE_SUMMARIES = True     # Persist per-directory name summaries so live searches skip subtrees
+    SUMMARY_CACHE_PATH = None    # SQLite summary store; defaults to ~/.fastique/cache/summaries.sqlite
+    
+    # Archive member search (opt-in per search with 'search_archives')
+    ARCHIVE_SEARCH_WORKERS = 4                 # Archives read concurrently
+    ARCHIVE_CACHE_PATH = None                  # SQLite member cache; defaults to ~/.fastique/cache/archives.sqlite
+    ARCHIVE_MAX_STREAM_BYTES = 1024 ** 3       # Largest compressed tar listed (it must be decompressed)
+    ARCHIVE_MEMORY_MEMBERS = 500_000           # Members of recently searched archives kept in memory
+    
+    # Directory browsing (/browse)
+    BROWSE_PAGE_SIZE = 200                # Entries per page by default
+    BROWSE_MAX_PAGE_SIZE = 1000           # Largest page a client may request
+    LISTING_CACHE_DIRECTORIES = 64        # Directory listings kept, validated by directory mtime
+    LISTING_CACHE_ENTRIES = 1_000_000     # Entries kept across cached listings
+    LISTING_ATTRIBUTE_TTL = 30.0          # Seconds sizes/times used for sorting are reused
+    
+    # Gitignore-style exclude rules applied by search and indexing (e.g. add 'build/', 'target/')
+    EXCLUDE_PATTERNS = ['node_modules/', '__pycache__/', '.git/', 'venv/', '.venv/', '.tox/']
+    USE_IGNORE_FILES = False  # Honour .gitignore/.fastiqueignore files per directory
+    
+    # Profiling settings
+    PROFILING_ENABLED = False         # Profile every search/file-operation request
+    PROFILING_ALLOW_HEADER = True     # Allow 'X-Fastique-Profile: 1' to profile a single request
+    PROFILE_SLOW_THRESHOLD = None     # Seconds; requests slower than this are captured automatically
+    PROFILE_MODE = 'sample'           # 'sample' (all threads) or 'cprofile' (request thread only)
+    PROFILE_SAMPLE_INTERVAL = 0.005   # Seconds between stack samples
+    PROFILE_DIR = None                # Defaults to logs/profiles
+    PROFILE_RING_SIZE = 50            # Maximum number of profiles kept on disk
+    
+    # Duplicate finder and content hashes
+    DUPLICATE_HASH_WORKERS = 4  # Threads hashing candidate files
+    HASH_CACHE_PATH = None      # SQLite hash cache; defaults to ~/.fastique/cache/hashes.sqlite
+    
+    # File previews
+    PREVIEW_CACHE_DIR = None                # Defaults to ~/.fastique/cache/previews
+    PREVIEW_CACHE_SIZE = 64 * 1024 * 1024   # Bytes of generated previews/thumbnails kept on disk
+    PREVIEW_THUMBNAIL_SIZE = 160            # Longest thumbnail side in pixels (needs Pillow)
+    
+    # Federated search: other Fastique nodes queried by /search/federated,
+    # as base URLs (http://host:5000) or Unix sockets (unix:/run/fastique.sock)
+    FEDERATION_PEERS = []
+    FEDERATION_TIMEOUT = 2.0   # Seconds to wait for peers before returning partial results
+    
+    # Async (ASGI) serving mode: bounded executors per route group
+    ASGI_SEARCH_WORKERS = 8    # Concurrent searches
+    ASGI_FILE_WORKERS = 4      # Concurrent file operations
+    ASGI_DEFAULT_WORKERS = 4   # Everything else (pages, metrics)
+    ASGI_MAX_PENDING = 256     # Requests allowed to wait per group before answering 503
+    ASGI_MAX_BODY_SIZE = 16 * 1024 * 1024  # Largest request body accepted before answering 413
\ No newline at end of file
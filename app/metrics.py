@@ -0,0 +1,257 @@
+# fastique/app/metrics.py
+# Lightweight instrumentation (counters, gauges, histograms) with Prometheus text output
+
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Default histogram buckets (seconds), tuned for filesystem latency
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], extra: str = '') -> str:
+    """Render a Prometheus label set"""
+    pairs = []
+    for name, value in zip(labelnames, labelvalues):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class _Metric:
+    """Base class for all metric types"""
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Turn a label dict into an ordered key"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        """Render the metric in Prometheus text exposition format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+    metric_type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increment the counter by the given amount"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Get the current value of the counter"""
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in items]
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+    metric_type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        """Set the gauge to a value"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Increment the gauge"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        """Decrement the gauge"""
+        self.inc(-amount, **labels)
+
+    def remove(self, **labels) -> None:
+        """Drop a labelled series, e.g. when an index is discarded"""
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+
+    def get(self, **labels) -> float:
+        """Get the current value of the gauge"""
+        return self._values.get(self._key(labels), 0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in items]
+
+class Histogram(_Metric):
+    """Cumulative histogram of observed values"""
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        """Record an observation"""
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def get_count(self, **labels) -> int:
+        """Get the number of observations recorded"""
+        state = self._values.get(self._key(labels))
+        return int(state[-1]) if state else 0
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += state[i]
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-2])}')
+            lines.append(f'{self.name}_count{labels} {_format_value(state[-1])}')
+        return lines
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at the /metrics endpoint"""
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create (or fetch) a counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create (or fetch) a gauge"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Histogram:
+        """Create (or fetch) a histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets or DEFAULT_BUCKETS))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry
+registry = MetricsRegistry()
+
+# Search pipeline
+DIRECTORIES_SCANNED = registry.counter(
+    'fastique_directories_scanned_total', 'Directories enumerated by search and indexing', ['source'])
+ENTRIES_SCANNED = registry.counter(
+    'fastique_entries_scanned_total', 'Directory entries examined by search and indexing', ['source'])
+STAT_CALLS = registry.counter(
+    'fastique_stat_calls_total', 'stat() calls issued by search and indexing', ['source'])
+REGEX_EVALUATIONS = registry.counter(
+    'fastique_regex_evaluations_total', 'Name pattern evaluations performed by the search engine')
+SCAN_ERRORS = registry.counter(
+    'fastique_scan_errors_total', 'Directories or files that could not be read', ['source'])
+ACTIVE_WORKERS = registry.gauge(
+    'fastique_active_worker_threads', 'Search and index walker threads currently running')
+WALK_CONCURRENCY = registry.gauge(
+    'fastique_walk_concurrency_limit', 'Adaptive walker concurrency limit per device and pool',
+    ['device', 'pool'])
+SUBTREES_PRUNED = registry.counter(
+    'fastique_subtrees_pruned_total', 'Subdirectories skipped by live searches on their subtree summary')
+LISTING_REQUESTS = registry.counter(
+    'fastique_listing_requests_total', 'Directory listing cache lookups by outcome', ['result'])
+ARCHIVE_REQUESTS = registry.counter(
+    'fastique_archive_requests_total', 'Archive member list lookups by outcome', ['result'])
+SEARCH_DURATION = registry.histogram(
+    'fastique_search_duration_seconds', 'Wall time of SearchEngine.search calls')
+
+# Index
+INDEX_CACHE_REQUESTS = registry.counter(
+    'fastique_index_cache_requests_total', 'Index cache lookups by outcome', ['result'])
+INDEX_BUILD_DURATION = registry.histogram(
+    'fastique_index_build_duration_seconds', 'Time spent building directory indexes')
+INDEX_ENTRIES = registry.gauge(
+    'fastique_index_entries', 'Entries held by each in-memory index', ['directory'])
+INDEX_BYTES = registry.gauge(
+    'fastique_index_bytes', 'Size of each persisted index file in bytes', ['directory'])
+INDEX_MEMORY_BYTES = registry.gauge(
+    'fastique_index_memory_bytes', 'Estimated memory held by in-memory indexes')
+INDEX_MEMORY_BUDGET = registry.gauge(
+    'fastique_index_memory_budget_bytes', 'Memory budget for in-memory indexes')
+INDEX_EVICTIONS = registry.counter(
+    'fastique_index_evictions_total', 'Indexes evicted from memory to disk to stay within the budget')
+INDEX_RELOAD_DURATION = registry.histogram(
+    'fastique_index_reload_duration_seconds', 'Time to reload an evicted index from disk')
+
+# Background work
+BACKGROUND_WAIT = registry.counter(
+    'fastique_background_wait_seconds_total', 'Time background work spent held back by the governor',
+    ['reason'])
+FOREGROUND_REQUESTS = registry.gauge(
+    'fastique_foreground_requests', 'Interactive searches currently running')
+
+# HTTP
+REQUEST_LATENCY = registry.histogram(
+    'fastique_request_duration_seconds', 'Request latency per route', ['endpoint', 'method', 'status'])
\ No newline at end of file
@@ -0,0 +1,284 @@
+# fastique/app/profiling.py
+# Opt-in per-request profiling: stage timings, stack samples and an on-disk ring buffer
+
+import os
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter as _Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+from flask import current_app, g, request
+
+logger = logging.getLogger(__name__)
+
+# Header that asks for a single request to be profiled
+PROFILE_HEADER = 'X-Fastique-Profile'
+
+class StageTimer:
+    """
+    Accumulates time spent per pipeline stage (walk, filter, stat, materialize, serialize)
+    across all threads working on a request
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._accumulators: List[Dict[str, float]] = []
+        self._lock = threading.Lock()
+
+    def _accumulator(self) -> Dict[str, float]:
+        """Get the calling thread's accumulator, registering it on first use"""
+        acc = getattr(self._local, 'acc', None)
+        if acc is None:
+            acc = self._local.acc = {}
+            with self._lock:
+                self._accumulators.append(acc)
+        return acc
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Add time to a stage"""
+        acc = self._accumulator()
+        acc[stage] = acc.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of code as part of a stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def timed(self, stage: str, func: Callable) -> Callable:
+        """Wrap a callable so every call is charged to a stage"""
+        clock = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, clock() - start)
+        return wrapper
+
+    def timed_iter(self, stage: str, iterable) -> Iterator:
+        """Iterate, charging the time spent producing each item to a stage"""
+        clock = time.perf_counter
+        iterator = iter(iterable)
+        while True:
+            start = clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(stage, clock() - start)
+                return
+            self.add(stage, clock() - start)
+            yield item
+
+    def totals(self) -> Dict[str, float]:
+        """Get the summed time per stage"""
+        totals: Dict[str, float] = {}
+        with self._lock:
+            accumulators = list(self._accumulators)
+        for acc in accumulators:
+            for stage, seconds in list(acc.items()):
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        return {stage: round(seconds, 6) for stage, seconds in totals.items()}
+
+class StackSampler:
+    """
+    Periodically samples the stacks of every thread in the process.
+    Unlike cProfile this also sees the search worker threads.
+    """
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: _Counter = _Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling in a background thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True, name='fastique-sampler')
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                    frame = frame.f_back
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def collapsed(self, limit: int = 200) -> List[str]:
+        """Return the most common stacks in collapsed (flamegraph) format"""
+        return [f"{stack} {count}" for stack, count in self.samples.most_common(limit)]
+
+class ProfileStore:
+    """Bounded on-disk ring buffer of captured profiles"""
+    def __init__(self, directory: str, capacity: int = 50):
+        """
+        Initialize the profile store
+
+        Args:
+            directory: Directory to write profile files to
+            capacity: Maximum number of profiles kept on disk
+        """
+        self.directory = directory
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _profile_files(self) -> List[str]:
+        names = [n for n in os.listdir(self.directory) if n.startswith('profile-') and n.endswith('.json')]
+        return sorted(names)
+
+    def save(self, profile: Dict) -> str:
+        """
+        Write a profile, dropping the oldest ones beyond capacity
+
+        Args:
+            profile: Profile data
+
+        Returns:
+            Identifier of the stored profile
+        """
+        profile_id = f"{time.time_ns():020d}-{threading.get_ident() % 100000:05d}"
+        with self._lock:
+            path = os.path.join(self.directory, f"profile-{profile_id}.json")
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(profile, f)
+
+            files = self._profile_files()
+            for stale in files[:max(0, len(files) - self.capacity)]:
+                try:
+                    os.remove(os.path.join(self.directory, stale))
+                except OSError:
+                    pass
+        return profile_id
+
+    def load(self, profile_id: str) -> Optional[Dict]:
+        """Load a stored profile by identifier"""
+        path = os.path.join(self.directory, f"profile-{os.path.basename(profile_id)}.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def list_ids(self) -> List[str]:
+        """List stored profile identifiers, oldest first"""
+        return [name[len('profile-'):-len('.json')] for name in self._profile_files()]
+
+class RequestProfile:
+    """Profiling state for one request"""
+    def __init__(self, forced: bool, mode: str, sample_interval: float):
+        self.forced = forced
+        self.mode = mode
+        self.stages = StageTimer()
+        self.start_time = time.perf_counter()
+        self.sampler: Optional[StackSampler] = None
+        self.profiler: Optional[cProfile.Profile] = None
+
+        if mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            self.sampler = StackSampler(interval=sample_interval)
+            self.sampler.start()
+
+    def finish(self) -> Dict:
+        """Stop profiling and return the captured data"""
+        elapsed = time.perf_counter() - self.start_time
+        data = {
+            'duration': round(elapsed, 6),
+            'stages': self.stages.totals(),
+            'mode': self.mode,
+        }
+        if self.profiler is not None:
+            self.profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(50)
+            data['cprofile'] = stream.getvalue()
+        if self.sampler is not None:
+            self.sampler.stop()
+            data['stacks'] = self.sampler.collapsed()
+        return data
+
+def _get_store() -> ProfileStore:
+    """Get the application's profile store"""
+    store = current_app.extensions.get('profile_store')
+    if store is None:
+        directory = current_app.config.get('PROFILE_DIR') or os.path.join('logs', 'profiles')
+        store = ProfileStore(directory, current_app.config.get('PROFILE_RING_SIZE', 50))
+        current_app.extensions['profile_store'] = store
+    return store
+
+def start_request_profile() -> None:
+    """before_request hook: start profiling if requested or if slow requests are captured"""
+    config = current_app.config
+    forced = config.get('PROFILING_ENABLED', False) or (
+        config.get('PROFILING_ALLOW_HEADER', True) and request.headers.get(PROFILE_HEADER) == '1')
+    threshold = config.get('PROFILE_SLOW_THRESHOLD')
+
+    if not forced and threshold is None:
+        return
+    g.request_profile = RequestProfile(
+        forced=forced,
+        mode=config.get('PROFILE_MODE', 'sample'),
+        sample_interval=config.get('PROFILE_SAMPLE_INTERVAL', 0.005)
+    )
+
+def finish_request_profile(response):
+    """after_request hook: store the profile if it was forced or the request was slow"""
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return response
+
+    data = profile.finish()
+    threshold = current_app.config.get('PROFILE_SLOW_THRESHOLD')
+    if profile.forced or (threshold is not None and data['duration'] >= threshold):
+        data.update({
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'captured_at': time.time(),
+            'reason': 'requested' if profile.forced else 'slow',
+        })
+        try:
+            profile_id = _get_store().save(data)
+            response.headers['X-Fastique-Profile-Id'] = profile_id
+        except OSError:
+            logger.exception("Failed to store request profile")
+    return response
+
+def current_stage_timer() -> Optional[StageTimer]:
+    """Get the stage timer of the request being profiled, if any"""
+    profile = g.get('request_profile')
+    return profile.stages if profile is not None else None
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as a stage of the current request (no-op when not profiling)"""
+    timer = current_stage_timer()
+    if timer is None:
+        yield
+    else:
+        with timer.stage(name):
+            yield
\ No newline at end of file
@@ -1,11 +1,34 @@
 # fastique/app/routes/file_operation_routes.py
 # Routes for file operations
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app
 from app.search.file_operations import FileOperations, FileOperationError
+import mimetypes
+from app.profiling import start_request_profile, finish_request_profile
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 file_op_bp = Blueprint('file_operations', __name__, url_prefix='/file')
+file_op_bp.before_request(start_request_profile)
+file_op_bp.after_request(finish_request_profile)
+
+@file_op_bp.after_request
+def record_usage(response):
+    """Count successful operations towards the usage of the directories involved"""
+    tracker = current_app.extensions.get('usage_tracker')
+    if tracker is None or response.status_code >= 400:
+        return response
+    if request.method == 'GET':
+        values = request.args
+    else:
+        values = request.get_json(silent=True) or {}
+    for key in ('path', 'source', 'destination'):
+        path = values.get(key)
+        if isinstance(path, str) and path:
+            tracker.record(path, weight=0.5)
+    return response
 
 @file_op_bp.route('/info', methods=['GET'])
 def get_file_info():
@@ -42,13 +65,18 @@ def copy_file():
     data = request.json
     source = data.get('source')
     destination = data.get('destination')
+    skip_identical = data.get('skip_identical', False)
     
     if not source or not destination:
         return jsonify({'error': 'Source and destination paths are required'}), 400
     
     try:
-        FileOperations.copy_file(source, destination)
-        return jsonify({'success': True, 'destination': destination})
+        copied = FileOperations.copy_file(source, destination, skip_identical,
+                                          _hash_cache() if skip_identical else None)
+        if copied:
+            # shutil.copy2 puts a file inside an existing destination directory
+            _index_changed(destination, os.path.join(destination, os.path.basename(source)))
+        return jsonify({'success': True, 'destination': destination, 'skipped': not copied})
     except FileOperationError as e:
         return jsonify({'error': str(e)}), 400
 
@@ -64,6 +92,8 @@ def move_file():
     
     try:
         FileOperations.move_file(source, destination)
+        # shutil.move puts the source inside an existing destination directory
+        _index_changed(source, destination, os.path.join(destination, os.path.basename(source)))
         return jsonify({'success': True, 'destination': destination})
     except FileOperationError as e:
         return jsonify({'error': str(e)}), 400
@@ -80,6 +110,7 @@ def rename_file():
     
     try:
         new_path = FileOperations.rename_file(path, new_name)
+        _index_changed(path, new_path)
         return jsonify({'success': True, 'new_path': new_path})
     except FileOperationError as e:
         return jsonify({'error': str(e)}), 400
@@ -96,6 +127,7 @@ def delete_file():
     
     try:
         FileOperations.delete_file(path, use_trash)
+        _index_changed(path)
         return jsonify({'success': True})
     except FileOperationError as e:
         return jsonify({'error': str(e)}), 400
@@ -111,6 +143,7 @@ def create_folder():
     
     try:
         FileOperations.create_folder(path)
+        _index_changed(path)
         return jsonify({'success': True, 'path': path})
     except FileOperationError as e:
         return jsonify({'error': str(e)}), 400
@@ -127,6 +160,113 @@ def create_file():
     
     try:
         FileOperations.create_file(path, content)
+        _index_changed(path)
         return jsonify({'success': True, 'path': path})
     except FileOperationError as e:
-        return jsonify({'error': str(e)}), 400
\ No newline at end of file
+        return jsonify({'error': str(e)}), 400
+
+@file_op_bp.route('/duplicates', methods=['POST'])
+def find_duplicates():
+    """Find groups of identical files below the given directories"""
+    data = request.json or {}
+    paths = data.get('paths', current_app.config.get('DEFAULT_SEARCH_PATHS', []))
+    
+    if not paths:
+        return jsonify({'error': 'At least one path is required'}), 400
+    
+    from app.search.duplicates import DuplicateFinder
+    finder = DuplicateFinder(
+        index=current_app.extensions.get('search_index'),
+        workers=current_app.config.get('DUPLICATE_HASH_WORKERS', 4),
+        min_size=data.get('min_size', 1),
+        exclude_patterns=current_app.config.get('EXCLUDE_PATTERNS', []),
+        use_ignore_files=current_app.config.get('USE_IGNORE_FILES', False),
+        hash_cache=_hash_cache(),
+        governor=current_app.extensions.get('governor')
+    )
+    result = finder.find(paths, include_hidden=data.get('include_hidden', False))
+    return jsonify({'success': True, **result})
+
+@file_op_bp.route('/preview', methods=['GET'])
+def preview_file():
+    """
+    Preview a file without transferring all of it.
+    mode=info (default) returns a JSON summary with a text snippet or image dimensions,
+    mode=thumbnail returns a small PNG and mode=raw serves the bytes, honouring Range requests.
+    """
+    path = request.args.get('path')
+    mode = request.args.get('mode', 'info')
+    
+    if not path:
+        return jsonify({'error': 'No path provided'}), 400
+    if not os.path.isfile(path):
+        return jsonify({'error': f'File does not exist: {path}'}), 404
+    
+    try:
+        if mode == 'raw':
+            return _serve_range(path)
+        
+        service = _preview_service()
+        if mode == 'thumbnail':
+            thumbnail = service.thumbnail(path)
+            if thumbnail is None:
+                return jsonify({'error': 'No thumbnail available'}), 404
+            return Response(thumbnail, mimetype='image/png', headers={'Cache-Control': 'private, max-age=300'})
+        
+        return jsonify({'success': True, 'preview': service.preview(path)})
+    except OSError as e:
+        return jsonify({'error': f'Failed to preview file: {str(e)}'}), 400
+
+def _serve_range(path: str) -> Response:
+    """Serve a file, or the byte range asked for, streamed from a memory map"""
+    from app.search.preview import RangeNotSatisfiable, parse_range_header, iter_range
+    size = os.path.getsize(path)
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    headers = {'Accept-Ranges': 'bytes'}
+    
+    try:
+        byte_range = parse_range_header(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        headers['Content-Range'] = f'bytes */{size}'
+        return Response(status=416, headers=headers)
+    
+    status = 200
+    start, end = 0, size
+    if byte_range is not None:
+        start, end = byte_range
+        status = 206
+        headers['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+    headers['Content-Length'] = str(end - start)
+    return Response(iter_range(path, start, end), status=status, mimetype=mimetype, headers=headers)
+
+def _preview_service():
+    """Get the application's preview service, creating its disk cache on first use"""
+    service = current_app.extensions.get('preview_service')
+    if service is None:
+        from app.search.preview import PreviewCache, PreviewService
+        cache = PreviewCache(current_app.config.get('PREVIEW_CACHE_DIR'),
+                             current_app.config.get('PREVIEW_CACHE_SIZE', 64 * 1024 * 1024))
+        service = PreviewService(cache, current_app.config.get('PREVIEW_THUMBNAIL_SIZE', 160))
+        current_app.extensions['preview_service'] = service
+    return service
+
+def _hash_cache():
+    """Get the application's persistent hash cache, opening it on first use"""
+    cache = current_app.extensions.get('hash_cache')
+    if cache is None:
+        from app.search.hash_cache import HashCache
+        cache = HashCache(current_app.config.get('HASH_CACHE_PATH'),
+                          workers=current_app.config.get('DUPLICATE_HASH_WORKERS', 4),
+                          governor=current_app.extensions.get('governor'))
+        current_app.extensions['hash_cache'] = cache
+    return cache
+
+def _index_changed(*paths):
+    """Update covering indexes incrementally after a file operation"""
+    record_changes = getattr(current_app.extensions.get('search_index'), 'record_changes', None)
+    if record_changes is None:
+        return
+    try:
+        record_changes([path for path in paths if path])
+    except Exception:
+        logger.exception("Updating the index for %s failed", ', '.join(paths))
@@ -1,10 +1,11 @@
 # fastique/app/routes/main_routes.py
 # Main routes for the application
 
-from flask import Blueprint, render_template, current_app
+from flask import Blueprint, render_template, current_app, jsonify, request
 import os
 from pathlib import Path
 from datetime import datetime
+from app.startup import index_coverage
 
 main_bp = Blueprint('main', __name__)
 
@@ -29,4 +30,88 @@ def index():
 @main_bp.route('/about')
 def about():
     """Render the about page"""
-    return render_template('about.html')
\ No newline at end of file
+    return render_template('about.html')
+
+@main_bp.route('/health')
+def health():
+    """Report liveness, startup readiness and which search roots are served from an index"""
+    state = current_app.extensions['startup']
+    startup = state.to_dict()
+    coverage = index_coverage(current_app.extensions['search_index'],
+                              current_app.config.get('DEFAULT_SEARCH_PATHS', []))
+    governor = current_app.extensions.get('governor')
+    return jsonify({
+        'status': 'ok' if startup['ready'] else 'starting',
+        'startup': startup,
+        'index': coverage,
+        'background': governor.to_dict() if governor is not None else None,
+        'concurrency': current_app.extensions['concurrency'].snapshot()
+    })
+
+@main_bp.route('/browse', methods=['GET'])
+def browse():
+    """
+    List one directory, sorted and paged on the server.
+    Query parameters: path, sort (name, type, size or modified), order (asc or desc),
+    offset, limit, hidden (include hidden entries) and dirs_first (folders first, default on).
+    """
+    path = request.args.get('path')
+    if not path:
+        return jsonify({'error': 'No path provided'}), 400
+    
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', current_app.config.get('BROWSE_PAGE_SIZE', 200)))
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    limit = max(1, min(limit, current_app.config.get('BROWSE_MAX_PAGE_SIZE', 1000)))
+    
+    # Browsing is interactive: background indexing and hashing pause meanwhile
+    governor = current_app.extensions.get('governor')
+    if governor is not None:
+        governor.enter_foreground()
+    try:
+        page = _listing_cache().page(
+            path,
+            sort=request.args.get('sort', 'name'),
+            descending=request.args.get('order', 'asc') == 'desc',
+            offset=offset,
+            limit=limit,
+            include_hidden=_flag(request.args.get('hidden'), False),
+            directories_first=_flag(request.args.get('dirs_first'), True),
+            index=current_app.extensions.get('search_index')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except FileNotFoundError:
+        return jsonify({'error': f'Directory not found: {path}'}), 404
+    except NotADirectoryError:
+        return jsonify({'error': f'Not a directory: {path}'}), 400
+    except PermissionError:
+        return jsonify({'error': f'Permission denied: {path}'}), 403
+    finally:
+        if governor is not None:
+            governor.leave_foreground()
+    
+    tracker = current_app.extensions.get('usage_tracker')
+    if tracker is not None:
+        tracker.record(page['directory'], weight=0.5)
+    page['count'] = len(page['results'])
+    return jsonify(page)
+
+def _flag(value, default):
+    """Read a boolean query parameter"""
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+def _listing_cache():
+    """Get the application's directory listing cache, creating it on first use"""
+    cache = current_app.extensions.get('listing_cache')
+    if cache is None:
+        from app.search.listing import ListingCache
+        cache = ListingCache(max_directories=current_app.config.get('LISTING_CACHE_DIRECTORIES', 64),
+                             max_entries=current_app.config.get('LISTING_CACHE_ENTRIES', 1_000_000),
+                             attribute_ttl=current_app.config.get('LISTING_ATTRIBUTE_TTL', 30.0))
+        current_app.extensions['listing_cache'] = cache
+    return cache
@@ -0,0 +1,31 @@
+# fastique/app/routes/metrics_routes.py
+# Prometheus metrics endpoint and per-route latency tracking
+
+import time
+from flask import Blueprint, Response, g, request
+from app.metrics import registry, REQUEST_LATENCY
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.before_app_request
+def _start_timer():
+    """Remember when the request started"""
+    g.request_start_time = time.perf_counter()
+
+@metrics_bp.after_app_request
+def _record_latency(response):
+    """Record request latency, labelled by route"""
+    start = g.pop('request_start_time', None)
+    if start is not None:
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or 'unknown',
+            method=request.method,
+            status=str(response.status_code)
+        )
+    return response
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose all metrics in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
\ No newline at end of file
@@ -1,83 +1,76 @@
 # fastique/app/routes/search_routes.py
 # Routes for search functionality
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, g
 from app.search.search_engine import SearchEngine
+from app.profiling import start_request_profile, finish_request_profile, current_stage_timer, stage
+from app.encoding import compact_results, compress_response, json_response
+from app.search.query_language import QuerySyntaxError
+import json
 import time
 from datetime import datetime
 
 search_bp = Blueprint('search', __name__, url_prefix='/search')
+search_bp.before_request(start_request_profile)
+search_bp.after_request(finish_request_profile)
+search_bp.after_request(compress_response)
+
+@search_bp.before_request
+def enter_foreground():
+    """Count the search as foreground work, so background indexing and hashing pause"""
+    governor = current_app.extensions.get('governor')
+    if governor is not None:
+        governor.enter_foreground()
+        g.foreground_governor = governor
+
+@search_bp.teardown_request
+def leave_foreground(exc=None):
+    governor = g.pop('foreground_governor', None)
+    if governor is not None:
+        governor.leave_foreground()
 
 @search_bp.route('/', methods=['POST'])
 def search():
     """Handle search requests"""
     data = request.json
-    
-    # Get search parameters
-    query = data.get('query', '')
-    paths = data.get('paths', current_app.config.get('DEFAULT_SEARCH_PATHS', []))
-    file_types = data.get('file_types', None)
-    use_regex = data.get('use_regex', False)
-    case_sensitive = data.get('case_sensitive', False)
-    include_hidden = data.get('include_hidden', False)
-    max_depth = data.get('max_depth', None)
-    
-    # Parse date range if provided
-    date_range = None
-    if data.get('date_from') or data.get('date_to'):
-        date_from = None
-        date_to = None
-        
-        if data.get('date_from'):
-            try:
-                date_from = datetime.strptime(data['date_from'], '%Y-%m-%d')
-            except ValueError:
-                pass
-                
-        if data.get('date_to'):
-            try:
-                date_to = datetime.strptime(data['date_to'], '%Y-%m-%d')
-                # Set time to end of day
-                date_to = date_to.replace(hour=23, minute=59, second=59)
-            except ValueError:
-                pass
-                
-        date_range = (date_from, date_to)
-    
-    # Parse size range if provided
-    size_range = None
-    if data.get('size_min') is not None or data.get('size_max') is not None:
-        size_min = data.get('size_min', 0)
-        size_max = data.get('size_max', float('inf'))
-        size_range = (size_min, size_max)
+    params = _search_params(data)
+    query = params['query']
+    stream = data.get('stream', False)
     
     # Create search engine and execute search
     engine = SearchEngine(
         max_results=current_app.config.get('MAX_SEARCH_RESULTS', 500),
-        threads=current_app.config.get('SEARCH_THREADS', 4)
+        threads=current_app.config.get('SEARCH_THREADS'),
+        stage_timer=current_stage_timer(),
+        exclude_patterns=current_app.config.get('EXCLUDE_PATTERNS', []),
+        use_ignore_files=current_app.config.get('USE_IGNORE_FILES', False),
+        index=current_app.extensions.get('search_index'),
+        concurrency=current_app.extensions.get('concurrency'),
+        summaries=_summary_store(),
+        archives=_archive_index() if params['search_archives'] else None
     )
     
+    # The compact format skips building per-result dictionaries altogether
+    compact = data.get('format') == 'compact' and not stream
+    
     start_time = time.time()
-    results = engine.search(
-        query=query,
-        paths=paths,
-        file_types=file_types,
-        date_range=date_range,
-        size_range=size_range,
-        use_regex=use_regex,
-        case_sensitive=case_sensitive,
-        include_hidden=include_hidden,
-        max_depth=max_depth
-    )
+    try:
+        if compact:
+            results = engine.search_results(**params)
+        else:
+            results = engine.search(**params)
+    except QuerySyntaxError as e:
+        return jsonify({'error': str(e)}), 400
     search_time = time.time() - start_time
+    _record_usage(params['paths'])
+    
+    # Stream results as NDJSON (a header line, then one line per result) if requested
+    if stream:
+        return Response(_ndjson_lines(query, results, search_time), mimetype='application/x-ndjson')
     
     # Return the results
-    return jsonify({
-        'query': query,
-        'count': len(results),
-        'time': round(search_time, 3),
-        'results': results
-    })
+    with stage('serialize'):
+        return _search_response(query, results, search_time, compact)
 
 @search_bp.route('/quick', methods=['GET'])
 def quick_search():
@@ -94,20 +87,161 @@ def quick_search():
     # Create search engine with limited results for quick response
     engine = SearchEngine(
         max_results=20,  # Limit to first 20 results for quick search
-        threads=2        # Use fewer threads for quick search
+        threads=2,       # At most two walkers per device for quick search
+        stage_timer=current_stage_timer(),
+        exclude_patterns=current_app.config.get('EXCLUDE_PATTERNS', []),
+        use_ignore_files=current_app.config.get('USE_IGNORE_FILES', False),
+        index=current_app.extensions.get('search_index'),
+        concurrency=current_app.extensions.get('concurrency'),
+        summaries=_summary_store()
     )
     
+    compact = request.args.get('format') == 'compact'
+    
     start_time = time.time()
-    results = engine.search(
+    run_search = engine.search_results if compact else engine.search
+    results = run_search(
         query=query,
         paths=paths,
         max_depth=2  # Limit depth for quick search
     )
     search_time = time.time() - start_time
+    _record_usage(paths)
+    
+    with stage('serialize'):
+        return _search_response(query, results, search_time, compact)
+
+@search_bp.route('/federated', methods=['POST'])
+def federated_search():
+    """Search this node and all configured peers, merging the ranked results"""
+    data = request.json or {}
+    federation = _get_federation()
+    
+    params = _search_params(data)
+    engine = SearchEngine(
+        max_results=current_app.config.get('MAX_SEARCH_RESULTS', 500),
+        threads=current_app.config.get('SEARCH_THREADS'),
+        exclude_patterns=current_app.config.get('EXCLUDE_PATTERNS', []),
+        use_ignore_files=current_app.config.get('USE_IGNORE_FILES', False),
+        index=current_app.extensions.get('search_index'),
+        concurrency=current_app.extensions.get('concurrency'),
+        summaries=_summary_store(),
+        archives=_archive_index() if params['search_archives'] else None
+    )
+    local_search = None
+    if data.get('include_local', True):
+        local_search = lambda: engine.search(**params)
     
-    return jsonify({
+    response = federation.search(data, local_search)
+    with stage('serialize'):
+        return jsonify(response)
+
+def _get_federation():
+    """Get the application's federation (peers and fan-out pool are created once)"""
+    federation = current_app.extensions.get('federation')
+    if federation is None:
+        from app.search.federation import FederatedSearch, Peer
+        timeout = current_app.config.get('FEDERATION_TIMEOUT', 2.0)
+        peers = [Peer(address, timeout) for address in current_app.config.get('FEDERATION_PEERS', [])]
+        federation = FederatedSearch(peers, timeout=timeout,
+                                     max_results=current_app.config.get('MAX_SEARCH_RESULTS', 500))
+        current_app.extensions['federation'] = federation
+    return federation
+
+def _summary_store():
+    """Get the application's subtree summary store, opening it on first use (None if disabled)"""
+    if not current_app.config.get('SUBTREE_SUMMARIES', True):
+        return None
+    store = current_app.extensions.get('summaries')
+    if store is None:
+        from app.search.summaries import SummaryStore
+        store = SummaryStore(current_app.config.get('SUMMARY_CACHE_PATH'),
+                             governor=current_app.extensions.get('governor'))
+        current_app.extensions['summaries'] = store
+    return store
+
+def _archive_index():
+    """Get the application's archive member cache, opening it on first use"""
+    archives = current_app.extensions.get('archives')
+    if archives is None:
+        from app.search.archives import ArchiveIndex
+        archives = ArchiveIndex(current_app.config.get('ARCHIVE_CACHE_PATH'),
+                                workers=current_app.config.get('ARCHIVE_SEARCH_WORKERS', 4),
+                                max_stream_bytes=current_app.config.get('ARCHIVE_MAX_STREAM_BYTES'),
+                                memory_members=current_app.config.get('ARCHIVE_MEMORY_MEMBERS', 500_000))
+        current_app.extensions['archives'] = archives
+    return archives
+
+def _search_response(query, results, search_time, compact=False):
+    """Build a search response; compact results are a directory table plus rows of raw values"""
+    payload = {
         'query': query,
         'count': len(results),
-        'time': round(search_time, 3),
-        'results': results
-    })
\ No newline at end of file
+        'time': round(search_time, 3)
+    }
+    if compact:
+        payload['format'] = 'compact'
+        payload.update(compact_results(results))
+    else:
+        payload['results'] = results
+    return json_response(payload)
+
+def _record_usage(paths):
+    """Count a search towards the usage of its roots, so hot roots get kept indexed"""
+    tracker = current_app.extensions.get('usage_tracker')
+    if tracker is not None:
+        for path in paths:
+            tracker.record(path)
+
+def _search_params(data):
+    """Translate a search request body into SearchEngine.search() arguments"""
+    # Parse date range if provided
+    date_range = None
+    if data.get('date_from') or data.get('date_to'):
+        date_from = None
+        date_to = None
+        
+        if data.get('date_from'):
+            try:
+                date_from = datetime.strptime(data['date_from'], '%Y-%m-%d')
+            except ValueError:
+                pass
+                
+        if data.get('date_to'):
+            try:
+                date_to = datetime.strptime(data['date_to'], '%Y-%m-%d')
+                # Set time to end of day
+                date_to = date_to.replace(hour=23, minute=59, second=59)
+            except ValueError:
+                pass
+                
+        date_range = (date_from, date_to)
+    
+    # Parse size range if provided
+    size_range = None
+    if data.get('size_min') is not None or data.get('size_max') is not None:
+        size_min = data.get('size_min', 0)
+        size_max = data.get('size_max', float('inf'))
+        size_range = (size_min, size_max)
+    
+    return {
+        'query': data.get('query', ''),
+        'paths': data.get('paths', current_app.config.get('DEFAULT_SEARCH_PATHS', [])),
+        'file_types': data.get('file_types', None),
+        'date_range': date_range,
+        'size_range': size_range,
+        'use_regex': data.get('use_regex', False),
+        'case_sensitive': data.get('case_sensitive', False),
+        'include_hidden': data.get('include_hidden', False),
+        'max_depth': data.get('max_depth', None),
+        'exclude': data.get('exclude', None),
+        'same_filesystem': data.get('same_filesystem', False),
+        'match_mode': data.get('match_mode', 'glob'),
+        'search_archives': bool(data.get('search_archives', False))
+    }
+
+def _ndjson_lines(query, results, search_time, chunk_size=100):
+    """Yield an NDJSON search response in chunks, so large result sets are sent incrementally"""
+    yield json.dumps({'query': query, 'count': len(results), 'time': round(search_time, 3)}) + '\n'
+    for start in range(0, len(results), chunk_size):
+        yield ''.join(json.dumps(result) + '\n' for result in results[start:start + chunk_size])
\ No newline at end of file
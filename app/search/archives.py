@@ -0,0 +1,205 @@
+# fastique/app/search/archives.py
+# Archive member search: zip central directories and tar headers, cached per (path, size, mtime)
+
+import os
+import json
+import time
+import logging
+import sqlite3
+import tarfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+from app.metrics import ARCHIVE_REQUESTS, SCAN_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# Archive name suffixes, longest first so '.tar.gz' wins over '.gz'
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tar.bz2', '.tar.xz', '.zip', '.jar', '.tar', '.tgz', '.tbz2', '.txz')
+# Extensions (as indexed) of names that may be archives
+ARCHIVE_EXTENSIONS = ['zip', 'jar', 'tar', 'tgz', 'tbz2', 'txz', 'gz', 'bz2', 'xz']
+# Compressed tars have no member directory: listing one decompresses it end to end
+_STREAMED_SUFFIXES = ('.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tbz2', '.txz')
+
+# Member: (path inside the archive, size, mtime, is_directory)
+Member = Tuple[str, int, float, bool]
+
+def is_archive(name: str) -> bool:
+    """Whether a file name looks like a supported archive"""
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def _member_name(name: str) -> str:
+    """Normalize a member name to a relative path without a trailing separator"""
+    name = name.replace('\\', '/').lstrip('/')
+    while name.startswith('./'):
+        name = name[2:]
+    return name.rstrip('/')
+
+def _zip_time(date_time: tuple) -> float:
+    try:
+        return time.mktime(date_time + (0, 0, -1))
+    except (OverflowError, ValueError):
+        return 0.0
+
+def read_members(path: str) -> List[Member]:
+    """
+    List an archive's members without extracting anything. A zip's central directory is
+    read from the end of the file; a plain tar's headers are read by seeking past member data.
+
+    Args:
+        path: Archive file
+
+    Returns:
+        Members as (path inside the archive, size, mtime, is_directory)
+
+    Raises:
+        OSError, zipfile.BadZipFile, tarfile.TarError: If the archive cannot be read
+    """
+    members = []
+    if path.lower().endswith(('.zip', '.jar')):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                name = _member_name(info.filename)
+                if name:
+                    members.append((name, info.file_size, _zip_time(info.date_time), info.is_dir()))
+        return members
+    with tarfile.open(path, 'r:*') as archive:
+        for info in archive:
+            name = _member_name(info.name)
+            if name and (info.isfile() or info.isdir()):
+                members.append((name, info.size if info.isfile() else 0, float(info.mtime), info.isdir()))
+    return members
+
+class ArchiveIndex:
+    """
+    Member lists of archives, cached in SQLite (and an in-memory LRU) keyed by the archive's
+    path, size and st_mtime_ns, so repeat searches never reopen an unchanged archive. Misses
+    are read in a bounded pool.
+    """
+    def __init__(self, db_path: Optional[str] = None, workers: int = 4,
+                 max_stream_bytes: Optional[int] = 1024 ** 3, memory_members: int = 500_000):
+        """
+        Open (or create) the cache
+
+        Args:
+            db_path: SQLite file (defaults to ~/.fastique/cache/archives.sqlite)
+            workers: Archives read concurrently
+            max_stream_bytes: Largest compressed tar read (they are decompressed to be listed);
+                              None for no limit
+            memory_members: Members kept in memory across archives
+        """
+        if db_path is None:
+            db_path = os.path.join(str(Path.home()), '.fastique', 'cache', 'archives.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_stream_bytes = max_stream_bytes
+        self.memory_members = memory_members
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fastique-archive')
+        self._local = threading.local()
+        self.lock = threading.Lock()
+        # path -> (size, mtime_ns, members)
+        self.memory: 'OrderedDict[str, Tuple[int, int, List[Member]]]' = OrderedDict()
+        self.memory_used = 0
+
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS archives ('
+            ' path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL,'
+            ' members TEXT NOT NULL)'
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared across threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def members(self, path: str, stats: os.stat_result) -> List[Member]:
+        """
+        Get an archive's members, from the cache when the archive is unchanged
+
+        Args:
+            path: Archive file
+            stats: Its stat() result
+
+        Returns:
+            Members (empty for unreadable or oversized archives)
+        """
+        size, mtime_ns = stats.st_size, stats.st_mtime_ns
+        with self.lock:
+            cached = self.memory.get(path)
+            if cached is not None and cached[:2] == (size, mtime_ns):
+                self.memory.move_to_end(path)
+                ARCHIVE_REQUESTS.inc(result='hit')
+                return cached[2]
+
+        row = self._connection().execute(
+            'SELECT members FROM archives WHERE path = ? AND size = ? AND mtime_ns = ?',
+            (path, size, mtime_ns)).fetchone()
+        if row is not None:
+            ARCHIVE_REQUESTS.inc(result='hit')
+            members = [tuple(member) for member in json.loads(row[0])]
+        else:
+            ARCHIVE_REQUESTS.inc(result='miss')
+            members = self._read(path, size)
+            with self._connection() as connection:
+                # Unreadable archives are cached too, so they aren't retried until they change
+                connection.execute(
+                    'INSERT OR REPLACE INTO archives (path, size, mtime_ns, members) VALUES (?, ?, ?, ?)',
+                    (path, size, mtime_ns, json.dumps(members, ensure_ascii=False)))
+        self._remember(path, size, mtime_ns, members)
+        return members
+
+    def _read(self, path: str, size: int) -> List[Member]:
+        if self.max_stream_bytes is not None and size > self.max_stream_bytes \
+                and path.lower().endswith(_STREAMED_SUFFIXES):
+            logger.info("Not listing %s: compressed tar larger than %d bytes", path, self.max_stream_bytes)
+            return []
+        try:
+            return read_members(path)
+        except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError) as e:
+            SCAN_ERRORS.inc(source='archive')
+            logger.warning("Cannot read archive %s: %s", path, e)
+            return []
+
+    def _remember(self, path: str, size: int, mtime_ns: int, members: List[Member]) -> None:
+        with self.lock:
+            old = self.memory.pop(path, None)
+            if old is not None:
+                self.memory_used -= len(old[2])
+            self.memory[path] = (size, mtime_ns, members)
+            self.memory_used += len(members)
+            while len(self.memory) > 1 and self.memory_used > self.memory_members:
+                _, (_, _, evicted) = self.memory.popitem(last=False)
+                self.memory_used -= len(evicted)
+
+    def submit(self, path: str, stats: os.stat_result, callback: Callable[[str, List[Member]], None]) -> Future:
+        """Look up an archive's members in the pool and pass them to `callback(path, members)`"""
+        return self.pool.submit(lambda: callback(path, self.members(path, stats)))
+
+    def close(self) -> None:
+        """Stop the pool and close this thread's connection"""
+        self.pool.shutdown(wait=True)
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+_default_index: Optional[ArchiveIndex] = None
+_default_lock = threading.Lock()
+
+def default_archive_index() -> ArchiveIndex:
+    """Process-wide archive index for engines created without one"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = ArchiveIndex()
+        return _default_index
@@ -0,0 +1,411 @@
+# fastique/app/search/concurrency.py
+# Adaptive walker concurrency: per-device worker budgets tuned by AIMD on observed latency
+
+import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from app.metrics import ACTIVE_WORKERS, WALK_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+MOUNTINFO_PATH = '/proc/self/mountinfo'
+
+# Starting and maximum concurrency per kind of filesystem. Network filesystems hide
+# per-request latency behind parallelism; spinning disks thrash on seeks beyond 1-2
+# outstanding walks; memory filesystems are CPU-bound.
+NETWORK_FILESYSTEMS = frozenset({'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ceph', 'glusterfs',
+                                 'fuse.sshfs', 'fuse.rclone', 'fuse.s3fs', 'lustre', 'gpfs', '9p'})
+MEMORY_FILESYSTEMS = frozenset({'tmpfs', 'ramfs', 'proc', 'sysfs', 'devtmpfs'})
+PROFILES = {
+    'network': (16, 64),
+    'rotational': (2, 4),
+    'memory': (2, 8),
+    'local': (4, 32),
+}
+
+class Mount:
+    """One line of /proc/self/mountinfo"""
+    __slots__ = ('device', 'mount_point', 'fs_type', 'source')
+
+    def __init__(self, device: int, mount_point: str, fs_type: str, source: str):
+        self.device = device
+        self.mount_point = mount_point
+        self.fs_type = fs_type
+        self.source = source
+
+    def __repr__(self):
+        return f"Mount({self.mount_point!r}, {self.fs_type!r}, {self.source!r})"
+
+def _unescape(field: str) -> str:
+    """Decode the octal escapes (\\040 for a space, ...) used in mountinfo paths"""
+    if '\\' not in field:
+        return field
+    return field.encode('latin-1').decode('unicode_escape').encode('latin-1').decode('utf-8', 'replace')
+
+def parse_mountinfo(text: str) -> List[Mount]:
+    """
+    Parse the contents of /proc/self/mountinfo
+
+    Args:
+        text: File contents
+
+    Returns:
+        Mounts in file order
+    """
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        if '-' not in fields:
+            continue
+        separator = fields.index('-')
+        if separator < 5 or len(fields) < separator + 3:
+            continue
+        major, _, minor = fields[2].partition(':')
+        try:
+            device = os.makedev(int(major), int(minor))
+        except ValueError:
+            continue
+        mounts.append(Mount(device, _unescape(fields[4]), fields[separator + 1],
+                            _unescape(fields[separator + 2])))
+    return mounts
+
+def _is_rotational(device: int) -> Optional[bool]:
+    """Whether a block device is a spinning disk (None if unknown, e.g. not a block device)"""
+    path = os.path.realpath(f'/sys/dev/block/{os.major(device)}:{os.minor(device)}')
+    # Partitions have no queue of their own; their parent disk does
+    for candidate in (path, os.path.dirname(path)):
+        try:
+            with open(os.path.join(candidate, 'queue', 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+class MountTable:
+    """Filesystem lookup by device number, falling back to the longest mount point prefix"""
+    def __init__(self, mounts: Iterable[Mount]):
+        self.mounts = list(mounts)
+        self.by_device: Dict[int, Mount] = {}
+        for mount in self.mounts:
+            # Later mounts shadow earlier ones on the same device
+            self.by_device[mount.device] = mount
+        self.by_length = sorted(self.mounts, key=lambda mount: len(mount.mount_point), reverse=True)
+
+    @classmethod
+    def load(cls, path: str = MOUNTINFO_PATH) -> 'MountTable':
+        """Read the mount table (empty where /proc is unavailable)"""
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                return cls(parse_mountinfo(f.read()))
+        except OSError:
+            return cls([])
+
+    def find(self, device: int, path: Optional[str] = None) -> Optional[Mount]:
+        """Mount for a device, or for the path (btrfs subvolumes report anonymous devices)"""
+        mount = self.by_device.get(device)
+        if mount is not None or path is None:
+            return mount
+        for mount in self.by_length:
+            point = mount.mount_point.rstrip('/')
+            if path == mount.mount_point or path.startswith(point + '/'):
+                return mount
+        return None
+
+def classify(mount: Optional[Mount], device: int) -> str:
+    """Kind of storage behind a device: 'network', 'rotational', 'memory' or 'local'"""
+    if mount is not None:
+        if mount.fs_type in NETWORK_FILESYSTEMS or mount.fs_type.startswith('nfs'):
+            return 'network'
+        if mount.fs_type in MEMORY_FILESYSTEMS:
+            return 'memory'
+    if _is_rotational(device):
+        return 'rotational'
+    return 'local'
+
+class AIMDController:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit driven by latency.
+    The limit grows by one after `limit` consecutive good samples (about one round of
+    work at the current parallelism) and halves when latency exceeds `tolerance` times
+    the baseline, at most once per round.
+    """
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 64,
+                 tolerance: float = 2.0, backoff: float = 0.5):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum, self.minimum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.tolerance = tolerance
+        self.backoff = backoff
+        # Lowest recent latency, drifting slowly upwards so it follows changed conditions
+        self.baseline: Optional[float] = None
+        self.smoothed: Optional[float] = None
+        self.samples = 0
+        self._credit = 0
+        self._last_decrease = 0
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float) -> int:
+        """
+        Record one latency sample
+
+        Args:
+            latency: Seconds per unit of work (e.g. per directory entry)
+
+        Returns:
+            The new limit
+        """
+        with self._lock:
+            self.samples += 1
+            # Judge a smoothed latency: single directories vary too much on their own
+            if self.smoothed is None:
+                self.smoothed = latency
+            else:
+                self.smoothed += (latency - self.smoothed) * 0.2
+            if self.baseline is None or self.smoothed < self.baseline:
+                self.baseline = self.smoothed
+            else:
+                self.baseline += (self.smoothed - self.baseline) * 0.01
+
+            if self.smoothed > self.baseline * self.tolerance:
+                self._credit = 0
+                if self.samples - self._last_decrease >= self.limit:
+                    self.limit = max(self.minimum, int(self.limit * self.backoff))
+                    self._last_decrease = self.samples
+            else:
+                self._credit += 1
+                if self._credit >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._credit = 0
+            return self.limit
+
+class DeviceBudget:
+    """
+    Worker budget for one device, shared by every search (or, for the background budget,
+    every background index build) in the process
+    """
+    def __init__(self, device: int, mount: Optional[Mount], kind: str,
+                 controller: AIMDController, background: bool = False):
+        self.device = device
+        self.mount = mount
+        self.kind = kind
+        self.controller = controller
+        self.background = background
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return self.controller.limit
+
+    def acquire(self, force: bool = False) -> bool:
+        """Take a worker slot; `force` always succeeds (every walk keeps one worker per device)"""
+        with self._lock:
+            if not force and self.in_flight >= self.controller.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def observe(self, latency: float) -> None:
+        limit = self.controller.observe(latency)
+        WALK_CONCURRENCY.set(limit, device=self.label, pool='background' if self.background else 'foreground')
+
+    @property
+    def label(self) -> str:
+        return f"{os.major(self.device)}:{os.minor(self.device)}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        baseline = self.controller.baseline
+        return {
+            'mount_point': self.mount.mount_point if self.mount else None,
+            'fs_type': self.mount.fs_type if self.mount else None,
+            'kind': self.kind,
+            'background': self.background,
+            'limit': self.controller.limit,
+            'in_flight': self.in_flight,
+            'samples': self.controller.samples,
+            'baseline_us_per_entry': round(baseline * 1e6, 3) if baseline is not None else None
+        }
+
+class ConcurrencyManager:
+    """
+    Creates and keeps two DeviceBudgets per device: one for interactive walks and one for
+    background walks, so background work never holds the slots searches need and its
+    throttled latencies never shrink the searches' limit
+    """
+    def __init__(self, adaptive: bool = True, default_threads: int = 4,
+                 mount_table: Optional[MountTable] = None):
+        """
+        Initialize the manager
+
+        Args:
+            adaptive: Tune limits per device; otherwise every device gets `default_threads`
+            default_threads: Static limit when not adaptive
+            mount_table: Mount table (read from /proc/self/mountinfo when first needed)
+        """
+        self.adaptive = adaptive
+        self.default_threads = max(default_threads, 1)
+        self._mount_table = mount_table
+        self.budgets: Dict[int, DeviceBudget] = {}
+        self.background_budgets: Dict[int, DeviceBudget] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def mount_table(self) -> MountTable:
+        if self._mount_table is None:
+            self._mount_table = MountTable.load()
+        return self._mount_table
+
+    def budget(self, device: int, path: Optional[str] = None, background: bool = False) -> DeviceBudget:
+        """Budget for a device, created from its filesystem profile on first use"""
+        budgets = self.background_budgets if background else self.budgets
+        budget = budgets.get(device)
+        if budget is not None:
+            return budget
+        with self._lock:
+            budget = budgets.get(device)
+            if budget is None:
+                mount = self.mount_table.find(device, path)
+                kind = classify(mount, device)
+                if self.adaptive:
+                    initial, maximum = PROFILES[kind]
+                    controller = AIMDController(initial, maximum=maximum)
+                else:
+                    controller = AIMDController(self.default_threads, minimum=self.default_threads,
+                                                maximum=self.default_threads)
+                budget = budgets[device] = DeviceBudget(device, mount, kind, controller, background)
+                logger.debug("Walk budget for %s (%s): %d workers", path, kind, controller.limit)
+        return budget
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-device limits and latency baselines (background budgets under '<device> background')"""
+        with self._lock:
+            budgets = list(self.budgets.values()) + list(self.background_budgets.values())
+        return {budget.label + (' background' if budget.background else ''): budget.to_dict()
+                for budget in budgets}
+
+_default_manager: Optional[ConcurrencyManager] = None
+
+def default_manager() -> ConcurrencyManager:
+    """Process-wide manager used when none is configured"""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = ConcurrencyManager()
+    return _default_manager
+
+# A walk task's children: (device, path, task)
+Children = List[Tuple[int, str, Any]]
+
+class AdaptivePool:
+    """
+    Runs directory tasks on per-device sets of worker threads, sized by the device budgets.
+    `process(task)` scans one directory and returns (children, entries); its latency per
+    entry feeds the device's controller. Workers take tasks until their device queue is
+    empty or the budget shrinks below the number of running workers.
+    """
+    def __init__(self, manager: ConcurrencyManager, process: Callable[[Any], Tuple[Children, int]],
+                 thread_name: str = 'fastique-walk', initializer: Optional[Callable[[], Any]] = None,
+                 max_workers: Optional[int] = None, throttle: Optional[Callable[[int], Any]] = None,
+                 background: bool = False, finalizer: Optional[Callable[[], Any]] = None):
+        """
+        Initialize the pool
+
+        Args:
+            manager: Source of per-device budgets
+            process: Callable scanning one directory task, returning (children, entries)
+            thread_name: Worker thread name prefix
+            initializer: Optional callable run at the start of each worker thread
+            max_workers: Optional cap on this pool's workers per device
+            throttle: Optional callable given each task's entry count after the task, outside
+                      the timed section, so time it spends waiting (e.g. in the governor)
+                      is not taken for device latency
+            background: Whether to draw workers from the devices' background budgets
+            finalizer: Optional callable run as each worker thread exits (e.g. to close
+                       per-thread connections the tasks opened)
+        """
+        self.manager = manager
+        self.max_workers = max_workers
+        self.throttle = throttle
+        self.background = background
+        self.process = process
+        self.thread_name = thread_name
+        self.initializer = initializer
+        self.finalizer = finalizer
+        self.queues: Dict[int, deque] = {}
+        self.workers: Dict[int, int] = {}
+        self.pending = 0
+        self.stopped = False
+        self.done = threading.Event()
+        self.done.set()
+        self.lock = threading.Lock()
+
+    def submit(self, device: int, path: str, task: Any) -> None:
+        """Queue a directory; starts a worker if the device's budget allows"""
+        budget = self.manager.budget(device, path, self.background)
+        with self.lock:
+            if self.stopped:
+                return
+            self.queues.setdefault(device, deque()).append(task)
+            self.pending += 1
+            self.done.clear()
+            running = self.workers.get(device, 0)
+            if running >= self._limit(budget) or not budget.acquire(force=running == 0):
+                return
+            self.workers[device] = running + 1
+        ACTIVE_WORKERS.inc()
+        threading.Thread(target=self._work, args=(device, budget), daemon=True,
+                         name=f'{self.thread_name}-{budget.label}').start()
+
+    def stop(self) -> None:
+        """Stop handing out tasks (running directories finish) and release waiters"""
+        with self.lock:
+            self.stopped = True
+            for queue in self.queues.values():
+                self.pending -= len(queue)
+                queue.clear()
+        self.done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    def _limit(self, budget: DeviceBudget) -> int:
+        limit = budget.limit
+        return limit if self.max_workers is None else min(limit, self.max_workers)
+
+    def _work(self, device: int, budget: DeviceBudget) -> None:
+        if self.initializer is not None:
+            self.initializer()
+        queue = self.queues[device]
+        try:
+            while True:
+                with self.lock:
+                    if self.stopped or not queue or self.workers[device] > self._limit(budget):
+                        self.workers[device] -= 1
+                        return
+                    task = queue.popleft()
+                start = time.perf_counter()
+                try:
+                    children, entries = self.process(task)
+                except Exception:
+                    logger.exception("Walk task failed")
+                    children, entries = [], 0
+                budget.observe((time.perf_counter() - start) / max(entries, 1))
+                if self.throttle is not None:
+                    self.throttle(entries)
+                for child_device, child_path, child_task in children:
+                    self.submit(child_device, child_path, child_task)
+                with self.lock:
+                    self.pending -= 1
+                    if self.pending <= 0:
+                        self.done.set()
+        finally:
+            budget.release()
+            ACTIVE_WORKERS.dec()
+            if self.finalizer is not None:
+                self.finalizer()
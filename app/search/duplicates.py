@@ -0,0 +1,251 @@
+# fastique/app/search/duplicates.py
+# Duplicate file detection: size buckets, then head/tail hashes, then full hashes
+
+import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.search.exclude import ExcludeMatcher
+from app.search.query_planner import plan_name_pattern
+from app.search.hash_cache import new_hash, hash_file
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from each end of a file for the partial hash
+SAMPLE_SIZE = 4096
+
+class DuplicateFinder:
+    """
+    Finds groups of files with identical content. Each stage only looks at candidates that
+    survived the previous, cheaper one:
+
+    1. Group by size (metadata only; unique sizes cannot have duplicates)
+    2. Collapse hardlinks (same st_dev/st_ino is one file, not a duplicate)
+    3. Hash the first and last SAMPLE_SIZE bytes
+    4. Fully hash what still collides, in a worker pool
+    """
+    def __init__(self, index=None, workers: int = 4, min_size: int = 1,
+                 exclude_patterns: Optional[List[str]] = None, use_ignore_files: bool = False,
+                 hash_cache=None, governor=None):
+        """
+        Initialize the finder
+
+        Args:
+            index: Optional SearchIndex (or IndexClient) used instead of walking covered directories
+            workers: Threads used for hashing
+            min_size: Ignore files smaller than this (empty files are all "identical")
+            exclude_patterns: Gitignore-style patterns skipped by the fresh walk
+            use_ignore_files: Whether the fresh walk honours .gitignore/.fastiqueignore files
+            hash_cache: Optional HashCache; full hashes are then looked up before files are read
+            governor: Optional ResourceGovernor limiting the bytes/sec read for hashing
+        """
+        self.index = index
+        self.workers = workers
+        self.min_size = max(min_size, 0)
+        self.exclude = ExcludeMatcher.from_patterns(exclude_patterns, use_ignore_files)
+        self.hash_cache = hash_cache
+        self.governor = governor
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+
+    def find(self, paths: List[str], include_hidden: bool = False) -> Dict[str, Any]:
+        """
+        Find duplicate files below the given directories
+
+        Args:
+            paths: Directories to scan
+            include_hidden: Whether to include hidden files and directories
+
+        Returns:
+            Dictionary with 'groups' (largest waste first), totals and per-stage statistics
+        """
+        start_time = time.time()
+        self.stats = {'files_scanned': 0, 'size_candidates': 0, 'hardlinks_skipped': 0,
+                      'partial_hashed': 0, 'full_hashed': 0, 'bytes_read': 0, 'bytes_total': 0}
+
+        buckets: Dict[int, List[str]] = {}
+        seen_paths = set()
+        for path, size in self._collect(paths, include_hidden):
+            if path in seen_paths:
+                continue
+            seen_paths.add(path)
+            self.stats['files_scanned'] += 1
+            self.stats['bytes_total'] += size
+            buckets.setdefault(size, []).append(path)
+
+        candidates = {size: files for size, files in buckets.items() if len(files) > 1}
+        self.stats['size_candidates'] = sum(len(files) for files in candidates.values())
+
+        buckets = []
+        for size, files in candidates.items():
+            files = self._collapse_hardlinks(files)
+            if len(files) > 1:
+                buckets.append((size, files))
+
+        # Hashing threads run at background priority when governed
+        initializer = self.governor.enter_background if self.governor is not None else None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='fastique-dupes',
+                                initializer=initializer) as pool:
+            partial = self._hash_stage(pool, buckets, self._partial_hash)
+            self.stats['partial_hashed'] = sum(len(files) for _, files in buckets)
+
+            # Small files were read whole by the partial hash, which is then already a full hash
+            confirmed = [group for group in partial if group[0] <= 2 * SAMPLE_SIZE]
+            remaining = [(size, paths) for size, _, paths in partial if size > 2 * SAMPLE_SIZE]
+            self.stats['full_hashed'] = sum(len(paths) for _, paths in remaining)
+            if self.hash_cache is not None:
+                confirmed.extend(self._cached_full_stage(remaining))
+            else:
+                confirmed.extend(self._hash_stage(pool, remaining, self._full_hash))
+
+        groups = [{
+            'size': size,
+            'hash': digest,
+            'count': len(paths),
+            'wasted_bytes': size * (len(paths) - 1),
+            'paths': sorted(paths)
+        } for size, digest, paths in confirmed]
+
+        groups.sort(key=lambda group: (-group['wasted_bytes'], group['paths'][0]))
+        return {
+            'groups': groups,
+            'group_count': len(groups),
+            'duplicate_files': sum(group['count'] - 1 for group in groups),
+            'wasted_bytes': sum(group['wasted_bytes'] for group in groups),
+            'stats': dict(self.stats),
+            'time': round(time.time() - start_time, 3)
+        }
+
+    def _collect(self, paths: List[str], include_hidden: bool) -> Iterable[Tuple[str, int]]:
+        """Yield (path, size) for regular files, from the index where it covers a path"""
+        for path in paths:
+            if not os.path.isdir(path):
+                continue
+            entries = None
+            if self.index is not None and not include_hidden:
+                entries = self.index.query(path, plan_name_pattern(''))
+            if entries is not None:
+                for entry in entries:
+                    if not entry['is_directory'] and entry['size'] >= self.min_size:
+                        yield entry['full_path'], entry['size']
+            else:
+                yield from self._walk(path, include_hidden)
+
+    def _walk(self, directory: str, include_hidden: bool) -> Iterable[Tuple[str, int]]:
+        """Walk a directory without following symlinks"""
+        stack = [(directory, self.exclude)]
+        while stack:
+            current, exclude = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    entries = list(it)
+            except OSError as e:
+                logger.warning("Error accessing %s: %s", current, e)
+                continue
+
+            if exclude.active:
+                exclude = exclude.for_directory(current, {entry.name for entry in entries})
+            for entry in entries:
+                if not include_hidden and entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_symlink():
+                        continue
+                    is_dir = entry.is_dir()
+                    if exclude.active and exclude.is_excluded(entry.name, entry.path, is_dir):
+                        continue
+                    if is_dir:
+                        stack.append((entry.path, exclude))
+                    elif entry.is_file():
+                        size = entry.stat().st_size
+                        if size >= self.min_size:
+                            yield entry.path, size
+                except OSError:
+                    continue
+
+    def _collapse_hardlinks(self, files: List[str]) -> List[str]:
+        """Keep one path per (st_dev, st_ino); links to the same inode share storage"""
+        unique = {}
+        for path in files:
+            try:
+                stats = os.stat(path)
+            except OSError:
+                continue
+            key = (stats.st_dev, stats.st_ino)
+            if key in unique:
+                self.stats['hardlinks_skipped'] += 1
+                if path < unique[key]:
+                    unique[key] = path
+            else:
+                unique[key] = path
+        return list(unique.values())
+
+    def _hash_stage(self, pool: ThreadPoolExecutor, buckets: List[Tuple[int, List[str]]],
+                    hash_file) -> List[Tuple[int, str, List[str]]]:
+        """
+        Hash every file of every bucket in one pass over the pool and re-bucket by digest
+
+        Args:
+            pool: Worker pool
+            buckets: (size, paths) candidate groups
+            hash_file: Callable (path, size) -> digest or None
+
+        Returns:
+            (size, digest, paths) groups that still have more than one member
+        """
+        jobs = [(size, path) for size, paths in buckets for path in paths]
+        digests = pool.map(lambda job: hash_file(job[1], job[0]), jobs)
+        groups: Dict[Tuple[int, str], List[str]] = {}
+        for (size, path), digest in zip(jobs, digests):
+            if digest is not None:
+                groups.setdefault((size, digest), []).append(path)
+        return [(size, digest, paths) for (size, digest), paths in groups.items() if len(paths) > 1]
+
+    def _cached_full_stage(self, buckets: List[Tuple[int, List[str]]]) -> List[Tuple[int, str, List[str]]]:
+        """Full-hash stage through the persistent hash cache (which hashes misses in its own pool)"""
+        digests = self.hash_cache.hash_many([path for _, paths in buckets for path in paths],
+                                            on_read=self._count_read)
+        groups: Dict[Tuple[int, str], List[str]] = {}
+        for size, paths in buckets:
+            for path in paths:
+                digest = digests.get(path)
+                if digest is not None:
+                    groups.setdefault((size, digest), []).append(path)
+        return [(size, digest, paths) for (size, digest), paths in groups.items() if len(paths) > 1]
+
+    def _count_read(self, size: int) -> None:
+        with self._stats_lock:
+            self.stats['bytes_read'] += size
+        if self.governor is not None:
+            self.governor.throttle(nbytes=size)
+
+    def _partial_hash(self, path: str, size: int) -> Optional[str]:
+        """Hash the first and last SAMPLE_SIZE bytes (the whole file if it is small)"""
+        digest = new_hash()
+        try:
+            with open(path, 'rb') as f:
+                if size <= 2 * SAMPLE_SIZE:
+                    data = f.read()
+                    digest.update(data)
+                    self._count_read(len(data))
+                else:
+                    head = f.read(SAMPLE_SIZE)
+                    f.seek(-SAMPLE_SIZE, os.SEEK_END)
+                    tail = f.read(SAMPLE_SIZE)
+                    digest.update(head)
+                    digest.update(tail)
+                    self._count_read(len(head) + len(tail))
+        except OSError as e:
+            logger.warning("Cannot read %s: %s", path, e)
+            return None
+        return digest.hexdigest()
+
+    def _full_hash(self, path: str, size: int = 0) -> Optional[str]:
+        """Hash a whole file"""
+        try:
+            return hash_file(path, self._count_read)
+        except OSError as e:
+            logger.warning("Cannot read %s: %s", path, e)
+            return None
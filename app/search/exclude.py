@@ -0,0 +1,240 @@
+# fastique/app/search/exclude.py
+# Gitignore-style exclude rules compiled into a single matcher used to prune traversal
+
+import os
+import re
+import logging
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-directory ignore files respected when enabled
+IGNORE_FILENAMES = ('.gitignore', '.fastiqueignore')
+
+def _translate_glob(pattern: str) -> str:
+    """
+    Translate a gitignore glob into a regex (without anchors)
+
+    Args:
+        pattern: Glob such as 'build', '*.pyc', 'docs/**/tmp'
+
+    Returns:
+        Regex source matching the same paths ('/' separated)
+    """
+    i, n = 0, len(pattern)
+    parts = []
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                parts.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                parts.append('.*')
+                i += 2
+                continue
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                parts.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+class _RuleSet:
+    """Rules from one source (config, request or an ignore file) compiled into regexes"""
+    __slots__ = ('base', 'name_re', 'path_re', 'negated_name_re', 'negated_path_re')
+
+    def __init__(self, base: Optional[str], lines: Iterable[str]):
+        """
+        Compile a list of gitignore-style lines
+
+        Args:
+            base: Directory that anchored patterns are relative to (None = any depth)
+            lines: Pattern lines; blank lines and '#' comments are ignored
+        """
+        self.base = base
+        buckets = {(False, False): [], (False, True): [], (True, False): [], (True, True): []}
+
+        for raw in lines:
+            line = raw.rstrip('\n').rstrip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            if negated:
+                line = line[1:]
+            dir_only = line.endswith('/')
+            # Patterns containing a slash (other than a trailing one) are anchored to the
+            # base directory; without a base they match any path ending in that sequence
+            anchored = '/' in line.rstrip('/')
+            line = line.strip('/')
+            if not line:
+                continue
+            regex = _translate_glob(line) + ('/' if dir_only else '/?')
+            if anchored and base is None:
+                regex = '(?:.*/)?' + regex
+            buckets[(negated, anchored)].append(regex)
+
+        def compile_bucket(regexes: List[str]):
+            return re.compile('(?:' + '|'.join(regexes) + ')') if regexes else None
+
+        self.name_re = compile_bucket(buckets[(False, False)])
+        self.path_re = compile_bucket(buckets[(False, True)])
+        self.negated_name_re = compile_bucket(buckets[(True, False)])
+        self.negated_path_re = compile_bucket(buckets[(True, True)])
+
+    @property
+    def empty(self) -> bool:
+        return self.name_re is None and self.path_re is None
+
+    def matches(self, name: str, full_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Check an entry against this rule set
+
+        Returns:
+            True if excluded, False if explicitly re-included, None if no rule applies
+        """
+        subject = name + '/' if is_dir else name
+        relative = None
+        if self.path_re is not None or self.negated_path_re is not None:
+            relative = full_path if self.base is None else full_path[len(self.base):].lstrip(os.sep)
+            relative = relative.replace(os.sep, '/')
+            if is_dir:
+                relative += '/'
+
+        if self.negated_name_re is not None and self.negated_name_re.fullmatch(subject):
+            return False
+        if self.negated_path_re is not None and self.negated_path_re.fullmatch(relative):
+            return False
+        if self.name_re is not None and self.name_re.fullmatch(subject):
+            return True
+        if self.path_re is not None and self.path_re.fullmatch(relative):
+            return True
+        return None
+
+class ExcludeMatcher:
+    """
+    Immutable stack of rule sets. Global and per-request patterns form the bottom layer;
+    ignore files found while descending add layers that only apply below their directory.
+    Within a layer '!' patterns win over excludes; deeper layers win over shallower ones.
+    """
+    # Cache of parsed ignore files keyed by (path, mtime_ns, size)
+    _ignore_file_cache = {}
+    _ignore_file_lock = threading.Lock()
+
+    def __init__(self, layers: Tuple[_RuleSet, ...], ignore_filenames: Sequence[str] = ()):
+        self.layers = layers
+        self.ignore_filenames = tuple(ignore_filenames)
+
+    @classmethod
+    def from_patterns(cls, patterns: Optional[Iterable[str]] = None,
+                      use_ignore_files: bool = False) -> 'ExcludeMatcher':
+        """
+        Build a matcher from global patterns
+
+        Args:
+            patterns: Gitignore-style patterns matched against entry names at any depth
+            use_ignore_files: Whether to honour .gitignore/.fastiqueignore files while descending
+
+        Returns:
+            Compiled matcher (shared for identical arguments)
+        """
+        return _compile(tuple(patterns or ()), use_ignore_files)
+
+    @property
+    def active(self) -> bool:
+        """Whether the matcher can exclude anything at all"""
+        return bool(self.layers) or bool(self.ignore_filenames)
+
+    def for_directory(self, directory: str, names: Iterable[str]) -> 'ExcludeMatcher':
+        """
+        Get the matcher that applies to the entries of a directory
+
+        Args:
+            directory: Directory being listed
+            names: Names of its entries (used to spot ignore files without extra syscalls)
+
+        Returns:
+            This matcher, or a new one with the directory's ignore files layered on top
+        """
+        if not self.ignore_filenames:
+            return self
+
+        present = [n for n in self.ignore_filenames if n in names]
+        if not present:
+            return self
+
+        layers = self.layers
+        for filename in present:
+            rule_set = self._load_ignore_file(directory, os.path.join(directory, filename))
+            if rule_set is not None:
+                layers = layers + (rule_set,)
+        return ExcludeMatcher(layers, self.ignore_filenames)
+
+    def is_excluded(self, name: str, full_path: str, is_dir: bool) -> bool:
+        """
+        Check whether an entry (and, for directories, its whole subtree) is excluded
+
+        Args:
+            name: Entry name
+            full_path: Full path of the entry
+            is_dir: Whether the entry is a directory
+
+        Returns:
+            True if the entry should be skipped
+        """
+        for rule_set in reversed(self.layers):
+            verdict = rule_set.matches(name, full_path, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    @classmethod
+    def _load_ignore_file(cls, directory: str, path: str) -> Optional[_RuleSet]:
+        """Parse an ignore file, reusing the cached result while it is unchanged"""
+        try:
+            stats = os.stat(path)
+        except OSError:
+            return None
+        key = (path, stats.st_mtime_ns, stats.st_size)
+
+        with cls._ignore_file_lock:
+            cached = cls._ignore_file_cache.get(key)
+        if cached is not None:
+            return cached
+
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                rule_set = _RuleSet(directory, f.readlines())
+        except OSError as e:
+            logger.warning("Could not read ignore file %s: %s", path, e)
+            return None
+
+        with cls._ignore_file_lock:
+            if len(cls._ignore_file_cache) > 4096:
+                cls._ignore_file_cache.clear()
+            cls._ignore_file_cache[key] = rule_set
+        return rule_set
+
+@lru_cache(maxsize=128)
+def _compile(patterns: Tuple[str, ...], use_ignore_files: bool) -> ExcludeMatcher:
+    """Compile global patterns once per distinct pattern list"""
+    base = _RuleSet(None, patterns)
+    layers = () if base.empty else (base,)
+    return ExcludeMatcher(layers, IGNORE_FILENAMES if use_ignore_files else ())
\ No newline at end of file
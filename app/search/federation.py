@@ -0,0 +1,211 @@
+# fastique/app/search/federation.py
+# Scatter-gather search across several Fastique nodes with ranked merging
+
+import json
+import time
+import heapq
+import socket
+import logging
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Request fields forwarded to peers (each peer searches its own default paths)
+FORWARDED_FIELDS = ('query', 'file_types', 'use_regex', 'case_sensitive', 'include_hidden',
+                    'max_depth', 'exclude', 'same_filesystem', 'match_mode', 'search_archives',
+                    'date_from', 'date_to', 'size_min', 'size_max')
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class Peer:
+    """A remote Fastique node, addressed as http(s)://host:port[/prefix] or unix:/path/to.sock"""
+    def __init__(self, address: str, timeout: float = 2.0):
+        """
+        Initialize a peer
+
+        Args:
+            address: Base URL or Unix socket address of the node
+            timeout: Socket timeout for requests to this node
+        """
+        self.address = address.rstrip('/')
+        self.timeout = timeout
+        if self.address.startswith('unix:'):
+            self.socket_path = self.address[len('unix:'):]
+            self.scheme, self.netloc, self.prefix = 'unix', '', ''
+        else:
+            parts = urlsplit(self.address)
+            if parts.scheme not in ('http', 'https') or not parts.netloc:
+                raise ValueError(f"Invalid peer address: {address}")
+            self.socket_path = None
+            self.scheme, self.netloc, self.prefix = parts.scheme, parts.netloc, parts.path
+
+    @property
+    def name(self) -> str:
+        return self.address
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.scheme == 'unix':
+            return _UnixHTTPConnection(self.socket_path, self.timeout)
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def search(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Run a search on the peer
+
+        Args:
+            payload: Search request body
+
+        Returns:
+            The peer's results
+
+        Raises:
+            OSError: On connection failures and timeouts
+            ValueError: On a non-200 or malformed response
+        """
+        connection = self._connection()
+        try:
+            connection.request('POST', self.prefix + '/search/', body=json.dumps(payload),
+                               headers={'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            body = response.read()
+        finally:
+            connection.close()
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status}")
+        return json.loads(body)['results']
+
+def _result_key(ranked: bool) -> Callable[[Dict[str, Any]], tuple]:
+    """Sort key: best score first for ranked (fuzzy) searches, otherwise by path"""
+    if ranked:
+        return lambda result: (-result.get('score', float('-inf')), result['path'], result['filename'])
+    return lambda result: (result['path'], result['filename'])
+
+def merge_results(result_lists: Iterable[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """
+    K-way merge of per-node result lists, dropping duplicates (the same file seen by several
+    nodes, e.g. through a shared mount, has the same full path, size and modification time)
+
+    Args:
+        result_lists: One result list per node
+        limit: Maximum number of merged results
+
+    Returns:
+        Merged results in rank order
+    """
+    result_lists = list(result_lists)
+    ranked = any('score' in result for results in result_lists for result in results[:1])
+    key = _result_key(ranked)
+    streams = [sorted(results, key=key) for results in result_lists]
+
+    merged = []
+    seen = set()
+    for result in heapq.merge(*streams, key=key):
+        identity = (result['full_path'], result['size'], result['modified_time'])
+        if identity in seen:
+            continue
+        seen.add(identity)
+        merged.append(result)
+        if len(merged) >= limit:
+            break
+    return merged
+
+class FederatedSearch:
+    """
+    Fans a search out to the local engine and all peers concurrently, waits at most
+    `timeout` seconds, and merges whatever came back. Nodes that are slow or failing are
+    reported in the response instead of failing the whole search.
+    """
+    def __init__(self, peers: List[Peer], timeout: float = 2.0, max_results: int = 500,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        """
+        Initialize the federation
+
+        Args:
+            peers: Remote nodes to query
+            timeout: Overall deadline in seconds
+            max_results: Maximum number of merged results
+            executor: Pool used for the fan-out (a private one is created if omitted)
+        """
+        self.peers = peers
+        self.timeout = timeout
+        self.max_results = max_results
+        self.executor = executor or ThreadPoolExecutor(max_workers=max(4, len(peers) + 1),
+                                                       thread_name_prefix='fastique-federation')
+
+    def search(self, payload: Dict[str, Any],
+               local_search: Optional[Callable[[], List[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        Run a federated search
+
+        Args:
+            payload: Search request body (only FORWARDED_FIELDS are sent to peers)
+            local_search: Optional callable returning this node's own results
+
+        Returns:
+            Dictionary with merged 'results', per-node status in 'nodes' and a 'partial' flag
+        """
+        start_time = time.time()
+        forwarded = {field: payload[field] for field in FORWARDED_FIELDS if field in payload}
+
+        tasks = {}
+        if local_search is not None:
+            tasks['local'] = local_search
+        for peer in self.peers:
+            tasks[peer.name] = (lambda peer=peer: peer.search(forwarded))
+
+        futures = {name: self.executor.submit(self._timed, task) for name, task in tasks.items()}
+        wait(futures.values(), timeout=self.timeout)
+
+        nodes = []
+        result_lists = []
+        for name, future in futures.items():
+            if not future.done():
+                future.cancel()
+                nodes.append({'node': name, 'status': 'timeout', 'latency': round(time.time() - start_time, 3),
+                              'count': 0})
+                continue
+            latency, results, error = future.result()
+            if error is not None:
+                logger.warning("Federated search on %s failed: %s", name, error)
+                status = 'timeout' if isinstance(error, TimeoutError) else 'error'
+                nodes.append({'node': name, 'status': status, 'latency': round(latency, 3),
+                              'count': 0, 'error': str(error) or error.__class__.__name__})
+                continue
+            for result in results:
+                result['node'] = name
+            result_lists.append(results)
+            nodes.append({'node': name, 'status': 'ok', 'latency': round(latency, 3), 'count': len(results)})
+
+        results = merge_results(result_lists, self.max_results)
+        return {
+            'query': payload.get('query', ''),
+            'count': len(results),
+            'time': round(time.time() - start_time, 3),
+            'partial': any(node['status'] != 'ok' for node in nodes),
+            'nodes': nodes,
+            'results': results
+        }
+
+    @staticmethod
+    def _timed(task: Callable[[], List[Dict[str, Any]]]) -> tuple:
+        """Run a node's search, returning (latency, results, exception)"""
+        start_time = time.time()
+        try:
+            results = task()
+            return time.time() - start_time, results, None
+        except Exception as e:
+            return time.time() - start_time, [], e
@@ -2,7 +2,9 @@
 # File operations functionality
 
 import os
+import stat
 import shutil
+import filecmp
 import subprocess
 import platform
 from typing import Dict, Any, Tuple, Optional
@@ -101,20 +103,30 @@ class FileOperations:
             raise FileOperationError(f"Failed to open file: {str(e)}")
     
     @staticmethod
-    def copy_file(source: str, destination: str) -> bool:
+    def copy_file(source: str, destination: str, skip_identical: bool = False, hash_cache=None) -> bool:
         """
         Copy a file or directory
         
         Args:
             source: Source path
             destination: Destination path
+            skip_identical: Don't copy a file over an existing destination with the same content
+            hash_cache: Optional HashCache used to compare contents without rereading unchanged files
             
         Returns:
-            True if successful, raises exception otherwise
+            True if copied, False if skipped as identical; raises exception otherwise
         """
         if not os.path.exists(source):
             raise FileOperationError(f"Source does not exist: {source}")
         
+        # A file copied into an existing directory lands under its own name there
+        target = destination
+        if os.path.isdir(destination) and not os.path.isdir(source):
+            target = os.path.join(destination, os.path.basename(source))
+        
+        if skip_identical and FileOperations.files_identical(source, target, hash_cache):
+            return False
+        
         try:
             if os.path.isdir(source):
                 shutil.copytree(source, destination)
@@ -126,6 +138,38 @@ class FileOperations:
         except Exception as e:
             raise FileOperationError(f"Failed to copy: {str(e)}")
     
+    @staticmethod
+    def files_identical(first: str, second: str, hash_cache=None) -> bool:
+        """
+        Check whether two regular files have the same content
+        
+        Args:
+            first: First file path
+            second: Second file path
+            hash_cache: Optional HashCache to take hashes from
+            
+        Returns:
+            True if both exist and their contents are equal
+        """
+        try:
+            first_stats, second_stats = os.stat(first), os.stat(second)
+        except OSError:
+            return False
+        if not (stat.S_ISREG(first_stats.st_mode) and stat.S_ISREG(second_stats.st_mode)):
+            return False
+        if first_stats.st_size != second_stats.st_size:
+            return False
+        if (first_stats.st_dev, first_stats.st_ino) == (second_stats.st_dev, second_stats.st_ino):
+            return True
+        
+        try:
+            if hash_cache is not None:
+                digests = hash_cache.hash_many([first, second])
+                return digests[first] is not None and digests[first] == digests[second]
+            return filecmp.cmp(first, second, shallow=False)
+        except OSError:
+            return False
+    
     @staticmethod
     def move_file(source: str, destination: str) -> bool:
         """
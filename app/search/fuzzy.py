@@ -0,0 +1,190 @@
+# fastique/app/search/fuzzy.py
+# Fuzzy filename matching: scored, typo-tolerant subsequence search with candidate pruning
+
+import heapq
+from array import array
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Characters that start a new "word" inside a filename
+WORD_SEPARATORS = '_-. '
+
+# Scoring weights
+MATCH_SCORE = 1.0
+CONSECUTIVE_BONUS = 1.5
+WORD_START_BONUS = 2.0
+NAME_START_BONUS = 1.0
+GAP_PENALTY = 0.05
+TYPO_PENALTY = 2.5
+LENGTH_PENALTY = 0.02
+
+def _char_bit(ch: str) -> int:
+    """Bit used for a character in a name's character-set mask (64 buckets)"""
+    return 1 << (ord(ch) % 64)
+
+def char_mask(text: str) -> int:
+    """Bitmask of the characters in a string"""
+    mask = 0
+    for ch in set(text):
+        mask |= _char_bit(ch)
+    return mask
+
+class FuzzyMatcher:
+    """
+    Scores filenames against a half-remembered query such as "qrtrly rpt".
+    Each whitespace-separated token must appear in order as a subsequence of the name;
+    a few query characters may be missing (typos), at a penalty.
+    """
+    def __init__(self, query: str, max_typos: Optional[int] = None):
+        """
+        Prepare a query
+
+        Args:
+            query: Fuzzy query; matching is case-insensitive
+            max_typos: Query characters allowed to be missing (default scales with length)
+        """
+        self.query = query
+        self.tokens = [token for token in query.casefold().split() if token]
+        self.chars = ''.join(self.tokens)
+        if max_typos is None:
+            length = len(self.chars)
+            max_typos = 0 if length < 4 else 1 if length < 8 else 2
+        self.max_typos = min(max_typos, max(0, len(self.chars) - 1))
+
+        # Distinct query characters; a match must contain all but `max_typos` of them
+        self.distinct = sorted(set(self.chars))
+        self.mask = char_mask(self.chars)
+
+    def prefilter(self, name_mask: int) -> bool:
+        """Cheap check that enough query characters occur in the name at all"""
+        missing = self.mask & ~name_mask
+        return not missing or bin(missing).count('1') <= self.max_typos
+
+    def score(self, folded_name: str) -> Optional[float]:
+        """
+        Score a casefolded filename
+
+        Args:
+            folded_name: Casefolded name
+
+        Returns:
+            Score (higher is better), or None if the name does not match
+        """
+        if not self.chars:
+            return None
+
+        name = folded_name
+        pos = 0
+        prev = -2
+        typos = 0
+        total = 0.0
+
+        for token in self.tokens:
+            for offset, ch in enumerate(token):
+                index = -1
+                if offset == 0:
+                    # Prefer the token's first character at a word start
+                    index = self._find_word_start(name, ch, pos)
+                if index < 0:
+                    index = name.find(ch, pos)
+                if index < 0:
+                    typos += 1
+                    if typos > self.max_typos:
+                        return None
+                    total -= TYPO_PENALTY
+                    continue
+
+                total += MATCH_SCORE
+                if index == prev + 1:
+                    total += CONSECUTIVE_BONUS
+                if index == 0:
+                    total += WORD_START_BONUS + NAME_START_BONUS
+                elif name[index - 1] in WORD_SEPARATORS:
+                    total += WORD_START_BONUS
+                total -= GAP_PENALTY * (index - pos)
+                prev = index
+                pos = index + 1
+
+        return total - LENGTH_PENALTY * len(name)
+
+    @staticmethod
+    def _find_word_start(name: str, ch: str, pos: int) -> int:
+        """Find the first occurrence of `ch` at a word start at or after `pos`"""
+        if pos == 0 and name.startswith(ch):
+            return 0
+        best = -1
+        for sep in WORD_SEPARATORS:
+            index = name.find(sep + ch, max(pos - 1, 0))
+            if index >= 0 and (best < 0 or index + 1 < best):
+                best = index + 1
+        return best
+
+class FuzzyColumn:
+    """
+    Per-index structures for fuzzy search over a pre-lowercased name column:
+    a character-set mask per name and per-character posting lists used to prune
+    candidates before any scoring happens
+    """
+    def __init__(self, folded_names: Sequence[str]):
+        self.folded_names = folded_names
+        self.masks = array('Q')
+        self.postings: Dict[int, array] = {}
+
+        for entry_id, name in enumerate(folded_names):
+            mask = char_mask(name)
+            self.masks.append(mask)
+            bits = mask
+            while bits:
+                low = bits & -bits
+                posting = self.postings.get(low)
+                if posting is None:
+                    posting = self.postings[low] = array('I')
+                posting.append(entry_id)
+                bits ^= low
+
+    def candidates(self, matcher: FuzzyMatcher) -> List[int]:
+        """
+        Entry IDs that can possibly match
+
+        Any match misses at most `max_typos` query characters, so it must contain at least one
+        of the `max_typos + 1` rarest query characters: only their postings are examined.
+        """
+        bits = sorted({_char_bit(ch) for ch in matcher.distinct},
+                      key=lambda bit: len(self.postings.get(bit, ())))
+        driver_bits = bits[:matcher.max_typos + 1]
+        if len(driver_bits) == 1:
+            driver = self.postings.get(driver_bits[0], array('I'))
+        else:
+            driver = sorted(set().union(*(self.postings.get(bit, ()) for bit in driver_bits)))
+
+        masks = self.masks
+        prefilter = matcher.prefilter
+        return [entry_id for entry_id in driver if prefilter(masks[entry_id])]
+
+    def search(self, matcher: FuzzyMatcher, limit: int,
+               accept=None) -> List[Tuple[float, int]]:
+        """
+        Rank the best matches
+
+        Args:
+            matcher: Prepared query
+            limit: Maximum number of results
+            accept: Optional predicate on entry ID (filters, subtree restriction)
+
+        Returns:
+            List of (score, entry ID), best first
+        """
+        names = self.folded_names
+        scored = []
+        for entry_id in self.candidates(matcher):
+            if accept is not None and not accept(entry_id):
+                continue
+            score = matcher.score(names[entry_id])
+            if score is not None:
+                scored.append((score, -entry_id))
+        return [(score, -neg_id) for score, neg_id in heapq.nlargest(limit, scored)]
+
+@lru_cache(maxsize=256)
+def get_fuzzy_matcher(query: str) -> FuzzyMatcher:
+    """Get a (cached) matcher for a query"""
+    return FuzzyMatcher(query)
\ No newline at end of file
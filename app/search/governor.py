@@ -0,0 +1,228 @@
+# fastique/app/search/governor.py
+# Resource governor for background work: rate limits, OS priorities and yielding to searches
+
+import os
+import sys
+import time
+import ctypes
+import logging
+import platform
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from app.metrics import BACKGROUND_WAIT, FOREGROUND_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Linux I/O priority classes (see ioprio_set(2))
+IOPRIO_CLASSES = {'realtime': 1, 'best-effort': 2, 'idle': 3}
+_IOPRIO_CLASS_SHIFT = 13
+_IOPRIO_WHO_PROCESS = 1
+# ioprio_set syscall numbers per architecture
+_SYS_IOPRIO_SET = {'x86_64': 251, 'i386': 289, 'i686': 289, 'aarch64': 30, 'armv7l': 314,
+                   'ppc64le': 273, 's390x': 282, 'riscv64': 30}
+
+class TokenBucket:
+    """Thread-safe token bucket; `consume` blocks until the requested tokens are available"""
+    def __init__(self, rate: Optional[float], burst: Optional[float] = None):
+        """
+        Initialize the bucket
+
+        Args:
+            rate: Tokens added per second (None or 0 for unlimited)
+            burst: Bucket capacity (defaults to one second's worth of tokens)
+        """
+        self.rate = rate or 0
+        self.capacity = burst if burst is not None else self.rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: float) -> float:
+        """
+        Take tokens, sleeping while the bucket is in debt
+
+        Args:
+            amount: Tokens to take (may exceed the capacity; the bucket then goes into debt)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+def set_io_priority(priority_class: str, level: int = 7, thread_id: Optional[int] = None) -> bool:
+    """
+    Set the Linux I/O scheduling priority of a thread through the ioprio_set syscall
+
+    Args:
+        priority_class: 'idle', 'best-effort' or 'realtime'
+        level: Priority within the class, 0 (highest) to 7 (lowest)
+        thread_id: Native thread ID (defaults to the calling thread)
+
+    Returns:
+        True if the priority was set
+    """
+    number = _SYS_IOPRIO_SET.get(platform.machine())
+    if not sys.platform.startswith('linux') or number is None or priority_class not in IOPRIO_CLASSES:
+        return False
+    ioprio = (IOPRIO_CLASSES[priority_class] << _IOPRIO_CLASS_SHIFT) | max(0, min(level, 7))
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        result = libc.syscall(number, _IOPRIO_WHO_PROCESS,
+                              thread_id or threading.get_native_id(), ioprio)
+    except (OSError, AttributeError):
+        return False
+    if result != 0:
+        logger.debug("ioprio_set failed: %s", os.strerror(ctypes.get_errno()))
+        return False
+    return True
+
+def set_cpu_priority(nice: int, thread_id: Optional[int] = None) -> bool:
+    """
+    Raise the nice value of a thread (on Linux, setpriority on a thread ID is per-thread)
+
+    Args:
+        nice: Target nice value; lowering it usually needs privileges and is not attempted
+        thread_id: Native thread ID (defaults to the calling thread)
+
+    Returns:
+        True if the nice value is now at least `nice`
+    """
+    if not hasattr(os, 'setpriority'):
+        return False
+    thread_id = thread_id or threading.get_native_id()
+    try:
+        if os.getpriority(os.PRIO_PROCESS, thread_id) >= nice:
+            return True
+        os.setpriority(os.PRIO_PROCESS, thread_id, nice)
+    except OSError:
+        return False
+    return True
+
+class ResourceGovernor:
+    """
+    Keeps background work (index rebuilds, hashing) from competing with interactive searches:
+
+    - token buckets cap background entries/sec and bytes/sec
+    - background threads run at a higher nice value and, on Linux, in the idle I/O class
+    - background work pauses while foreground searches run, for at most `max_pause` seconds
+      at a time so a steady stream of searches cannot starve it completely
+    """
+    def __init__(self, entries_per_second: Optional[float] = None,
+                 bytes_per_second: Optional[float] = None, nice: Optional[int] = 10,
+                 io_priority: Optional[str] = 'idle', pause_for_foreground: bool = True,
+                 max_pause: float = 5.0):
+        """
+        Initialize the governor
+
+        Args:
+            entries_per_second: Directory entries background walks may process per second (None: unlimited)
+            bytes_per_second: Bytes background jobs may read per second (None: unlimited)
+            nice: Nice value for background threads (None to leave it)
+            io_priority: I/O class for background threads: 'idle', 'best-effort' or None
+            pause_for_foreground: Whether background work waits while searches run
+            max_pause: Longest single pause for foreground work, in seconds
+        """
+        self.entries = TokenBucket(entries_per_second)
+        self.bytes = TokenBucket(bytes_per_second)
+        self.nice = nice
+        self.io_priority = io_priority
+        self.pause_for_foreground = pause_for_foreground
+        self.max_pause = max_pause
+        self.foreground_count = 0
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+        self.stats = {'rate_wait': 0.0, 'foreground_wait': 0.0, 'pauses': 0}
+
+    @classmethod
+    def from_config(cls, config) -> 'ResourceGovernor':
+        """Create a governor from a configuration mapping (the BACKGROUND_* settings)"""
+        return cls(entries_per_second=config.get('BACKGROUND_ENTRIES_PER_SECOND'),
+                   bytes_per_second=config.get('BACKGROUND_BYTES_PER_SECOND'),
+                   nice=config.get('BACKGROUND_NICE', 10),
+                   io_priority=config.get('BACKGROUND_IO_PRIORITY', 'idle'),
+                   pause_for_foreground=config.get('BACKGROUND_PAUSE_FOR_SEARCH', True),
+                   max_pause=config.get('BACKGROUND_MAX_PAUSE', 5.0))
+
+    @contextmanager
+    def foreground(self):
+        """Mark interactive work; background work pauses until it finishes"""
+        self.enter_foreground()
+        try:
+            yield
+        finally:
+            self.leave_foreground()
+
+    def enter_foreground(self) -> None:
+        with self._lock:
+            self.foreground_count += 1
+            self._idle.clear()
+        FOREGROUND_REQUESTS.inc()
+
+    def leave_foreground(self) -> None:
+        with self._lock:
+            self.foreground_count = max(self.foreground_count - 1, 0)
+            if self.foreground_count == 0:
+                self._idle.set()
+        FOREGROUND_REQUESTS.dec()
+
+    def enter_background(self) -> Dict[str, bool]:
+        """
+        Lower the calling thread's CPU and I/O priority; call once at the start of a
+        background thread (an unprivileged thread cannot raise its priority again)
+
+        Returns:
+            Which priorities were applied
+        """
+        applied = {'nice': False, 'io_priority': False}
+        if self.nice is not None:
+            applied['nice'] = set_cpu_priority(self.nice)
+        if self.io_priority is not None:
+            applied['io_priority'] = set_io_priority(self.io_priority)
+        return applied
+
+    def throttle(self, entries: int = 0, nbytes: int = 0) -> None:
+        """
+        Account for background work, blocking while searches run or a rate limit is exceeded
+
+        Args:
+            entries: Directory entries just processed
+            nbytes: Bytes just read
+        """
+        if self.pause_for_foreground and not self._idle.is_set():
+            start = time.monotonic()
+            self._idle.wait(self.max_pause)
+            waited = time.monotonic() - start
+            BACKGROUND_WAIT.inc(waited, reason='foreground')
+            with self._lock:
+                self.stats['foreground_wait'] += waited
+                self.stats['pauses'] += 1
+        waited = self.entries.consume(entries) + self.bytes.consume(nbytes)
+        if waited:
+            BACKGROUND_WAIT.inc(waited, reason='rate')
+            with self._lock:
+                self.stats['rate_wait'] += waited
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            foreground = self.foreground_count
+        return {
+            'foreground': foreground,
+            'entries_per_second': self.entries.rate or None,
+            'bytes_per_second': self.bytes.rate or None,
+            'rate_wait': round(stats['rate_wait'], 3),
+            'foreground_wait': round(stats['foreground_wait'], 3),
+            'pauses': stats['pauses']
+        }
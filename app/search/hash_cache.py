@@ -0,0 +1,199 @@
+# fastique/app/search/hash_cache.py
+# Persistent content-hash cache keyed by file identity and metadata
+
+import os
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Read size while hashing
+CHUNK_SIZE = 1024 * 1024
+# SQLite limits bound parameters per statement; stay well below it
+_BATCH_SIZE = 400
+
+def new_hash():
+    """Hash object used for file contents throughout Fastique"""
+    return hashlib.blake2b(digest_size=16)
+
+def hash_file(path: str, on_read=None) -> str:
+    """
+    Hash a whole file
+
+    Args:
+        path: File to read
+        on_read: Optional callable receiving the size of each chunk read
+
+    Returns:
+        Hex digest
+
+    Raises:
+        OSError: If the file cannot be read
+    """
+    digest = new_hash()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if on_read is not None:
+                on_read(len(chunk))
+    return digest.hexdigest()
+
+def file_key(stats: os.stat_result) -> Tuple[int, int, int, int]:
+    """Identity and version of a file: (st_dev, st_ino, st_size, st_mtime_ns)"""
+    return stats.st_dev, stats.st_ino, stats.st_size, stats.st_mtime_ns
+
+class HashCache:
+    """
+    SQLite-backed table of content hashes. Rows are keyed by (st_dev, st_ino) and store the
+    size and mtime_ns they were computed for, so a file whose metadata changed simply misses
+    and is rehashed (and its row replaced). A hit costs one stat plus an indexed lookup.
+    Misses are hashed in a bounded pool so concurrent callers cannot saturate the disk.
+    """
+    def __init__(self, db_path: Optional[str] = None, workers: int = 4, governor=None):
+        """
+        Open (or create) the cache
+
+        Args:
+            db_path: SQLite file (defaults to ~/.fastique/cache/hashes.sqlite)
+            workers: Maximum files hashed concurrently
+            governor: Optional ResourceGovernor; the hashing threads run at its background
+                      priority (callers rate-limit reads through `on_read`)
+        """
+        if db_path is None:
+            db_path = os.path.join(str(Path.home()), '.fastique', 'cache', 'hashes.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.governor = governor
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fastique-hash',
+                                       initializer=governor.enter_background if governor is not None else None)
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS hashes ('
+            ' dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL,'
+            ' mtime_ns INTEGER NOT NULL, digest TEXT NOT NULL, PRIMARY KEY (dev, ino))'
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared across threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def lookup_many(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Batch lookup without hashing anything
+
+        Args:
+            paths: Files to look up
+
+        Returns:
+            Mapping of path to digest, or None where no current hash is cached
+        """
+        result: Dict[str, Optional[str]] = {}
+        keyed: Dict[Tuple[int, int], List[Tuple[str, tuple]]] = {}
+        for path in paths:
+            try:
+                key = file_key(os.stat(path))
+            except OSError:
+                result[path] = None
+                continue
+            result[path] = None
+            keyed.setdefault(key[:2], []).append((path, key))
+
+        identities = list(keyed)
+        connection = self._connection()
+        for start in range(0, len(identities), _BATCH_SIZE):
+            batch = identities[start:start + _BATCH_SIZE]
+            clause = ' OR '.join(['(dev = ? AND ino = ?)'] * len(batch))
+            rows = connection.execute(
+                f'SELECT dev, ino, size, mtime_ns, digest FROM hashes WHERE {clause}',
+                [value for identity in batch for value in identity]
+            ).fetchall()
+            for dev, ino, size, mtime_ns, digest in rows:
+                for path, key in keyed.get((dev, ino), ()):
+                    if key == (dev, ino, size, mtime_ns):
+                        result[path] = digest
+
+        found = sum(1 for digest in result.values() if digest is not None)
+        self.hits += found
+        self.misses += len(result) - found
+        return result
+
+    def hash_many(self, paths: Iterable[str], on_read=None) -> Dict[str, Optional[str]]:
+        """
+        Get hashes for many files, hashing cache misses in the pool
+
+        Args:
+            paths: Files to hash
+            on_read: Optional callable receiving the size of each chunk read
+
+        Returns:
+            Mapping of path to digest (None for unreadable files)
+        """
+        result = self.lookup_many(paths)
+        missing = [path for path, digest in result.items() if digest is None]
+        if not missing:
+            return result
+
+        computed = list(self.pool.map(lambda path: self._compute(path, on_read), missing))
+        rows = []
+        for path, computed_row in zip(missing, computed):
+            if computed_row is None:
+                continue
+            key, digest = computed_row
+            result[path] = digest
+            rows.append(key + (digest,))
+        self._store(rows)
+        return result
+
+    def get_hash(self, path: str) -> Optional[str]:
+        """Get the hash of one file (None if it cannot be read)"""
+        return self.hash_many([path]).get(path)
+
+    def _compute(self, path: str, on_read=None) -> Optional[Tuple[tuple, str]]:
+        """Hash a file; the result is discarded if the file changed while being read"""
+        try:
+            before = file_key(os.stat(path))
+            digest = hash_file(path, on_read)
+            if file_key(os.stat(path)) != before:
+                logger.info("%s changed while hashing; not caching", path)
+                return None
+        except OSError as e:
+            logger.warning("Cannot hash %s: %s", path, e)
+            return None
+        return before, digest
+
+    def _store(self, rows: List[tuple]) -> None:
+        if not rows:
+            return
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                'INSERT OR REPLACE INTO hashes (dev, ino, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def close(self) -> None:
+        """Stop the hashing pool and close this thread's connection"""
+        self.pool.shutdown(wait=True)
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
@@ -0,0 +1,382 @@
+# fastique/app/search/index_service.py
+# Standalone index service that owns SearchIndex instances and serves queries over a Unix socket
+
+import os
+import sys
+import time
+import queue
+import socket
+import struct
+import marshal
+import logging
+import argparse
+import threading
+import socketserver
+from typing import Any, Dict, List, Optional, Tuple
+from app.search.indexer import SearchIndex
+from app.search.query_planner import NamePattern, plan_name_pattern
+
+logger = logging.getLogger(__name__)
+
+# Frame header: opcode (1 byte) + payload length (4 bytes, network order)
+FRAME_HEADER = struct.Struct('!BI')
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+# Request opcodes
+OP_PING = 1
+OP_HAS_INDEX = 2
+OP_FIND_INDEXED_ROOT = 3
+OP_QUERY = 4
+OP_FUZZY_QUERY = 5
+OP_BUILD = 6
+OP_INVALIDATE = 7
+OP_STATS = 8
+OP_RECORD_CHANGES = 9
+OP_LIST_DIRECTORY = 10
+
+# Response opcodes
+OP_OK = 0x80
+OP_ERROR = 0x81
+
+class IndexServiceError(Exception):
+    """Raised when the index service cannot be reached or reports an error"""
+    pass
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly `size` bytes, or None if the peer closed the connection first"""
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            return None
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def send_frame(sock: socket.socket, opcode: int, payload: Any) -> None:
+    """
+    Send one frame. Payloads are marshal-encoded: compact and fast for the plain
+    lists/dicts/strings/numbers exchanged here. The socket is only accessible to its owner.
+    """
+    body = marshal.dumps(payload)
+    sock.sendall(FRAME_HEADER.pack(opcode, len(body)) + body)
+
+def recv_frame(sock: socket.socket) -> Optional[Tuple[int, Any]]:
+    """Receive one frame, or None on a clean disconnect"""
+    header = _recv_exact(sock, FRAME_HEADER.size)
+    if header is None:
+        return None
+    opcode, length = FRAME_HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise IndexServiceError(f"Frame too large: {length} bytes")
+    body = _recv_exact(sock, length)
+    if body is None:
+        return None
+    return opcode, marshal.loads(body)
+
+class IndexService:
+    """
+    Owns the SearchIndex and keeps the configured roots fresh. Requests are dispatched here
+    by the socket server; it is also usable in-process.
+    """
+    def __init__(self, index: SearchIndex, roots: Optional[List[str]] = None,
+                 refresh_fraction: float = 0.8, governor=None):
+        """
+        Initialize the service
+
+        Args:
+            index: The index owned by this service
+            roots: Directories to keep indexed
+            refresh_fraction: Rebuild a root once this fraction of the index expiry has passed
+            governor: Optional ResourceGovernor; queries count as foreground work and the
+                      scheduler runs at background priority
+        """
+        self.index = index
+        self.governor = governor
+        self.roots = list(roots or [])
+        self.refresh_fraction = refresh_fraction
+        self.started = time.time()
+        self.requests = 0
+        self._stop = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+
+    def dispatch(self, opcode: int, payload: Any) -> Any:
+        """Execute one request"""
+        self.requests += 1
+        if opcode == OP_PING:
+            return 'pong'
+        if opcode == OP_HAS_INDEX:
+            return self.index.has_index(payload)
+        if opcode == OP_FIND_INDEXED_ROOT:
+            return self.index.find_indexed_root(payload)
+        if self.governor is not None and opcode in (OP_QUERY, OP_FUZZY_QUERY, OP_LIST_DIRECTORY):
+            with self.governor.foreground():
+                return self._query(opcode, payload)
+        return self._query(opcode, payload)
+
+    def _query(self, opcode: int, payload: Any) -> Any:
+        if opcode == OP_QUERY:
+            directory, query, use_regex, case_sensitive, file_types, timestamp_range, size_range, \
+                max_depth, limit = payload
+            pattern = plan_name_pattern(query, use_regex, case_sensitive)
+            return self.index.query(directory, pattern, file_types, timestamp_range, size_range,
+                                    max_depth, limit)
+        if opcode == OP_FUZZY_QUERY:
+            directory, query, file_types, timestamp_range, size_range, max_depth, limit = payload
+            return self.index.fuzzy_query(directory, query, file_types, timestamp_range, size_range,
+                                          max_depth, limit)
+        if opcode == OP_LIST_DIRECTORY:
+            return self.index.list_directory(payload)
+        if opcode == OP_BUILD:
+            index_data = self.index.get_index(payload)
+            return {'directory': index_data['directory'], 'timestamp': index_data['timestamp'],
+                    'entries': len(index_data['files'])}
+        if opcode == OP_INVALIDATE:
+            self.index.invalidate_index(payload)
+            return True
+        if opcode == OP_STATS:
+            return self.stats()
+        if opcode == OP_RECORD_CHANGES:
+            return self.index.record_changes(list(payload))
+        raise IndexServiceError(f"Unknown opcode: {opcode}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Service statistics"""
+        indexes = {directory: loaded['entries'] for directory, loaded in self.index.loaded_indexes().items()}
+        return {'uptime': time.time() - self.started, 'requests': self.requests, 'indexes': indexes,
+                'memory': self.index.memory_stats()}
+
+    def start_scheduler(self, interval: float = 30.0) -> None:
+        """Start the background thread that rebuilds roots before they expire"""
+        self._scheduler = threading.Thread(target=self._schedule, args=(interval,),
+                                           daemon=True, name='fastique-index-scheduler')
+        self._scheduler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _schedule(self, interval: float) -> None:
+        if self.governor is not None:
+            self.governor.enter_background()
+        while not self._stop.is_set():
+            for root in self.roots:
+                if self._stop.is_set():
+                    return
+                try:
+                    self._refresh_if_due(root)
+                except Exception:
+                    logger.exception("Scheduled rebuild of %s failed", root)
+            self._stop.wait(interval)
+
+    def _refresh_if_due(self, root: str) -> None:
+        """Rebuild a root whose index is missing or close to expiry"""
+        age = self.index.index_age(root)
+        if age is None and not self.index.has_index(root):
+            self.index.refresh_index(root)
+            return
+        age = self.index.index_age(root)
+        if age is not None and age >= self.index.expiry_time * self.refresh_fraction:
+            self.index.refresh_index(root)
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serves frames on one client connection until it closes"""
+    def handle(self):
+        service: IndexService = self.server.service
+        while True:
+            try:
+                frame = recv_frame(self.request)
+            except (OSError, ValueError, EOFError, IndexServiceError) as e:
+                logger.warning("Dropping index client: %s", e)
+                return
+            if frame is None:
+                return
+            opcode, payload = frame
+            try:
+                result = service.dispatch(opcode, payload)
+                send_frame(self.request, OP_OK, result)
+            except Exception as e:
+                logger.exception("Index request %s failed", opcode)
+                send_frame(self.request, OP_ERROR, str(e))
+
+class IndexServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix domain socket server for an IndexService"""
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: IndexService):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        self.service = service
+        super().__init__(socket_path, _RequestHandler)
+        # Only the owning user may talk to the service
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+class IndexClient:
+    """
+    Thin client with the SearchIndex query interface used by SearchEngine, backed by a pool
+    of connections to an IndexServer. If the service is unreachable, queries return None
+    and the engine falls back to a live walk.
+    """
+    def __init__(self, socket_path: str, pool_size: int = 8, timeout: float = 30.0):
+        """
+        Initialize the client
+
+        Args:
+            socket_path: Path of the service's Unix socket
+            pool_size: Maximum idle connections kept open
+            timeout: Socket timeout in seconds
+        """
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _acquire(self) -> socket.socket:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, sock: socket.socket) -> None:
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+
+    def call(self, opcode: int, payload: Any = None) -> Any:
+        """
+        Send a request and wait for the reply, retrying once on a stale pooled connection
+
+        Raises:
+            IndexServiceError: If the service is unreachable or reports an error
+        """
+        for attempt in range(2):
+            try:
+                sock = self._acquire()
+            except OSError as e:
+                raise IndexServiceError(f"Index service unavailable: {e}")
+            try:
+                send_frame(sock, opcode, payload)
+                frame = recv_frame(sock)
+            except OSError as e:
+                sock.close()
+                if attempt == 0:
+                    continue
+                raise IndexServiceError(f"Index service connection failed: {e}")
+            if frame is None:
+                sock.close()
+                if attempt == 0:
+                    continue
+                raise IndexServiceError("Index service closed the connection")
+            self._release(sock)
+            status, result = frame
+            if status == OP_ERROR:
+                raise IndexServiceError(result)
+            return result
+        raise IndexServiceError("Index service unavailable")
+
+    def _call_or_none(self, opcode: int, payload: Any) -> Any:
+        try:
+            return self.call(opcode, payload)
+        except IndexServiceError as e:
+            logger.warning("Index service request failed: %s", e)
+            return None
+
+    def ping(self) -> bool:
+        """Check that the service is reachable"""
+        return self._call_or_none(OP_PING, None) == 'pong'
+
+    def has_index(self, directory: str) -> bool:
+        return bool(self._call_or_none(OP_HAS_INDEX, directory))
+
+    def find_indexed_root(self, directory: str) -> Optional[str]:
+        return self._call_or_none(OP_FIND_INDEXED_ROOT, directory)
+
+    def query(self, directory: str, pattern: NamePattern, file_types=None, timestamp_range=None,
+              size_range=None, max_depth=None, limit=None) -> Optional[List[Dict[str, Any]]]:
+        payload = (directory, pattern.query, pattern.use_regex, pattern.case_sensitive,
+                   file_types, _as_tuple(timestamp_range), _as_tuple(size_range), max_depth, limit)
+        return self._call_or_none(OP_QUERY, payload)
+
+    def fuzzy_query(self, directory: str, query: str, file_types=None, timestamp_range=None,
+                    size_range=None, max_depth=None, limit=500) -> Optional[List[tuple]]:
+        payload = (directory, query, file_types, _as_tuple(timestamp_range), _as_tuple(size_range),
+                   max_depth, limit)
+        return self._call_or_none(OP_FUZZY_QUERY, payload)
+
+    def list_directory(self, directory: str) -> Optional[List[Dict[str, Any]]]:
+        return self._call_or_none(OP_LIST_DIRECTORY, directory)
+
+    def get_index(self, directory: str) -> Dict[str, Any]:
+        """Ask the service to build (or refresh) an index; returns a summary, not the entries"""
+        return self.call(OP_BUILD, directory)
+
+    def invalidate_index(self, directory: str) -> None:
+        self._call_or_none(OP_INVALIDATE, directory)
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        return self._call_or_none(OP_STATS, None)
+
+    def record_changes(self, paths: List[str]) -> int:
+        """Report changed paths so the service updates its indexes incrementally"""
+        return self._call_or_none(OP_RECORD_CHANGES, list(paths)) or 0
+
+    def close(self) -> None:
+        """Close pooled connections"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+def _as_tuple(value):
+    """Normalise ranges for marshal (lists and tuples both work, None stays None)"""
+    return tuple(value) if value is not None else None
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the index service: python -m app.search.index_service --socket PATH --root DIR"""
+    from app.config import Config
+    from app.search.governor import ResourceGovernor
+
+    parser = argparse.ArgumentParser(description='Fastique shared index service')
+    parser.add_argument('--socket', default=Config.INDEX_SERVICE_SOCKET or '/tmp/fastique-index.sock')
+    parser.add_argument('--root', action='append', default=None,
+                        help='Directory to keep indexed (repeatable; defaults to DEFAULT_SEARCH_PATHS)')
+    parser.add_argument('--cache-dir', default=Config.INDEX_CACHE_DIR)
+    parser.add_argument('--expiry', type=int, default=Config.INDEX_EXPIRY)
+    parser.add_argument('--refresh-interval', type=float, default=30.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
+    governor = ResourceGovernor.from_config(vars(Config))
+    index = SearchIndex(cache_dir=args.cache_dir, expiry_time=args.expiry,
+                        exclude_patterns=Config.EXCLUDE_PATTERNS, use_ignore_files=Config.USE_IGNORE_FILES,
+                        governor=governor, memory_budget=Config.INDEX_MEMORY_BUDGET,
+                        journal_fsync=Config.INDEX_JOURNAL_FSYNC,
+                        compact_ratio=Config.INDEX_JOURNAL_COMPACT_RATIO,
+                        compact_min_bytes=Config.INDEX_JOURNAL_COMPACT_MIN)
+    service = IndexService(index, roots=args.root or Config.DEFAULT_SEARCH_PATHS, governor=governor)
+    service.start_scheduler(args.refresh_interval)
+
+    server = IndexServer(args.socket, service)
+    logger.info("Fastique index service listening on %s", args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
\ No newline at end of file
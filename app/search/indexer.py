@@ -2,26 +2,382 @@
 # File indexing for faster searches
 
 import os
+import copy
 import time
 import json
+import heapq
+import bisect
+import logging
 import threading
-from typing import Dict, List, Any, Set
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Any, Set, Optional
 from pathlib import Path
+from app.metrics import (DIRECTORIES_SCANNED, ENTRIES_SCANNED, STAT_CALLS, SCAN_ERRORS,
+                         INDEX_CACHE_REQUESTS, INDEX_BUILD_DURATION, INDEX_ENTRIES, INDEX_BYTES,
+                         INDEX_MEMORY_BYTES, INDEX_MEMORY_BUDGET, INDEX_EVICTIONS, INDEX_RELOAD_DURATION)
+from app.search.exclude import ExcludeMatcher
+from app.search.query_planner import NamePattern, MATCH_EXACT
+from app.search.fuzzy import FuzzyColumn, get_fuzzy_matcher
+from app.search.concurrency import AdaptivePool, default_manager
+from app.search.journal import (IndexJournal, RECORD_REMOVE, RECORD_UPSERT, apply_records,
+                                entry_from_record, upsert_record)
+
+logger = logging.getLogger(__name__)
+
+# Estimated CPython footprint of one index entry beyond its strings: the 6-key dict, three
+# str headers, the size and mtime objects, plus its share of the IndexLookup structures
+# (folded name, posting and sorted-column slots)
+_ENTRY_OVERHEAD = 272 + 3 * 49 + 28 + 24 + 49 + 6 * 8
+# Entries sampled when estimating the size of an index
+_SIZE_SAMPLE = 512
+
+def estimate_index_size(index_data: Dict[str, Any]) -> int:
+    """
+    Estimate the memory held by an in-memory index and its lookup structures
+
+    Args:
+        index_data: Index data as returned by SearchIndex.get_index
+
+    Returns:
+        Estimated size in bytes
+    """
+    files = index_data.get('files', [])
+    if not files:
+        return 0
+    step = max(len(files) // _SIZE_SAMPLE, 1)
+    sample = files[::step]
+    # Name, path and full path, plus the casefolded name held by the lookup
+    text = sum(2 * len(entry['name']) + len(entry['path']) + len(entry['full_path']) for entry in sample)
+    return int(len(files) * (_ENTRY_OVERHEAD + text / len(sample)))
+
+def live_index(index_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Index data with the changes held in memory since its snapshot (see
+    SearchIndex._append_changes) folded into its entry list
+
+    Args:
+        index_data: In-memory index data
+
+    Returns:
+        Index data without pending changes (the same dict if there are none)
+    """
+    changes = index_data.get('changes')
+    if not changes:
+        return index_data
+    live = dict(index_data, files=apply_records(index_data['files'], changes))
+    del live['changes']
+    return live
+
+class _Appended:
+    """Read-only concatenation of a shared list and a short list of appended items"""
+    __slots__ = ('base', 'extra', 'split')
+    
+    def __init__(self, base: list, extra: list):
+        self.base = base
+        self.extra = extra
+        self.split = len(base)
+    
+    def __len__(self) -> int:
+        return self.split + len(self.extra)
+    
+    def __getitem__(self, index: int):
+        if index < self.split:
+            return self.base[index]
+        return self.extra[index - self.split]
+
+class IndexLookup:
+    """
+    Secondary lookup structures derived from an index's file list, addressed by entry ID
+    (position in the file list):
+    
+    - a casefolded name column and a name posting map
+    - an extension posting map (files only) plus the IDs of all directories
+    - size-sorted (files only) and mtime-sorted arrays for binary-searched range queries
+    - entry IDs per parent directory, built on first use (directory listings)
+    
+    Changes recorded after the index was built go to an overlay instead of the structures
+    above: entries added (or replaced) get IDs after the snapshot's, and entries removed or
+    replaced are hidden by ID. patch() returns a new lookup sharing everything but the
+    overlay, so applying a change costs time proportional to the changes since the last
+    compaction, which folds the overlay back into the entry list.
+    """
+    def __init__(self, index_data: Dict[str, Any]):
+        """
+        Build lookup structures for an index
+        
+        Args:
+            index_data: Index data as returned by SearchIndex.get_index, optionally with
+                        pending 'changes' records
+        """
+        self.directory = index_data['directory']
+        self.source = index_data
+        self.files: List[Dict[str, Any]] = index_data['files']
+        self.folded_names: List[str] = []
+        self.by_name: Dict[str, List[int]] = {}
+        self.by_extension: Dict[str, List[int]] = {}
+        self.dir_ids: List[int] = []
+        self.dir_by_extension: Dict[str, List[int]] = {}
+        
+        for entry_id, entry in enumerate(self.files):
+            name = entry['name']
+            folded = name.casefold()
+            self.folded_names.append(folded)
+            self.by_name.setdefault(folded, []).append(entry_id)
+            ext = os.path.splitext(name)[1][1:].lower()
+            if entry['is_directory']:
+                self.dir_ids.append(entry_id)
+                self.dir_by_extension.setdefault(ext, []).append(entry_id)
+            else:
+                self.by_extension.setdefault(ext, []).append(entry_id)
+        
+        # Sorted (value, ID) columns for range queries
+        by_size = sorted((entry['size'], entry_id) for entry_id, entry in enumerate(self.files)
+                         if not entry['is_directory'])
+        self.size_values = [size for size, _ in by_size]
+        self.size_ids = [entry_id for _, entry_id in by_size]
+        by_mtime = sorted((entry['modified'], entry_id) for entry_id, entry in enumerate(self.files))
+        self.mtime_values = [mtime for mtime, _ in by_mtime]
+        self.mtime_ids = [entry_id for _, entry_id in by_mtime]
+        
+        self._fuzzy_column: Optional[FuzzyColumn] = None
+        self._by_directory: Optional[Dict[str, List[int]]] = None
+        
+        # Overlay of changes since the snapshot
+        self.base_files = self.files
+        self.base_folded = self.folded_names
+        self.added: List[Dict[str, Any]] = []
+        self.added_folded: List[str] = []
+        self.added_by_name: Dict[str, List[int]] = {}
+        self.added_by_directory: Dict[str, List[int]] = {}
+        self.removed: Set[int] = set()
+        if index_data.get('changes'):
+            self._apply(index_data['changes'])
+    
+    @property
+    def count(self) -> int:
+        """Number of live entries"""
+        return len(self.files) - len(self.removed)
+    
+    @property
+    def fuzzy_column(self) -> FuzzyColumn:
+        """Fuzzy search structures for the snapshot's entries, built on first use"""
+        column = self._fuzzy_column
+        if column is None:
+            column = self._fuzzy_column = FuzzyColumn(self.base_folded)
+        return column
+    
+    def children(self, directory: str) -> List[int]:
+        """IDs of the entries directly inside a directory"""
+        by_directory = self._by_directory
+        if by_directory is None:
+            by_directory = {}
+            for entry_id, entry in enumerate(self.base_files):
+                by_directory.setdefault(entry['path'], []).append(entry_id)
+            self._by_directory = by_directory
+        entry_ids = by_directory.get(directory, [])
+        added = self.added_by_directory.get(directory)
+        if added:
+            entry_ids = entry_ids + added
+        if self.removed:
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id not in self.removed]
+        return entry_ids
+    
+    def scan_ids(self) -> Iterable[int]:
+        """IDs of every live entry, for queries without a selective predicate"""
+        removed = self.removed
+        if not removed:
+            return range(len(self.files))
+        return (entry_id for entry_id in range(len(self.files)) if entry_id not in removed)
+    
+    def find(self, full_path: str) -> Optional[int]:
+        """ID of the live entry for a path, or None if it is not indexed"""
+        folded = os.path.basename(full_path).casefold()
+        for entry_ids in (self.by_name.get(folded, ()), self.added_by_name.get(folded, ())):
+            for entry_id in entry_ids:
+                if entry_id not in self.removed and self.files[entry_id]['full_path'] == full_path:
+                    return entry_id
+        return None
+    
+    def patch(self, index_data: Dict[str, Any], records: List[list]) -> 'IndexLookup':
+        """
+        Lookup for an index with more changes, leaving this one untouched for its readers
+        
+        Args:
+            index_data: The changed index data
+            records: Upsert/remove records applied since this lookup's index data
+            
+        Returns:
+            New lookup sharing this one's snapshot structures
+        """
+        self.children(self.directory)
+        patched = copy.copy(self)
+        patched.source = index_data
+        patched.added = list(self.added)
+        patched.added_folded = list(self.added_folded)
+        patched.added_by_name = {name: list(ids) for name, ids in self.added_by_name.items()}
+        patched.added_by_directory = {path: list(ids) for path, ids in self.added_by_directory.items()}
+        patched.removed = set(self.removed)
+        patched._apply(records)
+        return patched
+    
+    def _apply(self, records: List[list]) -> None:
+        """Apply records to the overlay, in journal order (same result as apply_records)"""
+        if records:
+            self.files = _Appended(self.base_files, self.added)
+            self.folded_names = _Appended(self.base_folded, self.added_folded)
+        for record in records:
+            if record[0] == RECORD_UPSERT:
+                entry = entry_from_record(record)
+                existing = self.find(entry['full_path'])
+                if existing is not None:
+                    self.removed.add(existing)
+                entry_id = len(self.files)
+                folded = entry['name'].casefold()
+                self.added.append(entry)
+                self.added_folded.append(folded)
+                self.added_by_name.setdefault(folded, []).append(entry_id)
+                self.added_by_directory.setdefault(entry['path'], []).append(entry_id)
+            elif record[0] == RECORD_REMOVE:
+                # The entry and everything below it
+                full_path = record[1]
+                existing = self.find(full_path)
+                if existing is not None:
+                    self.removed.add(existing)
+                directories = [full_path]
+                while directories:
+                    for entry_id in self.children(directories.pop()):
+                        self.removed.add(entry_id)
+                        if self.files[entry_id]['is_directory']:
+                            directories.append(self.files[entry_id]['full_path'])
+    
+    def fuzzy_search(self, matcher, limit: int, accept=None) -> List[tuple]:
+        """
+        Rank live entries against a prepared fuzzy query
+        
+        Args:
+            matcher: FuzzyMatcher
+            limit: Maximum number of results
+            accept: Optional predicate on entry ID
+            
+        Returns:
+            List of (score, entry ID), best first
+        """
+        removed = self.removed
+        if removed:
+            filter_accept = accept
+            accept = lambda entry_id: entry_id not in removed and (filter_accept is None
+                                                                   or filter_accept(entry_id))
+        ranked = self.fuzzy_column.search(matcher, limit, accept)
+        if not self.added:
+            return ranked
+        scored = [(score, -entry_id) for score, entry_id in ranked]
+        for entry_id in range(len(self.base_files), len(self.files)):
+            if accept is not None and not accept(entry_id):
+                continue
+            score = matcher.score(self.folded_names[entry_id])
+            if score is not None:
+                scored.append((score, -entry_id))
+        return [(score, -neg_id) for score, neg_id in heapq.nlargest(limit, scored)]
+    
+    @staticmethod
+    def _range_bounds(values: List[float], value_range: tuple) -> tuple:
+        """Binary-search the slice of a sorted column that falls inside an inclusive range"""
+        low, high = value_range
+        start = bisect.bisect_left(values, low) if low is not None else 0
+        end = bisect.bisect_right(values, high) if high is not None else len(values)
+        return start, max(start, end)
+    
+    def candidates(self,
+                   pattern: NamePattern,
+                   file_types: Optional[List[str]] = None,
+                   timestamp_range: Optional[tuple] = None,
+                   size_range: Optional[tuple] = None) -> Optional[List[int]]:
+        """
+        Pick the most selective predicate and return its candidate entry IDs.
+        The caller still checks every predicate on each candidate.
+        
+        Args:
+            pattern: Compiled name pattern
+            file_types: List of file extensions to include (None for all)
+            timestamp_range: Tuple of (start, end) modification timestamps
+            size_range: Tuple of (min_size, max_size) in bytes
+            
+        Returns:
+            Candidate entry IDs in index order, or None if every entry has to be checked
+        """
+        # Each option is (estimated size, producer); producers run only for the winner
+        options = []
+        
+        if pattern.kind == MATCH_EXACT:
+            postings = self.by_name.get(pattern.literal.casefold(), [])
+            options.append((len(postings), lambda: postings))
+        elif pattern.extension is not None:
+            file_postings = self.by_extension.get(pattern.extension, [])
+            dir_postings = self.dir_by_extension.get(pattern.extension, [])
+            options.append((len(file_postings) + len(dir_postings),
+                            lambda: sorted(file_postings + dir_postings)))
+        
+        if file_types:
+            extensions = set(file_types)
+            postings = [self.by_extension.get(ext, []) for ext in extensions]
+            options.append((sum(len(p) for p in postings),
+                            lambda: sorted(entry_id for p in postings for entry_id in p)))
+        
+        if size_range:
+            # Directories are not subject to the size filter
+            start, end = self._range_bounds(self.size_values, size_range)
+            options.append((end - start + len(self.dir_ids),
+                            lambda: sorted(self.size_ids[start:end] + self.dir_ids)))
+        
+        if timestamp_range:
+            start, end = self._range_bounds(self.mtime_values, timestamp_range)
+            options.append((end - start, lambda: sorted(self.mtime_ids[start:end])))
+        
+        if not options:
+            return None
+        size, producer = min(options, key=lambda option: option[0])
+        if size >= len(self.files):
+            return None
+        entry_ids = producer()
+        if self.added or self.removed:
+            # The overlay is not in the postings: its entries are all candidates
+            removed = self.removed
+            entry_ids = [entry_id for entry_id in entry_ids if entry_id not in removed]
+            entry_ids.extend(entry_id for entry_id in range(len(self.base_files), len(self.files))
+                             if entry_id not in removed)
+        return entry_ids
 
 class SearchIndex:
     """
     Class for creating and managing a search index for frequently accessed directories
     to improve search performance
     """
-    def __init__(self, cache_dir: str = None, expiry_time: int = 3600):
+    def __init__(self, cache_dir: str = None, expiry_time: int = 3600,
+                 exclude_patterns: Optional[List[str]] = None, use_ignore_files: bool = False,
+                 governor=None, concurrency=None, memory_budget: Optional[int] = None,
+                 journal_fsync: bool = False, compact_ratio: float = 0.25,
+                 compact_min_bytes: int = 1024 * 1024):
         """
         Initialize the search index
         
         Args:
             cache_dir: Directory to store the index cache files
             expiry_time: Time in seconds after which an index entry is considered stale
+            exclude_patterns: Gitignore-style patterns for entries that are never indexed
+            use_ignore_files: Whether to honour .gitignore/.fastiqueignore files while indexing
+            governor: Optional ResourceGovernor throttling background rebuilds (refresh_index)
+            concurrency: ConcurrencyManager sizing the parallel walk (defaults to the process-wide one)
+            memory_budget: Bytes of in-memory indexes to keep (estimated); least recently used
+                           roots beyond it are evicted to their disk cache (None: unbounded)
+            journal_fsync: Whether change journal appends are fsynced
+            compact_ratio: Compact a journal into a new snapshot once it reaches this fraction
+                           of the snapshot's size...
+            compact_min_bytes: ...and at least this many bytes
         """
         self.expiry_time = expiry_time
+        self.exclude = ExcludeMatcher.from_patterns(exclude_patterns, use_ignore_files)
+        self.governor = governor
+        self.concurrency = concurrency or default_manager()
         
         # Set up cache directory
         if cache_dir is None:
@@ -32,8 +388,30 @@ class SearchIndex:
         # Create cache directory if it doesn't exist
         os.makedirs(self.cache_dir, exist_ok=True)
         
-        # In-memory cache for faster access
-        self.index_cache: Dict[str, Dict[str, Any]] = {}
+        # In-memory cache for faster access, least recently used first
+        self.index_cache: Dict[str, Dict[str, Any]] = OrderedDict()
+        
+        # Memory budget: estimated bytes per loaded index, and roots evicted to disk
+        # (directory -> index timestamp) that are reloaded on demand
+        self.memory_budget = memory_budget
+        self.index_sizes: Dict[str, int] = {}
+        self.memory_used = 0
+        self.evicted: Dict[str, float] = {}
+        self.eviction_count = 0
+        self.reload_count = 0
+        self.reload_time = 0.0
+        if memory_budget is not None:
+            INDEX_MEMORY_BUDGET.set(memory_budget)
+        
+        # Incremental changes are appended to a journal per index and compacted in the background
+        self.journal_fsync = journal_fsync
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self._compacting: Set[str] = set()
+        self.snapshot_sizes: Dict[str, int] = {}
+        
+        # Lookup structures derived from in-memory indexes
+        self.lookups: Dict[str, IndexLookup] = {}
         
         # Lock for thread safety
         self.lock = threading.RLock()
@@ -48,16 +426,358 @@ class SearchIndex:
         Returns:
             Dictionary with indexed files and metadata
         """
+        # Check if we have a valid cached index
+        index_data = self._load(directory)
+        if index_data is not None:
+            return live_index(index_data)
+        
         with self.lock:
-            # Check if we have a valid cached index
-            if self._has_valid_cache(directory):
-                return self.index_cache[directory]
+            # Another thread may have loaded or built it meanwhile
+            index_data = self._memory_index(directory)
+            if index_data is not None:
+                return live_index(index_data)
             
             # Create or update the index
             index_data = self._build_index(directory)
             self._save_index(directory, index_data)
             return index_data
     
+    def has_index(self, directory: str) -> bool:
+        """
+        Check whether a valid index exists for a directory, without building one
+        
+        Args:
+            directory: Path to the directory
+            
+        Returns:
+            True if a fresh index is available in memory or on disk
+        """
+        return self._load(directory) is not None
+    
+    def preload(self, directory: str) -> bool:
+        """
+        Load a persisted index and build its lookup structures ahead of the first query
+        
+        Args:
+            directory: Indexed directory
+            
+        Returns:
+            True if a fresh index is now in memory
+        """
+        if self._load(directory, build_lookup=True) is None:
+            return False
+        self.get_lookup(directory)
+        return True
+    
+    def find_indexed_root(self, directory: str) -> Optional[str]:
+        """
+        Find an index covering a directory: its own, or a fresh in-memory index of an ancestor
+        
+        Args:
+            directory: Path to the directory
+            
+        Returns:
+            The indexed directory, or None if the directory is not covered
+        """
+        if self._load(directory) is not None:
+            return directory
+        
+        # Nearest loaded ancestor, and nearer ancestors evicted to disk that still cover
+        # the directory (loaded below, outside the lock)
+        evicted = []
+        loaded = None
+        with self.lock:
+            now = time.time()
+            current = os.path.abspath(directory)
+            while loaded is None:
+                parent = os.path.dirname(current)
+                if parent == current:
+                    break
+                current = parent
+                index_data = self.index_cache.get(current)
+                if index_data is not None and now - index_data['timestamp'] < self.expiry_time:
+                    self.index_cache.move_to_end(current)
+                    loaded = current
+                elif index_data is None and now - self.evicted.get(current, 0) < self.expiry_time:
+                    evicted.append(current)
+        for ancestor in evicted:
+            if self._load(ancestor) is not None:
+                return ancestor
+        return loaded
+    
+    def find_loaded_root(self, directory: str) -> Optional[str]:
+        """
+        Find a fresh in-memory index covering a directory without reading the disk or waiting
+        for the lock, for status checks while indexes load or build (reading the dict is
+        atomic under the GIL)
+        
+        Args:
+            directory: Path to the directory
+            
+        Returns:
+            The indexed directory, or None if no loaded index covers it
+        """
+        now = time.time()
+        current = os.path.abspath(directory)
+        while True:
+            index_data = self.index_cache.get(current)
+            if index_data is not None and now - index_data['timestamp'] < self.expiry_time:
+                return current
+            parent = os.path.dirname(current)
+            if parent == current:
+                return None
+            current = parent
+    
+    def loaded_indexes(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Entries and age of each in-memory index, read without the lock like find_loaded_root
+        
+        Returns:
+            Mapping of indexed directory to {'entries', 'age'}
+        """
+        now = time.time()
+        return {directory: {'entries': self._entry_count(directory, data),
+                            'age': round(now - data['timestamp'], 1)}
+                for directory, data in dict(self.index_cache).items()}
+    
+    def _entry_count(self, directory: str, index_data: Dict[str, Any]) -> int:
+        """Live entries of an in-memory index (its snapshot's if changes are pending without a lookup)"""
+        lookup = self.lookups.get(directory)
+        if lookup is not None and lookup.source is index_data:
+            return lookup.count
+        return len(index_data['files'])
+    
+    def get_lookup(self, directory: str) -> Optional[IndexLookup]:
+        """
+        Get lookup structures for an index that is already loaded. They are built without
+        holding the lock; indexes are replaced rather than modified, so a lookup stays
+        consistent with the index data it was built from.
+        
+        Args:
+            directory: Indexed directory
+            
+        Returns:
+            IndexLookup, or None if the directory has no index in memory
+        """
+        with self.lock:
+            index_data = self.index_cache.get(directory)
+            if index_data is None:
+                return None
+            self.index_cache.move_to_end(directory)
+            lookup = self.lookups.get(directory)
+            if lookup is not None and lookup.source is index_data:
+                return lookup
+        
+        lookup = IndexLookup(index_data)
+        with self.lock:
+            current = self.index_cache.get(directory)
+            if current is index_data:
+                existing = self.lookups.get(directory)
+                if existing is not None and existing.source is index_data:
+                    return existing
+                self.lookups[directory] = lookup
+        return lookup
+    
+    def _resolve(self, directory: str) -> Optional[tuple]:
+        """Find the lookup covering a directory and the subtree prefix to restrict to"""
+        indexed_root = self.find_indexed_root(directory)
+        if indexed_root is None:
+            return None
+        lookup = self.get_lookup(indexed_root)
+        if lookup is None:
+            return None
+        subtree_prefix = os.path.abspath(directory) if indexed_root != directory else None
+        return lookup, indexed_root, subtree_prefix
+    
+    @staticmethod
+    def _entry_filter(files: List[Dict[str, Any]],
+                      indexed_root: str,
+                      subtree_prefix: Optional[str],
+                      file_types: Optional[List[str]],
+                      timestamp_range: Optional[tuple],
+                      size_range: Optional[tuple],
+                      max_depth: Optional[int]):
+        """Build a predicate on entry ID for the subtree, depth and attribute filters"""
+        root_length = len(subtree_prefix or indexed_root)
+        
+        def accept(entry_id: int) -> bool:
+            entry = files[entry_id]
+            
+            # Restrict to the requested subtree and depth
+            entry_dir = entry['path']
+            if subtree_prefix is not None and entry_dir != subtree_prefix and \
+                    not entry_dir.startswith(subtree_prefix + os.sep):
+                return False
+            if max_depth is not None:
+                relative = entry_dir[root_length:].strip(os.sep)
+                if relative and relative.count(os.sep) + 1 > max_depth:
+                    return False
+            
+            is_dir = entry['is_directory']
+            if file_types and (is_dir or os.path.splitext(entry['name'])[1][1:].lower() not in file_types):
+                return False
+            if timestamp_range:
+                mtime = entry['modified']
+                if mtime < timestamp_range[0] or mtime > timestamp_range[1]:
+                    return False
+            if size_range and not is_dir:
+                size = entry['size']
+                if size < size_range[0] or size > size_range[1]:
+                    return False
+            return True
+        
+        return accept
+    
+    def query(self,
+              directory: str,
+              pattern: NamePattern,
+              file_types: Optional[List[str]] = None,
+              timestamp_range: Optional[tuple] = None,
+              size_range: Optional[tuple] = None,
+              max_depth: Optional[int] = None,
+              limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer a search from the index instead of walking the filesystem
+        
+        Args:
+            directory: Directory to search (must be covered by an index)
+            pattern: Compiled name pattern
+            file_types: List of file extensions to include (None for all)
+            timestamp_range: Tuple of (start, end) modification timestamps
+            size_range: Tuple of (min_size, max_size) in bytes
+            max_depth: Maximum directory depth below `directory`
+            limit: Maximum number of entries to return
+            
+        Returns:
+            Matching index entries, or None if no index covers the directory
+        """
+        resolved = self._resolve(directory)
+        if resolved is None:
+            return None
+        lookup, indexed_root, subtree_prefix = resolved
+        
+        files = lookup.files
+        candidates = lookup.candidates(pattern, file_types, timestamp_range, size_range)
+        entry_ids = lookup.scan_ids() if candidates is None else candidates
+        
+        # Literal patterns run against the pre-casefolded names when case-insensitive
+        if pattern.is_literal and not pattern.case_sensitive:
+            names, match = lookup.folded_names, pattern.match_folded
+        else:
+            names, match = None, pattern.match
+        
+        accept = self._entry_filter(files, indexed_root, subtree_prefix, file_types,
+                                    timestamp_range, size_range, max_depth)
+        
+        matches = []
+        for entry_id in entry_ids:
+            if not match(names[entry_id] if names is not None else files[entry_id]['name']):
+                continue
+            if not accept(entry_id):
+                continue
+            matches.append(files[entry_id])
+            if limit is not None and len(matches) >= limit:
+                break
+        
+        return matches
+    
+    def list_directory(self, directory: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        List a directory's direct entries from the index
+        
+        Args:
+            directory: Directory to list (must be covered by an index)
+            
+        Returns:
+            Index entries, or None if no index covers the directory
+        """
+        resolved = self._resolve(directory)
+        if resolved is None:
+            return None
+        lookup, indexed_root, subtree_prefix = resolved
+        files = lookup.files
+        return [files[entry_id] for entry_id in lookup.children(subtree_prefix or indexed_root)]
+    
+    def fuzzy_query(self,
+                    directory: str,
+                    query: str,
+                    file_types: Optional[List[str]] = None,
+                    timestamp_range: Optional[tuple] = None,
+                    size_range: Optional[tuple] = None,
+                    max_depth: Optional[int] = None,
+                    limit: int = 500) -> Optional[List[tuple]]:
+        """
+        Rank index entries against a fuzzy query
+        
+        Args:
+            directory: Directory to search (must be covered by an index)
+            query: Fuzzy query, e.g. "qrtrly rpt"
+            file_types: List of file extensions to include (None for all)
+            timestamp_range: Tuple of (start, end) modification timestamps
+            size_range: Tuple of (min_size, max_size) in bytes
+            max_depth: Maximum directory depth below `directory`
+            limit: Maximum number of entries to return
+            
+        Returns:
+            List of (score, entry), best first, or None if no index covers the directory
+        """
+        resolved = self._resolve(directory)
+        if resolved is None:
+            return None
+        lookup, indexed_root, subtree_prefix = resolved
+        
+        accept = None
+        if subtree_prefix is not None or file_types or timestamp_range or size_range or max_depth is not None:
+            accept = self._entry_filter(lookup.files, indexed_root, subtree_prefix, file_types,
+                                        timestamp_range, size_range, max_depth)
+        
+        ranked = lookup.fuzzy_search(get_fuzzy_matcher(query), limit, accept)
+        return [(score, lookup.files[entry_id]) for score, entry_id in ranked]
+    
+    def refresh_index(self, directory: str) -> Dict[str, Any]:
+        """
+        Rebuild an index in the background of ongoing searches: the walk and the snapshot write
+        run without holding the lock, and the old index keeps answering queries until the new
+        one replaces it
+        
+        Args:
+            directory: Path to the directory to index
+            
+        Returns:
+            The new index data
+        """
+        index_data = self._build_index(directory, self.governor)
+        self._write_snapshot(directory, index_data)
+        with self.lock:
+            self._store(directory, index_data)
+        return index_data
+    
+    def index_age(self, directory: str) -> Optional[float]:
+        """
+        Age in seconds of the in-memory index for a directory
+        
+        Args:
+            directory: Indexed directory
+            
+        Returns:
+            Seconds since the index was built, or None if it is not loaded
+        """
+        with self.lock:
+            index_data = self.index_cache.get(directory)
+            return None if index_data is None else time.time() - index_data['timestamp']
+    
+    def unload(self, directory: str) -> None:
+        """
+        Drop an index from memory, keeping its disk cache until it expires
+        
+        Args:
+            directory: Indexed directory
+        """
+        with self.lock:
+            self.evicted.pop(directory, None)
+            if self._drop(directory):
+                INDEX_BYTES.remove(directory=directory)
+    
     def invalidate_index(self, directory: str) -> None:
         """
         Invalidate the index for a directory, forcing a rebuild on next access
@@ -66,10 +786,13 @@ class SearchIndex:
             directory: Path to the directory to invalidate
         """
         with self.lock:
-            if directory in self.index_cache:
-                del self.index_cache[directory]
+            self.evicted.pop(directory, None)
+            if self._drop(directory):
+                INDEX_BYTES.remove(directory=directory)
             
-            # Also delete the cache file
+            # Also delete the cache file and its journal
+            self._journal(directory).remove()
+            self.snapshot_sizes.pop(directory, None)
             cache_file = self._get_cache_file_path(directory)
             if os.path.exists(cache_file):
                 try:
@@ -77,93 +800,289 @@ class SearchIndex:
                 except Exception:
                     pass
     
-    def _has_valid_cache(self, directory: str) -> bool:
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Report the in-memory index budget
+        
+        Returns:
+            Dictionary with the budget, estimated use per root, evictions and reload latency
+        """
+        # Read without the lock, like loaded_indexes (each copy is atomic under the GIL)
+        reloads = self.reload_count
+        return {
+            'budget': self.memory_budget,
+            'used': self.memory_used,
+            'indexes': dict(self.index_sizes),
+            'evicted': sorted(self.evicted),
+            'evictions': self.eviction_count,
+            'reloads': reloads,
+            'reload_time_avg': round(self.reload_time / reloads, 4) if reloads else None
+        }
+    
+    def _store(self, directory: str, index_data: Dict[str, Any]) -> None:
+        """Put an index in memory as the most recently used, then enforce the budget"""
+        self._drop(directory)
+        self.index_cache[directory] = index_data
+        size = estimate_index_size(index_data)
+        self.index_sizes[directory] = size
+        self.memory_used += size
+        self.evicted.pop(directory, None)
+        INDEX_ENTRIES.set(len(index_data.get('files', [])), directory=directory)
+        self._enforce_budget(directory)
+    
+    def _drop(self, directory: str) -> bool:
+        """Remove an index and its lookup from memory; returns whether it was loaded"""
+        self.lookups.pop(directory, None)
+        if self.index_cache.pop(directory, None) is None:
+            return False
+        self.memory_used -= self.index_sizes.pop(directory, 0)
+        INDEX_ENTRIES.remove(directory=directory)
+        INDEX_MEMORY_BYTES.set(self.memory_used)
+        return True
+    
+    def _enforce_budget(self, keep: str) -> None:
+        """
+        Evict expired indexes, then least recently used ones while over budget. Evicted
+        roots stay on disk and are reloaded on their next use. `keep` (just loaded) is never
+        evicted, even if it alone exceeds the budget.
+        """
+        now = time.time()
+        for directory in [d for d, data in self.index_cache.items()
+                          if d != keep and now - data['timestamp'] >= self.expiry_time]:
+            self._drop(directory)
+        
+        if self.memory_budget is not None:
+            for directory in list(self.index_cache):
+                if self.memory_used <= self.memory_budget:
+                    break
+                if directory == keep:
+                    continue
+                index_data = self.index_cache[directory]
+                if not os.path.exists(self._get_cache_file_path(directory)):
+                    self._write_cache_file(directory, live_index(index_data))
+                self._drop(directory)
+                self.evicted[directory] = index_data['timestamp']
+                self.eviction_count += 1
+                INDEX_EVICTIONS.inc()
+                logger.info("Evicted index for %s to disk (memory budget)", directory)
+            if self.memory_used > self.memory_budget:
+                logger.warning("Index for %s alone exceeds the memory budget (%d > %d bytes)",
+                               keep, self.memory_used, self.memory_budget)
+        INDEX_MEMORY_BYTES.set(self.memory_used)
+    
+    def _memory_index(self, directory: str) -> Optional[Dict[str, Any]]:
+        """Fresh in-memory index for a directory, marked as recently used (lock held)"""
+        index_data = self.index_cache.get(directory)
+        if index_data is not None and time.time() - index_data['timestamp'] < self.expiry_time:
+            INDEX_CACHE_REQUESTS.inc(result='memory_hit')
+            self.index_cache.move_to_end(directory)
+            return index_data
+        return None
+    
+    def _load(self, directory: str, build_lookup: bool = False) -> Optional[Dict[str, Any]]:
         """
-        Check if we have a valid cached index for the directory
+        Get a fresh index from memory, or load it from the disk cache. The cache file is parsed
+        and its journal replayed (and the lookup built, if asked) without holding the lock,
+        then swapped in under it, so searches and status checks don't wait for large loads.
         
         Args:
             directory: Directory path
+            build_lookup: Whether to also build the lookup structures of a loaded index
             
         Returns:
-            True if a valid cache exists, False otherwise
+            Index data, or None if there is no fresh index
         """
-        # Check in-memory cache first
-        if directory in self.index_cache:
-            if time.time() - self.index_cache[directory]['timestamp'] < self.expiry_time:
-                return True
+        with self.lock:
+            index_data = self._memory_index(directory)
+            if index_data is not None:
+                return index_data
+            reloaded = directory in self.evicted
         
         # Check on-disk cache
         cache_file = self._get_cache_file_path(directory)
-        if os.path.exists(cache_file):
+        try:
+            version = os.stat(cache_file)
+        except OSError:
+            INDEX_CACHE_REQUESTS.inc(result='miss')
+            return None
+        try:
+            load_start = time.perf_counter()
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+            
+            # Check if the cache is still valid
+            if time.time() - cache_data.get('timestamp', 0) >= self.expiry_time:
+                INDEX_CACHE_REQUESTS.inc(result='miss')
+                return None
+            # Replay changes journaled since the snapshot was written (journals are only
+            # appended to while their index is in memory, so this one is not changing)
+            records = self._journal(directory).load(cache_data.get('generation', 0),
+                                                    cache_data.pop('journal_base', None))
+            if records:
+                cache_data['files'] = apply_records(cache_data['files'], records)
+            lookup = IndexLookup(cache_data) if build_lookup else None
+        except Exception:
+            # If there's any error reading the cache, we'll rebuild it
+            logger.warning("Unreadable index cache %s, rebuilding", cache_file)
+            INDEX_CACHE_REQUESTS.inc(result='miss')
+            return None
+        
+        with self.lock:
+            # Loaded or rebuilt by another thread meanwhile: that copy is at least as current
+            index_data = self._memory_index(directory)
+            if index_data is not None:
+                return index_data
             try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    cache_data = json.load(f)
-                    
-                # Check if the cache is still valid
-                if time.time() - cache_data.get('timestamp', 0) < self.expiry_time:
-                    self.index_cache[directory] = cache_data
-                    return True
-            except Exception:
-                # If there's any error reading the cache, we'll rebuild it
-                pass
-                
-        return False
+                current = os.stat(cache_file)
+            except OSError:
+                current = None
+            if current is None or (current.st_ino, current.st_mtime_ns) != (version.st_ino, version.st_mtime_ns):
+                # Invalidated or replaced by another process while loading
+                INDEX_CACHE_REQUESTS.inc(result='miss')
+                return None
+            self.snapshot_sizes[directory] = version.st_size
+            self._store(directory, cache_data)
+            if lookup is not None:
+                self.lookups[directory] = lookup
+        INDEX_CACHE_REQUESTS.inc(result='disk_hit')
+        if reloaded:
+            elapsed = time.perf_counter() - load_start
+            with self.lock:
+                self.reload_count += 1
+                self.reload_time += elapsed
+            INDEX_RELOAD_DURATION.observe(elapsed)
+        return cache_data
     
-    def _build_index(self, directory: str) -> Dict[str, Any]:
+    def _build_index(self, directory: str, governor=None) -> Dict[str, Any]:
         """
-        Build the index for a directory
+        Build the index for a directory. Directories are scanned in parallel on the
+        concurrency manager's per-device pools; entries are then assembled in os.walk's
+        top-down order.
         
         Args:
             directory: Directory path
+            governor: Optional ResourceGovernor charged per directory (background builds only;
+                      a build a search is waiting for runs at full speed)
             
         Returns:
             Dictionary with indexed files and metadata
         """
-        indexed_files = []
+        build_start = time.perf_counter()
+        # Per-directory (entries, subdirectories to walk), filled in by the pool's workers
+        scanned: Dict[str, tuple] = {}
         
-        try:
-            for root, dirs, files in os.walk(directory):
+        def scan(task: tuple) -> tuple:
+            root, exclude = task
+            try:
+                with os.scandir(root) as iterator:
+                    items = list(iterator)
+            except OSError as error:
+                SCAN_ERRORS.inc(source='index')
+                logger.warning("Error accessing %s: %s", root, error)
+                return [], 0
+            DIRECTORIES_SCANNED.inc(source='index')
+            ENTRIES_SCANNED.inc(len(items), source='index')
+            
+            dirs = []
+            files = []
+            symlinks = set()
+            for item in items:
+                try:
+                    is_dir = item.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(item.name)
+                    # Like os.walk, list symlinked directories but don't descend into them
+                    if item.is_symlink():
+                        symlinks.add(item.name)
+                else:
+                    files.append(item.name)
+            
+            # Exclude matcher per directory, so ignore files apply to their subtree only
+            if exclude.active:
+                exclude = exclude.for_directory(root, set(files))
+                # Prune excluded subtrees before descending into them
+                dirs = [d for d in dirs if not d.startswith('.')
+                        and not exclude.is_excluded(d, os.path.join(root, d), True)]
+                files = [f for f in files if not exclude.is_excluded(f, os.path.join(root, f), False)]
+            else:
                 # Skip hidden directories
-                dirs[:] = [d for d in dirs if not d.startswith('.')]
-                
-                for file in files:
-                    # Skip hidden files
-                    if file.startswith('.'):
-                        continue
-                        
-                    full_path = os.path.join(root, file)
-                    try:
-                        stats = os.stat(full_path)
-                        indexed_files.append({
-                            'name': file,
-                            'path': root,
-                            'full_path': full_path,
-                            'size': stats.st_size,
-                            'modified': stats.st_mtime,
-                            'is_directory': False
-                        })
-                    except (PermissionError, FileNotFoundError):
-                        # Skip files we can't access
-                        continue
-                
-                # Add directories too
-                for d in dirs:
-                    full_path = os.path.join(root, d)
-                    try:
-                        stats = os.stat(full_path)
-                        indexed_files.append({
-                            'name': d,
-                            'path': root,
-                            'full_path': full_path,
-                            'size': 0,  # We don't calculate directory size during indexing for performance
-                            'modified': stats.st_mtime,
-                            'is_directory': True
-                        })
-                    except (PermissionError, FileNotFoundError):
-                        # Skip directories we can't access
-                        continue
-        except Exception as e:
-            print(f"Error indexing directory {directory}: {str(e)}")
+                dirs = [d for d in dirs if not d.startswith('.')]
+            
+            entries = []
+            stats_taken = 0
+            for file in files:
+                # Skip hidden files
+                if file.startswith('.'):
+                    continue
+                    
+                full_path = os.path.join(root, file)
+                try:
+                    stats_taken += 1
+                    stats = os.stat(full_path)
+                    entries.append({
+                        'name': file,
+                        'path': root,
+                        'full_path': full_path,
+                        'size': stats.st_size,
+                        'modified': stats.st_mtime,
+                        'is_directory': False
+                    })
+                except (PermissionError, FileNotFoundError):
+                    # Skip files we can't access
+                    continue
+            
+            # Add directories too
+            children = []
+            for d in dirs:
+                full_path = os.path.join(root, d)
+                try:
+                    stats_taken += 1
+                    stats = os.stat(full_path)
+                    entries.append({
+                        'name': d,
+                        'path': root,
+                        'full_path': full_path,
+                        'size': 0,  # We don't calculate directory size during indexing for performance
+                        'modified': stats.st_mtime,
+                        'is_directory': True
+                    })
+                except (PermissionError, FileNotFoundError):
+                    # Skip directories we can't access
+                    continue
+                if d not in symlinks:
+                    children.append((stats.st_dev, full_path, (full_path, exclude)))
+            
+            STAT_CALLS.inc(stats_taken, source='index')
+            scanned[root] = (entries, [path for _, path, _ in children])
+            return children, len(items)
+        
+        try:
+            device = os.stat(directory).st_dev
+        except OSError as error:
+            SCAN_ERRORS.inc(source='index')
+            logger.warning("Error accessing %s: %s", directory, error)
+        else:
+            # Background builds are throttled between directories (outside the latency
+            # samples) and walk on the devices' background budgets
+            pool = AdaptivePool(self.concurrency, scan, thread_name='fastique-index',
+                                initializer=governor.enter_background if governor is not None else None,
+                                throttle=(lambda entries: governor.throttle(entries=entries))
+                                if governor is not None else None,
+                                background=governor is not None)
+            pool.submit(device, directory, (directory, self.exclude))
+            pool.wait()
+        
+        # Assemble in os.walk's top-down order: a directory's entries, then each subdirectory
+        indexed_files = []
+        stack = [directory]
+        while stack:
+            entries, subdirectories = scanned.pop(stack.pop(), ((), ()))
+            indexed_files.extend(entries)
+            stack.extend(reversed(subdirectories))
+        
+        INDEX_BUILD_DURATION.observe(time.perf_counter() - build_start)
         
         # Create the index data
         index_data = {
@@ -182,16 +1101,214 @@ class SearchIndex:
             directory: Directory path
             index_data: Index data to save
         """
-        # Save to memory cache
-        self.index_cache[directory] = index_data
-        
-        # Save to disk cache
+        # Save to disk first, so the index can be evicted from memory right away if needed
+        self._write_snapshot(directory, index_data)
+        self._store(directory, index_data)
+    
+    def _write_snapshot(self, directory: str, index_data: Dict[str, Any]) -> None:
+        """
+        Write a freshly built index as a new snapshot generation and drop its journal. A full
+        snapshot supersedes the journal: the new generation makes any leftover journal
+        (including one started for the old index while this was written) inapplicable.
+        Needs no lock.
+        """
+        index_data['generation'] = time.time_ns()
+        self._write_cache_file(directory, index_data)
+        self._journal(directory).remove()
+    
+    def _write_cache_file(self, directory: str, index_data: Dict[str, Any]) -> None:
+        """Write the on-disk form of an index"""
+        # Write-then-rename so concurrent processes never read a partial file
         cache_file = self._get_cache_file_path(directory)
+        temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
+            with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(index_data, f)
-        except Exception as e:
-            print(f"Error saving index for {directory} to {cache_file}: {str(e)}")
+            os.replace(temp_file, cache_file)
+            self.snapshot_sizes[directory] = os.path.getsize(cache_file)
+            INDEX_BYTES.set(self.snapshot_sizes[directory], directory=directory)
+        except Exception:
+            logger.exception("Error saving index for %s to %s", directory, cache_file)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+    
+    def record_changes(self, paths: List[str]) -> int:
+        """
+        Bring indexes up to date for changed paths without rebuilding them. Each path is
+        re-stat()ed: missing paths are removed (with their subtree), existing ones are added
+        or updated, and a directory new to the index is added with its contents. Changes are
+        applied in memory and appended to the index's journal; persistence cost is
+        proportional to the number of changes, not the index size.
+        
+        Args:
+            paths: Created, modified, moved or deleted paths
+            
+        Returns:
+            Number of journal records written
+        """
+        by_root: Dict[str, List[str]] = {}
+        for path in paths:
+            path = os.path.abspath(path)
+            root = self.find_indexed_root(os.path.dirname(path))
+            if root is None:
+                continue
+            relative = os.path.relpath(path, root)
+            # Hidden entries are never indexed
+            if any(part.startswith('.') for part in relative.split(os.sep)):
+                continue
+            by_root.setdefault(root, []).append(path)
+        
+        written = 0
+        for root, root_paths in by_root.items():
+            lookup = self.get_lookup(root)
+            if lookup is None:
+                continue
+            # Build the parent map the overlay uses for subtree removals outside the lock
+            lookup.children(root)
+            records = []
+            for path in root_paths:
+                records.extend(self._change_records(path, lookup))
+            if records:
+                self._append_changes(root, records)
+                written += len(records)
+        return written
+    
+    def compact(self, directory: str) -> bool:
+        """
+        Fold an index's journal into a new snapshot, and the changes held in memory into its
+        entry list. The snapshot and the new lookup are built without holding the lock; changes
+        journaled meanwhile are carried over to the new journal and lookup overlay. The snapshot
+        records where it left the old journal, so a crash between replacing the snapshot and
+        the journal still replays exactly the missing records.
+        
+        Args:
+            directory: Indexed directory
+            
+        Returns:
+            True if a new snapshot was written
+        """
+        journal = self._journal(directory)
+        with self.lock:
+            index_data = self.index_cache.get(directory)
+            if index_data is None:
+                return False
+            old_generation = index_data.get('generation', 0)
+            offset = journal.size
+        
+        generation = time.time_ns()
+        compacted = dict(live_index(index_data), generation=generation)
+        snapshot = dict(compacted, journal_base={'generation': old_generation, 'offset': offset})
+        cache_file = self._get_cache_file_path(directory)
+        temp_file = f"{cache_file}.compact.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+        except Exception:
+            logger.exception("Error compacting index for %s", directory)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            return False
+        lookup = IndexLookup(compacted)
+        folded = len(index_data.get('changes', ()))
+        
+        with self.lock:
+            current = self.index_cache.get(directory)
+            if current is None or current.get('generation', 0) != old_generation:
+                # Rebuilt or dropped meanwhile; the new snapshot is already newer
+                os.remove(temp_file)
+                return False
+            os.replace(temp_file, cache_file)
+            journal.reset(generation, journal.read_from(offset))
+            # Changes are only ever appended, so those past `folded` came in meanwhile
+            changes = current.get('changes', [])[folded:]
+            if changes:
+                compacted = dict(compacted, changes=changes)
+                lookup = lookup.patch(compacted, changes)
+            self.index_cache[directory] = compacted
+            self.lookups[directory] = lookup
+            self.snapshot_sizes[directory] = os.path.getsize(cache_file)
+            INDEX_BYTES.set(self.snapshot_sizes[directory], directory=directory)
+        logger.info("Compacted index journal for %s", directory)
+        return True
+    
+    def _journal(self, directory: str) -> IndexJournal:
+        return IndexJournal(self._get_cache_file_path(directory)[:-len('.json')] + '.journal',
+                            self.journal_fsync)
+    
+    def _change_records(self, path: str, lookup: IndexLookup) -> List[list]:
+        """Journal records describing the current state of one changed path"""
+        name = os.path.basename(path)
+        already_indexed = lookup.find(path) is not None
+        removal = [[RECORD_REMOVE, path]] if already_indexed else []
+        try:
+            stats = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return removal
+        except OSError:
+            return []
+        is_dir = os.path.isdir(path)
+        if self.exclude.is_excluded(name, path, is_dir):
+            return removal
+        
+        records = [upsert_record({'name': name, 'path': os.path.dirname(path), 'size': 0 if is_dir else stats.st_size,
+                                  'modified': stats.st_mtime, 'is_directory': is_dir})]
+        if is_dir and not already_indexed and not os.path.islink(path):
+            # A new directory (copied or moved in): index its contents too
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith('.')
+                           and not self.exclude.is_excluded(d, os.path.join(root, d), True)]
+                for entry_name, entry_is_dir in [(f, False) for f in files] + [(d, True) for d in dirs]:
+                    full_path = os.path.join(root, entry_name)
+                    if entry_name.startswith('.') or self.exclude.is_excluded(entry_name, full_path, entry_is_dir):
+                        continue
+                    try:
+                        entry_stats = os.stat(full_path)
+                    except OSError:
+                        continue
+                    records.append(upsert_record({
+                        'name': entry_name, 'path': root,
+                        'size': 0 if entry_is_dir else entry_stats.st_size,
+                        'modified': entry_stats.st_mtime, 'is_directory': entry_is_dir}))
+        return records
+    
+    def _append_changes(self, root: str, records: List[list]) -> None:
+        """Journal records for an index and apply them to the in-memory copy"""
+        journal = self._journal(root)
+        with self.lock:
+            index_data = self.index_cache.get(root)
+            if index_data is None:
+                return
+            generation = index_data.get('generation', 0)
+            if journal.base_generation() != generation:
+                # Missing, or left over from the index this one replaced
+                journal.reset(generation)
+            journal.append(records)
+            # The entry list is shared and never modified: changes are kept next to it and
+            # patched into the lookup's overlay, and folded in by the next compaction.
+            # Readers and a running compaction keep the previous index data and lookup.
+            updated = dict(index_data, changes=index_data.get('changes', []) + records)
+            lookup = self.lookups.get(root)
+            self.index_cache[root] = updated
+            if lookup is not None and lookup.source is index_data:
+                self.lookups[root] = lookup.patch(updated, records)
+            else:
+                self.lookups.pop(root, None)
+            INDEX_ENTRIES.set(self._entry_count(root, updated), directory=root)
+            
+            snapshot_size = self.snapshot_sizes.get(root, 0)
+            due = journal.size >= max(self.compact_min_bytes, snapshot_size * self.compact_ratio)
+            if not due or root in self._compacting:
+                return
+            self._compacting.add(root)
+        threading.Thread(target=self._background_compact, args=(root,), daemon=True,
+                         name='fastique-index-compact').start()
+    
+    def _background_compact(self, directory: str) -> None:
+        try:
+            self.compact(directory)
+        finally:
+            with self.lock:
+                self._compacting.discard(directory)
     
     def _get_cache_file_path(self, directory: str) -> str:
         """
@@ -0,0 +1,213 @@
+# fastique/app/search/journal.py
+# Append-only change journal for persisted indexes: checksummed records, replay and compaction
+
+import os
+import json
+import zlib
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Record kinds
+RECORD_BASE = 'base'     # ['base', generation]: first record, names the snapshot it applies to
+RECORD_UPSERT = '+'      # ['+', name, path, size, modified, is_directory]
+RECORD_REMOVE = '-'      # ['-', full_path]: removes the entry and, for a directory, its subtree
+
+def encode_record(record: List[Any]) -> bytes:
+    """One journal line: CRC-32 of the payload, then the compact JSON payload"""
+    payload = json.dumps(record, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return b'%08x %s\n' % (zlib.crc32(payload), payload)
+
+def decode_records(data: bytes) -> tuple:
+    """
+    Decode journal lines, stopping at the first torn or corrupt record
+
+    Args:
+        data: Journal bytes
+
+    Returns:
+        (records, number of valid bytes)
+    """
+    records = []
+    valid = 0
+    while valid < len(data):
+        end = data.find(b'\n', valid)
+        if end < 0:
+            break
+        line = data[valid:end]
+        checksum, _, payload = line.partition(b' ')
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                break
+            records.append(json.loads(payload))
+        except ValueError:
+            break
+        valid = end + 1
+    return records, valid
+
+def upsert_record(entry: Dict[str, Any]) -> List[Any]:
+    return [RECORD_UPSERT, entry['name'], entry['path'], entry['size'], entry['modified'],
+            entry['is_directory']]
+
+def entry_from_record(record: List[Any]) -> Dict[str, Any]:
+    _, name, path, size, modified, is_directory = record
+    return {
+        'name': name,
+        'path': path,
+        'full_path': os.path.join(path, name),
+        'size': size,
+        'modified': modified,
+        'is_directory': is_directory
+    }
+
+def apply_records(files: List[Dict[str, Any]], records: List[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Apply upsert/remove records to an index's file list
+
+    Args:
+        files: Current entries (not modified)
+        records: Records in journal order
+
+    Returns:
+        New list of entries
+    """
+    # Last record per path wins; collect removals (with subtrees) and upserts in one pass
+    removed_paths = set()
+    removed_prefixes = []
+    upserts: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        if record[0] == RECORD_UPSERT:
+            entry = entry_from_record(record)
+            upserts[entry['full_path']] = entry
+        elif record[0] == RECORD_REMOVE:
+            full_path = record[1]
+            removed_paths.add(full_path)
+            prefix = full_path.rstrip(os.sep) + os.sep
+            removed_prefixes.append(prefix)
+            for path in [path for path in upserts if path == full_path or path.startswith(prefix)]:
+                del upserts[path]
+    prefixes = tuple(removed_prefixes)
+
+    result = []
+    for entry in files:
+        full_path = entry['full_path']
+        if full_path in upserts or full_path in removed_paths:
+            continue
+        if prefixes and full_path.startswith(prefixes):
+            continue
+        result.append(entry)
+    result.extend(upserts.values())
+    return result
+
+class IndexJournal:
+    """
+    Change journal next to an index snapshot. It starts with a base record naming the
+    snapshot generation it applies to; records after it are appended and flushed one
+    batch at a time. A torn final record (crash mid-append) is detected by its checksum
+    and dropped on the next load.
+    """
+    def __init__(self, path: str, fsync: bool = False):
+        """
+        Initialize the journal
+
+        Args:
+            path: Journal file
+            fsync: Whether to fsync after every append (durable against power loss, slower)
+        """
+        self.path = path
+        self.fsync = fsync
+
+    @property
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def base_generation(self) -> Optional[int]:
+        """Generation named by the journal's base record (None if missing or unreadable)"""
+        try:
+            with open(self.path, 'rb') as f:
+                line = f.readline()
+        except OSError:
+            return None
+        records, _ = decode_records(line)
+        if not records or records[0][0] != RECORD_BASE:
+            return None
+        return records[0][1]
+
+    def reset(self, generation: int, tail: bytes = b'') -> None:
+        """
+        Atomically replace the journal with a new base record, optionally followed by
+        already-encoded records carried over from the previous journal
+
+        Args:
+            generation: Generation of the snapshot the journal applies to
+            tail: Encoded records to keep
+        """
+        temp_file = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(encode_record([RECORD_BASE, generation]))
+            f.write(tail)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_file, self.path)
+
+    def append(self, records: List[List[Any]]) -> None:
+        """Append records as one write"""
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(encode_record(record) for record in records))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def read_from(self, offset: int) -> bytes:
+        """Raw bytes from an offset to the end of the journal"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return f.read()
+        except OSError:
+            return b''
+
+    def load(self, generation: int, base: Optional[Dict[str, Any]] = None) -> List[List[Any]]:
+        """
+        Records to replay onto a snapshot
+
+        Args:
+            generation: The snapshot's generation
+            base: The snapshot's 'journal_base' ({'generation', 'offset'}) if it was written by a
+                  compaction that may not have replaced the journal yet
+
+        Returns:
+            Upsert/remove records in order (empty if the journal belongs to another snapshot)
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return []
+        records, valid = decode_records(data)
+        if valid < len(data):
+            logger.warning("Dropping %d bytes of torn or corrupt records from %s",
+                           len(data) - valid, self.path)
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid)
+        if not records or records[0][0] != RECORD_BASE:
+            return []
+        journal_generation = records[0][1]
+        if journal_generation == generation:
+            return records[1:]
+        if base is not None and journal_generation == base.get('generation'):
+            # The snapshot already contains everything before the compaction point
+            records, _ = decode_records(data[base['offset']:valid])
+            return records
+        return []
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,260 @@
+# fastique/app/search/listing.py
+# Directory listings for browsing: mtime-validated listing cache, sorting and lazily stat()ed pages
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from app.metrics import LISTING_REQUESTS, STAT_CALLS
+from app.search.results import ResultBatch, file_extension
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ('name', 'type', 'size', 'modified')
+
+# Directories modified this recently are re-read on every request; coarse mtimes could hide a change
+RACY_NS = 2 * 10 ** 9
+
+class Listing:
+    """
+    Names of one directory's entries as read by scandir (no stat), with sort orders and
+    size/mtime attributes computed on first use
+    """
+    __slots__ = ('directory', 'mtime_ns', 'racy', 'names', 'is_directories', 'orders',
+                 'attribute_orders', 'attributes', 'attributes_time')
+
+    def __init__(self, directory: str, mtime_ns: int, racy: bool, names: List[str], is_directories: List[bool]):
+        self.directory = directory
+        self.mtime_ns = mtime_ns
+        self.racy = racy
+        self.names = names
+        self.is_directories = is_directories
+        # (sort, descending, include_hidden, directories_first) -> entry positions
+        self.orders: Dict[tuple, List[int]] = {}
+        # The same for size and time orders, replaced whenever the attributes are
+        self.attribute_orders: Dict[tuple, List[int]] = {}
+        # Per entry (size, mtime), for sorting by size or modification time
+        self.attributes: Optional[List[Tuple[int, float]]] = None
+        self.attributes_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+class ListingCache:
+    """
+    LRU cache of directory listings. A listing is reused while the directory's mtime is
+    unchanged (entries can only be added, removed or renamed by changing it), so opening a
+    large directory again costs one stat. Pages are stat()ed when they are served; sizes and
+    times used for sorting come from a covering index when there is one and are otherwise
+    stat()ed once and kept for `attribute_ttl` seconds.
+    """
+    def __init__(self, max_directories: int = 64, max_entries: int = 1_000_000,
+                 attribute_ttl: float = 30.0):
+        """
+        Initialize the cache
+
+        Args:
+            max_directories: Most listings kept
+            max_entries: Most entries kept across listings (a larger listing is kept alone)
+            attribute_ttl: Seconds sizes and times used for sorting are reused
+        """
+        self.max_directories = max_directories
+        self.max_entries = max_entries
+        self.attribute_ttl = attribute_ttl
+        self.listings: 'OrderedDict[str, Listing]' = OrderedDict()
+        self.entries = 0
+        self.lock = threading.Lock()
+
+    def get(self, directory: str) -> Listing:
+        """
+        Get a directory's listing, reading it if it changed
+
+        Args:
+            directory: Directory to list
+
+        Returns:
+            Listing
+
+        Raises:
+            OSError: If the directory cannot be read (NotADirectoryError if it is a file)
+        """
+        directory = os.path.realpath(directory)
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with self.lock:
+            listing = self.listings.get(directory)
+            if listing is not None and listing.mtime_ns == mtime_ns and not listing.racy:
+                self.listings.move_to_end(directory)
+                LISTING_REQUESTS.inc(result='hit')
+                return listing
+        LISTING_REQUESTS.inc(result='miss')
+
+        names = []
+        is_directories = []
+        with os.scandir(directory) as items:
+            for item in items:
+                names.append(item.name)
+                try:
+                    is_directories.append(item.is_dir())
+                except OSError:
+                    is_directories.append(False)
+        listing = Listing(directory, mtime_ns, mtime_ns >= time.time_ns() - RACY_NS, names, is_directories)
+
+        with self.lock:
+            old = self.listings.pop(directory, None)
+            if old is not None:
+                self.entries -= len(old)
+            self.listings[directory] = listing
+            self.entries += len(listing)
+            while len(self.listings) > 1 and (len(self.listings) > self.max_directories
+                                              or self.entries > self.max_entries):
+                _, evicted = self.listings.popitem(last=False)
+                self.entries -= len(evicted)
+        return listing
+
+    def invalidate(self, directory: str) -> None:
+        with self.lock:
+            listing = self.listings.pop(os.path.realpath(directory), None)
+            if listing is not None:
+                self.entries -= len(listing)
+
+    def _attributes(self, listing: Listing, index=None) -> List[Tuple[int, float]]:
+        """(size, mtime) per entry: from a covering index where it has the name, else stat()"""
+        now = time.time()
+        attributes = listing.attributes
+        if attributes is not None and now - listing.attributes_time < self.attribute_ttl:
+            return attributes
+
+        indexed = {}
+        if index is not None:
+            entries = index.list_directory(listing.directory)
+            for entry in entries or ():
+                indexed[entry['name']] = (entry['size'], entry['modified'])
+
+        attributes = []
+        stats_taken = 0
+        for name, is_directory in zip(listing.names, listing.is_directories):
+            known = indexed.get(name)
+            if known is None:
+                stats_taken += 1
+                known = _stat_attributes(os.path.join(listing.directory, name), is_directory)
+            attributes.append(known)
+        STAT_CALLS.inc(stats_taken, source='listing')
+        listing.attribute_orders = {}
+        listing.attributes = attributes
+        listing.attributes_time = now
+        return attributes
+
+    def _order(self, listing: Listing, sort: str, descending: bool, include_hidden: bool,
+               directories_first: bool, index=None) -> List[int]:
+        """Entry positions in display order (cached on the listing)"""
+        key = (sort, descending, include_hidden, directories_first)
+        orders = listing.orders
+        if sort in ('size', 'modified'):
+            # Refreshing expired attributes also drops the orders built on them
+            attributes = self._attributes(listing, index)
+            orders = listing.attribute_orders
+        order = orders.get(key)
+        if order is not None:
+            return order
+
+        names = listing.names
+        positions = [i for i, name in enumerate(names) if include_hidden or not name.startswith('.')]
+        if sort == 'name':
+            sort_key = lambda i: names[i].casefold()
+        elif sort == 'type':
+            sort_key = lambda i: (file_extension(names[i]) if not listing.is_directories[i] else '',
+                                  names[i].casefold())
+        elif sort == 'size':
+            sort_key = lambda i: (attributes[i][0], names[i].casefold())
+        else:
+            sort_key = lambda i: (attributes[i][1], names[i].casefold())
+        positions.sort(key=sort_key, reverse=descending)
+        if directories_first:
+            # Stable: keeps the chosen order within folders and within files
+            is_directories = listing.is_directories
+            positions.sort(key=lambda i: not is_directories[i])
+        orders[key] = positions
+        return positions
+
+    def page(self,
+             directory: str,
+             sort: str = 'name',
+             descending: bool = False,
+             offset: int = 0,
+             limit: int = 200,
+             include_hidden: bool = False,
+             directories_first: bool = True,
+             index=None) -> Dict[str, Any]:
+        """
+        One page of a directory listing
+
+        Args:
+            directory: Directory to list
+            sort: One of SORT_KEYS
+            descending: Reverse the sort order
+            offset: Position of the first entry
+            limit: Most entries returned
+            include_hidden: Whether to include hidden entries
+            directories_first: Whether folders come before files
+            index: Optional SearchIndex (or IndexClient) supplying sizes and times for sorting
+
+        Returns:
+            {'directory', 'total', 'offset', 'next_offset', 'limit', 'sort', 'descending',
+            'results'} with results in the search result format. Entries removed since the
+            listing was read are left out of results, so the next page starts at next_offset
+            rather than offset + len(results).
+
+        Raises:
+            ValueError: For an unknown sort key
+            OSError: If the directory cannot be read
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort} (use one of {', '.join(SORT_KEYS)})")
+        listing = self.get(directory)
+        order = self._order(listing, sort, descending, include_hidden, directories_first, index)
+        offset = max(offset, 0)
+
+        # Only the page's entries are stat()ed, so their sizes and times are current
+        rows = []
+        positions = order[offset:offset + limit]
+        for position in positions:
+            name = listing.names[position]
+            is_directory = listing.is_directories[position]
+            try:
+                stats = os.stat(os.path.join(listing.directory, name))
+            except FileNotFoundError:
+                try:
+                    stats = os.lstat(os.path.join(listing.directory, name))
+                except OSError:
+                    # Removed since the listing was read; the next request re-reads it
+                    continue
+            except OSError:
+                stats = None
+            size = stats.st_size if stats is not None and not is_directory else 0
+            rows.append((listing.directory, name, size, stats.st_mtime if stats is not None else 0,
+                         is_directory, None))
+        STAT_CALLS.inc(len(rows), source='listing')
+
+        return {
+            'directory': listing.directory,
+            'total': len(order),
+            'offset': offset,
+            'next_offset': offset + len(positions),
+            'limit': limit,
+            'sort': sort,
+            'descending': descending,
+            'results': ResultBatch.from_rows(rows).to_dicts()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {'directories': len(self.listings), 'entries': self.entries}
+
+def _stat_attributes(path: str, is_directory: bool) -> Tuple[int, float]:
+    try:
+        stats = os.stat(path)
+    except OSError:
+        return 0, 0.0
+    return (0 if is_directory else stats.st_size), stats.st_mtime
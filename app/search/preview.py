@@ -0,0 +1,340 @@
+# fastique/app/search/preview.py
+# File previews: mmap range reads, text snippets, image dimensions/thumbnails and an LRU disk cache
+
+import io
+import os
+import json
+import mmap
+import struct
+import hashlib
+import logging
+import mimetypes
+import threading
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bytes inspected for text detection and snippets
+TEXT_HEAD_BYTES = 4096
+TEXT_SNIPPET_LINES = 20
+# Bytes scanned for image headers (JPEG dimensions can follow large EXIF blocks)
+IMAGE_HEADER_BYTES = 256 * 1024
+# Chunk size when streaming ranges
+STREAM_CHUNK_SIZE = 64 * 1024
+
+class RangeNotSatisfiable(Exception):
+    """Raised for a Range header that selects no bytes of the file"""
+    pass
+
+_pillow = None
+
+def _load_pillow():
+    """Import Pillow on first use (it is optional and slow to import); None if unavailable"""
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image
+            _pillow = Image
+        except ImportError:
+            _pillow = False
+    return _pillow or None
+
+def read_range(path: str, start: int, end: int) -> bytes:
+    """
+    Read bytes [start, end) of a file through mmap, touching only the pages in the range
+
+    Args:
+        path: File path
+        start: First byte offset
+        end: Offset after the last byte (clamped to the file size)
+
+    Returns:
+        The requested bytes
+    """
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = min(end, size)
+        if start >= end:
+            return b''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return mapped[start:end]
+
+def iter_range(path: str, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """Yield bytes [start, end) of a file in chunks, keeping a single mapping open"""
+    with open(path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        end = min(end, size)
+        if start >= end:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for offset in range(start, end, chunk_size):
+                yield mapped[offset:min(offset + chunk_size, end)]
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header
+
+    Args:
+        header: Header value, e.g. "bytes=0-1023", "bytes=500-" or "bytes=-200"
+        size: File size
+
+    Returns:
+        (start, end) with `end` exclusive, or None if there is no usable Range header
+        (multi-range and invalid ones, such as "bytes=500-100", are ignored as RFC 9110
+        requires, and served as a whole response)
+
+    Raises:
+        RangeNotSatisfiable: If a valid range lies outside the file
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, _, last = header[len('bytes='):].strip().partition('-')
+    if not (first.isdigit() or first == '') or not (last.isdigit() or last == '') or first == last == '':
+        return None
+    if first == '':
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    end = int(last) + 1 if last else size
+    if start >= size:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size)
+
+def image_dimensions(head: bytes) -> Optional[Tuple[str, int, int]]:
+    """
+    Read image dimensions from file header bytes without decoding the image
+
+    Args:
+        head: Leading bytes of the file
+
+    Returns:
+        (format, width, height), or None if the format is not recognised
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n') and len(head) >= 24:
+        width, height = struct.unpack('>II', head[16:24])
+        return 'png', width, height
+    if head[:6] in (b'GIF87a', b'GIF89a') and len(head) >= 10:
+        width, height = struct.unpack('<HH', head[6:10])
+        return 'gif', width, height
+    if head.startswith(b'BM') and len(head) >= 26:
+        width, height = struct.unpack('<ii', head[18:26])
+        return 'bmp', width, abs(height)
+    if head.startswith(b'\xff\xd8'):
+        return _jpeg_dimensions(head)
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP' and len(head) >= 30:
+        chunk = head[12:16]
+        if chunk == b'VP8X':
+            width = int.from_bytes(head[24:27], 'little') + 1
+            height = int.from_bytes(head[27:30], 'little') + 1
+            return 'webp', width, height
+        if chunk == b'VP8 ':
+            width, height = struct.unpack('<HH', head[26:30])
+            return 'webp', width & 0x3fff, height & 0x3fff
+        if chunk == b'VP8L':
+            bits = int.from_bytes(head[21:25], 'little')
+            return 'webp', (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+    return None
+
+def _jpeg_dimensions(head: bytes) -> Optional[Tuple[str, int, int]]:
+    """Walk JPEG segments up to the first start-of-frame marker"""
+    offset = 2
+    while offset + 9 <= len(head):
+        if head[offset] != 0xFF:
+            return None
+        marker = head[offset + 1]
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        length = struct.unpack('>H', head[offset + 2:offset + 4])[0]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', head[offset + 5:offset + 9])
+            return 'jpeg', width, height
+        offset += 2 + length
+    return None
+
+def _text_snippet(head: bytes, truncated: bool) -> Optional[str]:
+    """Decode a file head as text, or None if it looks binary"""
+    if b'\x00' in head:
+        return None
+    try:
+        text = head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut off at the end of the head is fine
+        if not truncated or e.start < len(head) - 3:
+            return None
+        text = head[:e.start].decode('utf-8')
+    return '\n'.join(text.splitlines()[:TEXT_SNIPPET_LINES])
+
+class PreviewCache:
+    """
+    Size-bounded LRU cache of generated previews on disk. Keys include the file's path, size
+    and mtime, so a modified file never gets a stale preview; old entries age out.
+    """
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Cache directory (defaults to ~/.fastique/cache/previews)
+            max_bytes: Maximum total size of cached previews
+        """
+        if directory is None:
+            directory = os.path.join(str(Path.home()), '.fastique', 'cache', 'previews')
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries: 'OrderedDict[str, int]' = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Rebuild the LRU order from the files left by earlier runs (oldest access first)
+        existing = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and entry.name.endswith('.preview'):
+                stats = entry.stat()
+                existing.append((stats.st_mtime, entry.name[:-len('.preview')], stats.st_size))
+        for _, key, size in sorted(existing):
+            self.entries[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def make_key(path: str, stats: os.stat_result, kind: str) -> str:
+        raw = f"{os.path.abspath(path)}\0{stats.st_size}\0{stats.st_mtime_ns}\0{kind}"
+        return hashlib.sha1(raw.encode('utf-8', 'surrogateescape')).hexdigest()
+
+    def _file(self, key: str) -> str:
+        return os.path.join(self.directory, key + '.preview')
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a cached preview, marking it recently used"""
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+        try:
+            with open(self._file(key), 'rb') as f:
+                data = f.read()
+            os.utime(self._file(key))
+            return data
+        except OSError:
+            with self.lock:
+                self.total_bytes -= self.entries.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store a preview, evicting the least recently used ones over the size budget"""
+        if len(data) > self.max_bytes:
+            return
+        temp_file = f"{self._file(key)}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+            os.replace(temp_file, self._file(key))
+        except OSError as e:
+            logger.warning("Cannot write preview cache entry: %s", e)
+            return
+        with self.lock:
+            self.total_bytes += len(data) - self.entries.pop(key, 0)
+            self.entries[key] = len(data)
+            self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.entries:
+            key, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(self._file(key))
+            except OSError:
+                pass
+
+class PreviewService:
+    """Builds (and caches) previews and thumbnails for files"""
+    def __init__(self, cache: PreviewCache, thumbnail_size: int = 160):
+        """
+        Initialize the service
+
+        Args:
+            cache: Disk cache for generated previews
+            thumbnail_size: Longest side of generated thumbnails in pixels
+        """
+        self.cache = cache
+        self.thumbnail_size = thumbnail_size
+
+    def preview(self, path: str) -> Dict[str, Any]:
+        """
+        Describe a file for the preview pane
+
+        Args:
+            path: Regular file path
+
+        Returns:
+            Dictionary with 'type' (text, image or binary), size, MIME type and type-specific
+            fields (snippet; width, height and thumbnail availability)
+
+        Raises:
+            OSError: If the file cannot be read
+        """
+        stats = os.stat(path)
+        key = PreviewCache.make_key(path, stats, 'preview')
+        cached = self.cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        head = read_range(path, 0, TEXT_HEAD_BYTES)
+        if head.startswith(b'\xff\xd8'):
+            # JPEG frame headers can sit behind large metadata segments
+            head = read_range(path, 0, IMAGE_HEADER_BYTES)
+        preview = {
+            'name': os.path.basename(path),
+            'size': stats.st_size,
+            'modified': stats.st_mtime,
+            'mime': mimetypes.guess_type(path)[0] or 'application/octet-stream',
+        }
+        dimensions = image_dimensions(head)
+        snippet = None if dimensions else _text_snippet(head, stats.st_size > TEXT_HEAD_BYTES)
+        if dimensions:
+            preview.update(type='image', format=dimensions[0], width=dimensions[1], height=dimensions[2],
+                           thumbnail=_load_pillow() is not None)
+        elif snippet is not None:
+            preview.update(type='text', snippet=snippet, truncated=stats.st_size > TEXT_HEAD_BYTES)
+        else:
+            preview.update(type='binary')
+
+        self.cache.put(key, json.dumps(preview).encode('utf-8'))
+        return preview
+
+    def thumbnail(self, path: str) -> Optional[bytes]:
+        """
+        PNG thumbnail of an image (requires Pillow)
+
+        Returns:
+            PNG bytes, or None if thumbnails are unavailable or the file is not a readable image
+        """
+        Image = _load_pillow()
+        if Image is None:
+            return None
+        stats = os.stat(path)
+        key = PreviewCache.make_key(path, stats, f'thumbnail:{self.thumbnail_size}')
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            with Image.open(path) as image:
+                # draft() lets JPEG decoding downscale instead of decoding full resolution
+                image.draft('RGB', (self.thumbnail_size, self.thumbnail_size))
+                image.thumbnail((self.thumbnail_size, self.thumbnail_size))
+                output = io.BytesIO()
+                image.save(output, format='PNG')
+        except Exception as e:
+            logger.info("Cannot build thumbnail for %s: %s", path, e)
+            return None
+        data = output.getvalue()
+        self.cache.put(key, data)
+        return data
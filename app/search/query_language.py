@@ -0,0 +1,533 @@
+# fastique/app/search/query_language.py
+# Structured query syntax: tokenizer, parser, AST and a planner with predicate pushdown
+
+import re
+import time
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+from app.search.query_planner import NamePattern, plan_name_pattern, MATCH_REGEX
+from app.search.results import file_extension
+
+# Entry tuple evaluated by compiled predicates: (directory, name, is_directory, size, mtime)
+Entry = Tuple[str, str, bool, int, float]
+
+FIELDS = ('name', 'ext', 'size', 'modified', 'path', 'type')
+
+_SIZE_UNITS = {'': 1, 'b': 1, 'k': 1024, 'kb': 1024, 'm': 1024 ** 2, 'mb': 1024 ** 2,
+               'g': 1024 ** 3, 'gb': 1024 ** 3, 't': 1024 ** 4, 'tb': 1024 ** 4}
+_AGE_UNITS = {'s': 1, 'min': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400, 'y': 365 * 86400}
+
+_TOKEN = re.compile(r'\s*(?:(?P<paren>[()])|(?P<term>-?(?:[A-Za-z]+:)?(?:"[^"]*"|[^\s()"]+)|"[^"]*"))')
+_SIZE_VALUE = re.compile(r'^(\d+(?:\.\d+)?)\s*([a-z]*)$')
+_AGE_VALUE = re.compile(r'^(\d+(?:\.\d+)?)\s*([a-z]+)$')
+
+class QuerySyntaxError(ValueError):
+    """Raised for queries that cannot be parsed"""
+    pass
+
+# --- AST -------------------------------------------------------------------------------
+
+class Node:
+    """Base class of query AST nodes"""
+    __slots__ = ()
+    # Relative evaluation cost; cheaper predicates run first in conjunctions and disjunctions
+    cost = 1
+    # Whether the predicate needs size/mtime (a stat) to be decided
+    needs_stat = False
+
+class And(Node):
+    __slots__ = ('children',)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def __repr__(self):
+        return f"And({', '.join(map(repr, self.children))})"
+
+class Or(Node):
+    __slots__ = ('children',)
+
+    def __init__(self, children: List[Node]):
+        self.children = children
+
+    def __repr__(self):
+        return f"Or({', '.join(map(repr, self.children))})"
+
+class Not(Node):
+    __slots__ = ('child',)
+
+    def __init__(self, child: Node):
+        self.child = child
+
+    def __repr__(self):
+        return f"Not({self.child!r})"
+
+class Name(Node):
+    """Name pattern: a glob if it has wildcards, otherwise a case-insensitive substring"""
+    __slots__ = ('text', 'pattern')
+
+    def __init__(self, text: str):
+        self.text = text
+        glob = text if any(ch in text for ch in '*?[') else f'*{text}*'
+        self.pattern: NamePattern = plan_name_pattern(glob)
+
+    @property
+    def cost(self):
+        return 4 if self.pattern.kind == MATCH_REGEX else 2
+
+    def __repr__(self):
+        return f"Name({self.text!r})"
+
+class Ext(Node):
+    """File extension in a set (files only)"""
+    __slots__ = ('extensions',)
+
+    def __init__(self, extensions: frozenset):
+        self.extensions = extensions
+
+    def __repr__(self):
+        return f"Ext({','.join(sorted(self.extensions))})"
+
+class Type(Node):
+    """Entry kind: files or directories"""
+    __slots__ = ('is_directory',)
+    cost = 0
+
+    def __init__(self, is_directory: bool):
+        self.is_directory = is_directory
+
+    def __repr__(self):
+        return f"Type({'dir' if self.is_directory else 'file'})"
+
+class PathContains(Node):
+    """Case-insensitive substring of the entry's full path"""
+    __slots__ = ('text',)
+    cost = 3
+
+    def __init__(self, text: str):
+        self.text = text.casefold()
+
+    def __repr__(self):
+        return f"Path({self.text!r})"
+
+class Size(Node):
+    """File size within [low, high] bytes (files only)"""
+    __slots__ = ('low', 'high')
+    cost = 5
+    needs_stat = True
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def __repr__(self):
+        return f"Size({self.low}, {self.high})"
+
+class Modified(Node):
+    """Modification time within [low, high] (Unix timestamps)"""
+    __slots__ = ('low', 'high')
+    cost = 5
+    needs_stat = True
+
+    def __init__(self, low: float, high: float):
+        self.low = low
+        self.high = high
+
+    def __repr__(self):
+        return f"Modified({self.low}, {self.high})"
+
+# --- Parsing ---------------------------------------------------------------------------
+
+def _tokenize(query: str) -> List[str]:
+    tokens = []
+    position = 0
+    query = query.strip()
+    while position < len(query):
+        match = _TOKEN.match(query, position)
+        if match is None or match.end() == position:
+            raise QuerySyntaxError(f"Unexpected input at position {position}: {query[position:]!r}")
+        tokens.append(match.group('paren') or match.group('term'))
+        position = match.end()
+        while position < len(query) and query[position].isspace():
+            position += 1
+    return tokens
+
+def _unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1]
+    return value
+
+def _parse_size(value: str) -> Tuple[float, float]:
+    """Parse '>10MB', '<=1k', '=512', '1MB..10MB' into an inclusive byte range"""
+    def amount(text: str) -> float:
+        match = _SIZE_VALUE.match(text.strip().lower())
+        if match is None or match.group(2) not in _SIZE_UNITS:
+            raise QuerySyntaxError(f"Invalid size: {text!r}")
+        return float(match.group(1)) * _SIZE_UNITS[match.group(2)]
+
+    if '..' in value:
+        low, _, high = value.partition('..')
+        return (amount(low) if low else 0, amount(high) if high else float('inf'))
+    for operator in ('>=', '<=', '>', '<', '='):
+        if value.startswith(operator):
+            number = amount(value[len(operator):])
+            return {
+                '>=': (number, float('inf')),
+                '<=': (0, number),
+                '>': (number + 1, float('inf')),
+                '<': (0, number - 1),
+                '=': (number, number),
+            }[operator]
+    number = amount(value)
+    return number, number
+
+def _parse_time(text: str, now: float, upper: bool) -> float:
+    """
+    A point in time: an age such as '7d' (counted back from now) or a date 'YYYY-MM-DD'
+    (its start, or its end when `upper`)
+    """
+    text = text.strip().lower()
+    match = _AGE_VALUE.match(text)
+    if match is not None and match.group(2) in _AGE_UNITS:
+        return now - float(match.group(1)) * _AGE_UNITS[match.group(2)]
+    try:
+        day = datetime.strptime(text, '%Y-%m-%d')
+    except ValueError:
+        raise QuerySyntaxError(f"Invalid time: {text!r}")
+    if upper:
+        day += timedelta(days=1) - timedelta(microseconds=1)
+    return day.timestamp()
+
+def _parse_modified(value: str, now: float) -> Tuple[float, float]:
+    """
+    Parse a modification-time filter. Ages read as "modified within": '<7d' is the last
+    seven days, '>30d' is older than thirty days. Dates read as points in time:
+    '>2024-01-01' is after that day, '2024-01-01' is that day, 'A..B' is a range.
+    """
+    if '..' in value:
+        low, _, high = value.partition('..')
+        return (_parse_time(low, now, False) if low else 0,
+                _parse_time(high, now, True) if high else float('inf'))
+    is_age = _AGE_VALUE.match(value.lstrip('<>=').strip().lower()) is not None
+    for operator in ('>=', '<=', '>', '<'):
+        if value.startswith(operator):
+            rest = value[len(operator):]
+            if is_age:
+                # Comparisons are on age: '<7d' means younger than seven days
+                point = _parse_time(rest, now, False)
+                return (point, float('inf')) if operator in ('<', '<=') else (0, point)
+            if operator in ('>', '>='):
+                return _parse_time(rest, now, operator == '>'), float('inf')
+            return 0, _parse_time(rest, now, operator == '<=')
+    if is_age:
+        return _parse_time(value, now, False), float('inf')
+    return _parse_time(value, now, False), _parse_time(value, now, True)
+
+def _field_node(field: str, value: str, now: float) -> Node:
+    value = _unquote(value)
+    if not value:
+        raise QuerySyntaxError(f"Missing value for {field}:")
+    if field == 'name':
+        return Name(value)
+    if field == 'ext':
+        return Ext(frozenset(ext.strip().lstrip('.').lower() for ext in value.split(',') if ext.strip()))
+    if field == 'size':
+        return Size(*_parse_size(value))
+    if field == 'modified':
+        return Modified(*_parse_modified(value, now))
+    if field == 'path':
+        return PathContains(value)
+    if field == 'type':
+        if value.lower() in ('dir', 'directory', 'folder'):
+            return Type(True)
+        if value.lower() == 'file':
+            return Type(False)
+        raise QuerySyntaxError(f"Invalid type: {value!r} (use file or dir)")
+    raise QuerySyntaxError(f"Unknown field: {field}")
+
+class _Parser:
+    """
+    Recursive-descent parser:
+        query   := or_expr
+        or_expr := and_expr ('OR' and_expr)*
+        and_expr:= unary+               (juxtaposition, or explicit AND)
+        unary   := '-' atom | atom
+        atom    := '(' or_expr ')' | field ':' value | term
+    """
+    def __init__(self, tokens: List[str], now: float):
+        self.tokens = tokens
+        self.position = 0
+        self.now = now
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.position]
+        self.position += 1
+        return token
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise QuerySyntaxError("Empty query")
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected {self.peek()!r}")
+        return node
+
+    def or_expr(self) -> Node:
+        children = [self.and_expr()]
+        while self.peek() == 'OR':
+            self.take()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def and_expr(self) -> Node:
+        children = []
+        while True:
+            token = self.peek()
+            if token is None or token in (')', 'OR'):
+                break
+            if token == 'AND':
+                self.take()
+                continue
+            children.append(self.unary())
+        if not children:
+            raise QuerySyntaxError("Expected a search term")
+        return children[0] if len(children) == 1 else And(children)
+
+    def unary(self) -> Node:
+        token = self.peek()
+        if token.startswith('-') and len(token) > 1:
+            self.tokens[self.position] = token[1:]
+            return Not(self.atom())
+        if token == '-':
+            self.take()
+            if self.peek() is None:
+                raise QuerySyntaxError("Expected a term after '-'")
+            return Not(self.atom())
+        return self.atom()
+
+    def atom(self) -> Node:
+        token = self.take()
+        if token == '(':
+            node = self.or_expr()
+            if self.peek() != ')':
+                raise QuerySyntaxError("Missing ')'")
+            self.take()
+            return node
+        if token == ')':
+            raise QuerySyntaxError("Unexpected ')'")
+        field, colon, value = token.partition(':')
+        if colon and field.lower() in FIELDS:
+            return _field_node(field.lower(), value, self.now)
+        return Name(_unquote(token))
+
+def parse_query(query: str, now: Optional[float] = None) -> Node:
+    """
+    Parse a structured query, e.g.
+    'report ext:pdf,docx size:>10MB modified:<7d -path:archive OR invoice'
+
+    Args:
+        query: Query text
+        now: Reference time for relative ages (defaults to the current time)
+
+    Returns:
+        Root AST node
+
+    Raises:
+        QuerySyntaxError: If the query is malformed
+    """
+    return _Parser(_tokenize(query), time.time() if now is None else now).parse()
+
+# --- Planning --------------------------------------------------------------------------
+
+def _cost(node: Node) -> float:
+    if isinstance(node, (And, Or)):
+        return sum(_cost(child) for child in node.children)
+    if isinstance(node, Not):
+        return _cost(node.child)
+    return node.cost
+
+def _compile(node: Node) -> Callable[[Entry], bool]:
+    """Compile a node into a short-circuiting predicate; cheap children are tested first"""
+    if isinstance(node, And):
+        predicates = [_compile(child) for child in sorted(node.children, key=_cost)]
+        return lambda entry: all(predicate(entry) for predicate in predicates)
+    if isinstance(node, Or):
+        predicates = [_compile(child) for child in sorted(node.children, key=_cost)]
+        return lambda entry: any(predicate(entry) for predicate in predicates)
+    if isinstance(node, Not):
+        predicate = _compile(node.child)
+        return lambda entry: not predicate(entry)
+    if isinstance(node, Name):
+        match = node.pattern.match
+        return lambda entry: match(entry[1])
+    if isinstance(node, Ext):
+        extensions = node.extensions
+        return lambda entry: not entry[2] and file_extension(entry[1]) in extensions
+    if isinstance(node, Type):
+        is_directory = node.is_directory
+        return lambda entry: entry[2] == is_directory
+    if isinstance(node, PathContains):
+        text = node.text
+        return lambda entry: text in (entry[0] + '/' + entry[1]).casefold()
+    if isinstance(node, Size):
+        low, high = node.low, node.high
+        return lambda entry: not entry[2] and low <= entry[3] <= high
+    if isinstance(node, Modified):
+        low, high = node.low, node.high
+        return lambda entry: low <= entry[4] <= high
+    raise TypeError(f"Unknown node {node!r}")
+
+def _compile_name_filter(node: Node) -> Callable[[str], Optional[bool]]:
+    """
+    Three-valued name-only predicate used before an entry is stat()ed: True or False when the
+    name decides the outcome, None when it depends on other attributes
+    """
+    if isinstance(node, And):
+        predicates = [_compile_name_filter(child) for child in sorted(node.children, key=_cost)]
+
+        def conjunction(name):
+            result = True
+            for predicate in predicates:
+                value = predicate(name)
+                if value is False:
+                    return False
+                if value is None:
+                    result = None
+            return result
+        return conjunction
+    if isinstance(node, Or):
+        predicates = [_compile_name_filter(child) for child in sorted(node.children, key=_cost)]
+
+        def disjunction(name):
+            result = False
+            for predicate in predicates:
+                value = predicate(name)
+                if value is True:
+                    return True
+                if value is None:
+                    result = None
+            return result
+        return disjunction
+    if isinstance(node, Not):
+        predicate = _compile_name_filter(node.child)
+
+        def negation(name):
+            value = predicate(name)
+            return None if value is None else not value
+        return negation
+    if isinstance(node, Name):
+        match = node.pattern.match
+        return lambda name: bool(match(name))
+    if isinstance(node, Ext):
+        # A matching extension still needs the entry to be a file
+        extensions = node.extensions
+        return lambda name: None if file_extension(name) in extensions else False
+    return lambda name: None
+
+class IndexProbe:
+    """
+    The part of one disjunct that index structures can answer: a name pattern, an extension
+    set, and time/size ranges. Candidates from a probe are a superset of the disjunct's
+    matches; the full predicate is applied to them afterwards.
+    """
+    __slots__ = ('pattern', 'file_types', 'timestamp_range', 'size_range')
+
+    def __init__(self, pattern: NamePattern, file_types: Optional[List[str]],
+                 timestamp_range: Optional[tuple], size_range: Optional[tuple]):
+        self.pattern = pattern
+        self.file_types = file_types
+        self.timestamp_range = timestamp_range
+        self.size_range = size_range
+
+    def __repr__(self):
+        return (f"IndexProbe({self.pattern.query!r}, {self.file_types}, {self.timestamp_range}, "
+                f"{self.size_range})")
+
+def _conjuncts(node: Node) -> List[Node]:
+    return list(node.children) if isinstance(node, And) else [node]
+
+def _probe(node: Node) -> IndexProbe:
+    """Collect the pushable predicates of a conjunction"""
+    children = _conjuncts(node)
+    patterns = [child.pattern for child in children if isinstance(child, Name)]
+    extensions = None
+    timestamp_range = None
+    size_range = None
+    for child in children:
+        if isinstance(child, Ext):
+            extensions = child.extensions if extensions is None else extensions & child.extensions
+        elif isinstance(child, Modified):
+            low, high = timestamp_range or (0, float('inf'))
+            timestamp_range = (max(low, child.low), min(high, child.high))
+        elif isinstance(child, Size):
+            low, high = size_range or (0, float('inf'))
+            size_range = (max(low, child.low), min(high, child.high))
+
+    # Literal patterns can use name postings; prefer them over regex-backed ones
+    pattern = min(patterns, key=lambda p: p.kind == MATCH_REGEX) if patterns else plan_name_pattern('')
+    return IndexProbe(pattern, sorted(extensions) if extensions is not None else None,
+                      timestamp_range, size_range)
+
+class QueryPlan:
+    """
+    Execution plan for a structured query:
+    - `name_filter(name)` rejects entries by name alone, before any stat
+    - `predicate(entry)` is the full, short-circuiting predicate
+    - `probes` push each top-level disjunct down to the index (postings and sorted ranges)
+    """
+    def __init__(self, query: str, root: Node):
+        self.query = query
+        self.root = root
+        self.predicate = _compile(root)
+        self.name_filter = _compile_name_filter(root)
+        disjuncts = root.children if isinstance(root, Or) else [root]
+        self.probes = [_probe(disjunct) for disjunct in disjuncts]
+
+    def with_filters(self, file_types: Optional[List[str]] = None, timestamp_range: Optional[tuple] = None,
+                     size_range: Optional[tuple] = None) -> 'QueryPlan':
+        """
+        Plan for this query ANDed with request-level filters (the separate JSON fields)
+
+        Returns:
+            A new plan, or this plan when no filters are given
+        """
+        filters = []
+        if file_types:
+            filters.append(Ext(frozenset(ext.lower() for ext in file_types)))
+        if timestamp_range:
+            filters.append(Modified(*timestamp_range))
+        if size_range:
+            filters.append(Size(*size_range))
+        if not filters:
+            return self
+        if isinstance(self.root, Or):
+            # Distribute the filters over the disjunction so each branch can push them down
+            root = Or([And(_conjuncts(child) + filters) for child in self.root.children])
+        else:
+            root = And(_conjuncts(self.root) + filters)
+        return QueryPlan(self.query, root)
+
+    def matches_name(self, name: str) -> bool:
+        """Whether an entry with this name can match at all"""
+        return self.name_filter(name) is not False
+
+    def __repr__(self):
+        return f"QueryPlan({self.root!r}, probes={self.probes})"
+
+@lru_cache(maxsize=256)
+def _plan_cached(query: str, minute: int) -> QueryPlan:
+    return QueryPlan(query, parse_query(query))
+
+def plan_query(query: str) -> QueryPlan:
+    """
+    Parse and plan a structured query. Plans are cached; relative ages are re-evaluated
+    at most once a minute.
+
+    Raises:
+        QuerySyntaxError: If the query is malformed
+    """
+    return _plan_cached(query, int(time.time() // 60))
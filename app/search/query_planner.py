@@ -0,0 +1,160 @@
+# fastique/app/search/query_planner.py
+# Classifies name patterns so the cheapest matching strategy is used per entry
+
+import re
+import fnmatch
+from functools import lru_cache
+from typing import Callable, Optional
+
+# Pattern classes, cheapest first
+MATCH_ALL = 'all'
+MATCH_EXACT = 'exact'
+MATCH_PREFIX = 'prefix'
+MATCH_SUFFIX = 'suffix'
+MATCH_PREFIX_SUFFIX = 'prefix_suffix'
+MATCH_SUBSTRING = 'substring'
+MATCH_REGEX = 'regex'
+
+_GLOB_SPECIAL = re.compile(r'[?\[\]]')
+
+class NamePattern:
+    """
+    A compiled name pattern. `match(name)` is a specialised callable for the pattern class,
+    and `match_folded(folded_name)` accepts a name that was already casefolded (as stored in
+    the index) so case-insensitive literal patterns never fold the same name twice.
+    """
+    __slots__ = ('query', 'use_regex', 'case_sensitive', 'kind', 'literal', 'prefix', 'suffix',
+                 'regex', 'extension', 'match', 'match_folded')
+
+    def __init__(self, query: str, use_regex: bool, case_sensitive: bool, kind: str,
+                 literal: str = '', prefix: str = '', suffix: str = '',
+                 regex: Optional[re.Pattern] = None):
+        self.query = query
+        self.use_regex = use_regex
+        self.case_sensitive = case_sensitive
+        self.kind = kind
+        self.literal = literal
+        self.prefix = prefix
+        self.suffix = suffix
+        self.regex = regex
+        self.extension = self._extension()
+        self.match_folded = self._build_matcher(folded=True)
+        self.match = self._build_matcher(folded=False)
+
+    def _extension(self) -> Optional[str]:
+        """The file extension this pattern selects, e.g. 'txt' for '*.txt'"""
+        if self.kind != MATCH_SUFFIX or not self.suffix.startswith('.'):
+            return None
+        ext = self.suffix[1:]
+        if not ext or '.' in ext:
+            return None
+        return ext.lower()
+
+    def _build_matcher(self, folded: bool) -> Callable[[str], bool]:
+        """Build the per-entry matching callable"""
+        kind = self.kind
+        if kind == MATCH_ALL:
+            return lambda name: True
+        if kind == MATCH_REGEX:
+            search = self.regex.search
+            return lambda name: search(name) is not None
+
+        literal, prefix, suffix = self.literal, self.prefix, self.suffix
+        if self.case_sensitive or folded:
+            if not self.case_sensitive:
+                literal, prefix, suffix = literal.casefold(), prefix.casefold(), suffix.casefold()
+            if kind == MATCH_EXACT:
+                return literal.__eq__
+            if kind == MATCH_PREFIX:
+                return lambda name: name.startswith(prefix)
+            if kind == MATCH_SUFFIX:
+                return lambda name: name.endswith(suffix)
+            if kind == MATCH_SUBSTRING:
+                return lambda name: literal in name
+            min_length = len(prefix) + len(suffix)
+            return lambda name: (len(name) >= min_length and name.startswith(prefix)
+                                 and name.endswith(suffix))
+
+        # Case-insensitive on raw names: fold each name once, inline
+        literal, prefix, suffix = literal.casefold(), prefix.casefold(), suffix.casefold()
+        if kind == MATCH_EXACT:
+            return lambda name: name.casefold() == literal
+        if kind == MATCH_PREFIX:
+            return lambda name: name.casefold().startswith(prefix)
+        if kind == MATCH_SUFFIX:
+            return lambda name: name.casefold().endswith(suffix)
+        if kind == MATCH_SUBSTRING:
+            return lambda name: literal in name.casefold()
+        min_length = len(prefix) + len(suffix)
+
+        def match_prefix_suffix(name: str) -> bool:
+            name = name.casefold()
+            return len(name) >= min_length and name.startswith(prefix) and name.endswith(suffix)
+        return match_prefix_suffix
+
+    @property
+    def is_literal(self) -> bool:
+        """Whether the pattern is matched without a regex"""
+        return self.kind != MATCH_REGEX
+
+def _classify_glob(query: str):
+    """
+    Classify a glob pattern
+
+    Returns:
+        Tuple of (kind, literal, prefix, suffix)
+    """
+    if not query or query.strip('*') == '':
+        return MATCH_ALL, '', '', ''
+    if _GLOB_SPECIAL.search(query):
+        return MATCH_REGEX, '', '', ''
+
+    segments = query.split('*')
+    if len(segments) == 1:
+        return MATCH_EXACT, query, '', ''
+    if len(segments) == 2:
+        head, tail = segments
+        if not head:
+            return MATCH_SUFFIX, '', '', tail
+        if not tail:
+            return MATCH_PREFIX, '', head, ''
+        return MATCH_PREFIX_SUFFIX, '', head, tail
+    if len(segments) == 3 and not segments[0] and not segments[2]:
+        return MATCH_SUBSTRING, segments[1], '', ''
+    return MATCH_REGEX, '', '', ''
+
+@lru_cache(maxsize=512)
+def plan_name_pattern(query: str, use_regex: bool = False, case_sensitive: bool = False) -> NamePattern:
+    """
+    Compile a name pattern, choosing the cheapest strategy that gives the same answer.
+    Results are cached across requests.
+
+    Globs match the whole name (fnmatch semantics); regexes match anywhere in the name.
+    An empty glob matches everything.
+
+    Args:
+        query: Glob or regex pattern
+        use_regex: Whether the query is a regex
+        case_sensitive: Whether matching is case-sensitive
+
+    Returns:
+        Compiled NamePattern
+
+    Raises:
+        re.error: If the pattern is not a valid regex
+    """
+    flags = 0 if case_sensitive else re.IGNORECASE
+
+    if use_regex:
+        if query == '':
+            return NamePattern(query, use_regex, case_sensitive, MATCH_ALL)
+        if re.escape(query) == query:
+            # No metacharacters: a plain substring search
+            return NamePattern(query, use_regex, case_sensitive, MATCH_SUBSTRING, literal=query)
+        return NamePattern(query, use_regex, case_sensitive, MATCH_REGEX, regex=re.compile(query, flags))
+
+    kind, literal, prefix, suffix = _classify_glob(query)
+    regex = None
+    if kind == MATCH_REGEX:
+        regex = re.compile(r'\A' + fnmatch.translate(query), flags)
+    return NamePattern(query, use_regex, case_sensitive, kind, literal, prefix, suffix, regex)
\ No newline at end of file
@@ -0,0 +1,219 @@
+# fastique/app/search/results.py
+# Search result records: slotted single results and a columnar batch with lazy, bulk formatting
+
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# CSS icon class per (lowercase) file extension
+ICON_MAP = {
+    "pdf": "pdf-icon",
+    "doc": "word-icon", "docx": "word-icon",
+    "xls": "excel-icon", "xlsx": "excel-icon",
+    "ppt": "powerpoint-icon", "pptx": "powerpoint-icon",
+    "txt": "text-icon",
+    "zip": "archive-icon", "rar": "archive-icon", "tar": "archive-icon", "gz": "archive-icon",
+    "mp3": "audio-icon", "wav": "audio-icon", "flac": "audio-icon",
+    "mp4": "video-icon", "avi": "video-icon", "mkv": "video-icon",
+    "jpg": "image-icon", "jpeg": "image-icon", "png": "image-icon", "gif": "image-icon",
+    "py": "code-icon", "js": "code-icon", "html": "code-icon", "css": "code-icon", "cpp": "code-icon",
+    "java": "code-icon"
+}
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# A result row: (path, filename, size, modified_time, is_directory, score)
+ResultRow = Tuple[str, str, int, float, bool, Optional[float]]
+
+def file_extension(filename: str) -> str:
+    """Lowercase extension without the dot, with os.path.splitext semantics (leading dots don't count)"""
+    dot = filename.rfind('.')
+    if dot <= 0 or not filename[:dot].lstrip('.'):
+        return ''
+    return filename[dot + 1:].lower()
+
+def format_size(size: int, is_directory: bool = False) -> str:
+    """Format a file size in human-readable form"""
+    if is_directory:
+        return "Directory"
+    if size < 1024:
+        return f"{size} B"
+    for unit in _SIZE_UNITS[1:]:
+        size /= 1024
+        if size < 1024 or unit == 'TB':
+            return f"{size:.2f} {unit}"
+
+def format_time(timestamp: float) -> str:
+    """Format a modification time as local 'YYYY-MM-DD HH:MM:SS'"""
+    return time.strftime(TIME_FORMAT, time.localtime(timestamp))
+
+def icon_class(filename: str, is_directory: bool) -> str:
+    """CSS class for a result's icon"""
+    if is_directory:
+        return "folder-icon"
+    return ICON_MAP.get(file_extension(filename), "file-icon")
+
+class SearchResult:
+    """A single search result; derived fields are computed on access"""
+    __slots__ = ('path', 'filename', 'size', 'modified_time', 'is_directory', 'score')
+
+    def __init__(self, path, filename, size, modified_time, is_directory, score=None):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.modified_time = modified_time
+        self.is_directory = is_directory
+        # Relevance score for ranked (fuzzy) searches
+        self.score = score
+
+    @property
+    def full_path(self) -> str:
+        return os.path.join(self.path, self.filename)
+
+    @property
+    def extension(self) -> str:
+        return '' if self.is_directory else file_extension(self.filename)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the result to a dictionary for JSON serialization"""
+        extension = self.extension
+        result = {
+            'path': self.path,
+            'filename': self.filename,
+            'full_path': self.full_path,
+            'size': self.size,
+            'size_formatted': self.format_size(),
+            'modified_time': self.modified_time,
+            'modified_time_formatted': self.format_time(),
+            'is_directory': self.is_directory,
+            'extension': extension,
+            'icon_class': "folder-icon" if self.is_directory else ICON_MAP.get(extension, "file-icon")
+        }
+        if self.score is not None:
+            result['score'] = round(self.score, 3)
+        return result
+
+    def format_size(self) -> str:
+        """Format file size to human-readable format"""
+        return format_size(self.size, self.is_directory)
+
+    def format_time(self) -> str:
+        """Format modified time to readable format"""
+        return format_time(self.modified_time)
+
+    def get_icon_class(self) -> str:
+        """Return CSS class for file type icon"""
+        return icon_class(self.filename, self.is_directory)
+
+class ResultBatch:
+    """
+    Search results stored column by column. Rows are only turned into SearchResult objects
+    or dictionaries on demand, and derived fields are computed once per batch, sharing work
+    between rows (formatted times per distinct second, icon classes per distinct extension).
+    """
+    __slots__ = ('paths', 'filenames', 'sizes', 'modified_times', 'is_directories', 'scores')
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.filenames: List[str] = []
+        self.sizes: List[int] = []
+        self.modified_times: List[float] = []
+        self.is_directories: List[bool] = []
+        self.scores: List[Optional[float]] = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[ResultRow]) -> 'ResultBatch':
+        """Build a batch from (path, filename, size, modified_time, is_directory, score) rows"""
+        batch = cls()
+        rows = list(rows)
+        if rows:
+            (batch.paths, batch.filenames, batch.sizes, batch.modified_times,
+             batch.is_directories, batch.scores) = map(list, zip(*rows))
+        return batch
+
+    def append(self, path: str, filename: str, size: int, modified_time: float,
+               is_directory: bool, score: Optional[float] = None) -> None:
+        self.paths.append(path)
+        self.filenames.append(filename)
+        self.sizes.append(size)
+        self.modified_times.append(modified_time)
+        self.is_directories.append(is_directory)
+        self.scores.append(score)
+
+    def __len__(self) -> int:
+        return len(self.filenames)
+
+    def __getitem__(self, index: int) -> SearchResult:
+        return SearchResult(self.paths[index], self.filenames[index], self.sizes[index],
+                            self.modified_times[index], self.is_directories[index], self.scores[index])
+
+    def __iter__(self) -> Iterator[SearchResult]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @property
+    def ranked(self) -> bool:
+        """Whether any row carries a relevance score"""
+        return any(score is not None for score in self.scores)
+
+    def extensions(self) -> List[str]:
+        """Extension column ('' for directories)"""
+        return ['' if is_dir else file_extension(name)
+                for name, is_dir in zip(self.filenames, self.is_directories)]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Convert every row to the SearchResult.to_dict() format"""
+        times: Dict[int, str] = {}
+        join = os.path.join
+        results = []
+        for path, name, size, mtime, is_dir, score, extension in zip(
+                self.paths, self.filenames, self.sizes, self.modified_times,
+                self.is_directories, self.scores, self.extensions()):
+            second = int(mtime)
+            formatted_time = times.get(second)
+            if formatted_time is None:
+                formatted_time = times[second] = format_time(mtime)
+            result = {
+                'path': path,
+                'filename': name,
+                'full_path': join(path, name),
+                'size': size,
+                'size_formatted': format_size(size, is_dir),
+                'modified_time': mtime,
+                'modified_time_formatted': formatted_time,
+                'is_directory': is_dir,
+                'extension': extension,
+                'icon_class': "folder-icon" if is_dir else ICON_MAP.get(extension, "file-icon")
+            }
+            if score is not None:
+                result['score'] = round(score, 3)
+            results.append(result)
+        return results
+
+    def compact(self) -> Dict[str, Any]:
+        """
+        Columns of raw values with a shared directory table; formatting is left to the client
+
+        Returns:
+            Dictionary with 'columns', 'directories' and 'rows'; a 'score' column is added
+            for ranked searches
+        """
+        directories: List[str] = []
+        directory_ids: Dict[str, int] = {}
+        for path in self.paths:
+            if path not in directory_ids:
+                directory_ids[path] = len(directories)
+                directories.append(path)
+
+        columns = [[directory_ids[path] for path in self.paths], self.filenames, self.sizes,
+                   self.modified_times, [1 if is_dir else 0 for is_dir in self.is_directories]]
+        names = ['dir', 'name', 'size', 'mtime', 'is_dir']
+        if self.ranked:
+            columns.append([None if score is None else round(score, 3) for score in self.scores])
+            names.append('score')
+        return {
+            'columns': names,
+            'directories': directories,
+            'rows': [list(row) for row in zip(*columns)]
+        }
@@ -2,91 +2,51 @@
 # Core search engine functionality
 
 import os
-import re
-import fnmatch
+import logging
 import threading
 import time
-from datetime import datetime
 from pathlib import Path
 from queue import Queue
-from typing import List, Dict, Any, Iterator, Optional
+from typing import List, Dict, Any, Iterator, Optional, Callable
+from app.metrics import (DIRECTORIES_SCANNED, ENTRIES_SCANNED, STAT_CALLS, REGEX_EVALUATIONS,
+                         SCAN_ERRORS, SEARCH_DURATION)
+from app.search.concurrency import AdaptivePool, ConcurrencyManager, default_manager
+from app.search.exclude import ExcludeMatcher
+from app.search.query_planner import NamePattern, plan_name_pattern
+from app.search.traversal import VisitedSet, normalize_roots
+from app.search.fuzzy import get_fuzzy_matcher
+from app.search.query_language import QueryPlan, plan_query
+from app.search.results import SearchResult, ResultBatch
+from app.search.summaries import SubtreeFilter, SummaryStore, SummaryWalk, name_tokens, rules_key
+from app.search.archives import ARCHIVE_EXTENSIONS, ArchiveIndex, default_archive_index, is_archive
 
-class SearchResult:
-    """Class to store search result information"""
-    def __init__(self, path, filename, size, modified_time, is_directory):
-        self.path = path
-        self.filename = filename
-        self.size = size
-        self.modified_time = modified_time
-        self.is_directory = is_directory
-        self.full_path = os.path.join(path, filename)
-        
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert the result to a dictionary for JSON serialization"""
-        return {
-            'path': self.path,
-            'filename': self.filename,
-            'full_path': self.full_path,
-            'size': self.size,
-            'size_formatted': self.format_size(),
-            'modified_time': self.modified_time,
-            'modified_time_formatted': self.format_time(),
-            'is_directory': self.is_directory,
-            'extension': os.path.splitext(self.filename)[1][1:].lower() if not self.is_directory else '',
-            'icon_class': self.get_icon_class()
-        }
-    
-    def format_size(self) -> str:
-        """Format file size to human-readable format"""
-        if self.is_directory:
-            return "Directory"
-        
-        # Convert size to KB, MB, GB as appropriate
-        size = self.size
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size < 1024 or unit == 'TB':
-                if unit == 'B':
-                    return f"{size} {unit}"
-                return f"{size:.2f} {unit}"
-            size /= 1024
-    
-    def format_time(self) -> str:
-        """Format modified time to readable format"""
-        dt = datetime.fromtimestamp(self.modified_time)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
-    
-    def get_icon_class(self) -> str:
-        """Return CSS class for file type icon"""
-        if self.is_directory:
-            return "folder-icon"
-        
-        ext = os.path.splitext(self.filename)[1][1:].lower()
-        
-        # Common file types
-        icon_map = {
-            "pdf": "pdf-icon",
-            "doc": "word-icon", "docx": "word-icon",
-            "xls": "excel-icon", "xlsx": "excel-icon",
-            "ppt": "powerpoint-icon", "pptx": "powerpoint-icon",
-            "txt": "text-icon",
-            "zip": "archive-icon", "rar": "archive-icon", "tar": "archive-icon", "gz": "archive-icon",
-            "mp3": "audio-icon", "wav": "audio-icon", "flac": "audio-icon",
-            "mp4": "video-icon", "avi": "video-icon", "mkv": "video-icon",
-            "jpg": "image-icon", "jpeg": "image-icon", "png": "image-icon", "gif": "image-icon",
-            "py": "code-icon", "js": "code-icon", "html": "code-icon", "css": "code-icon", "cpp": "code-icon",
-            "java": "code-icon"
-        }
-        
-        return icon_map.get(ext, "file-icon")
+# Fuzzy searches collect this many times max_results before ranking
+FUZZY_OVERSCAN = 10
+
+logger = logging.getLogger(__name__)
 
 class SearchEngine:
     """Main search engine for finding files and directories"""
-    def __init__(self, max_results=500, threads=4):
+    def __init__(self, max_results=500, threads=None, stage_timer=None,
+                 exclude_patterns=None, use_ignore_files=False, index=None, concurrency=None,
+                 summaries=None, archives=None):
         self.max_results = max_results
+        # Walker parallelism follows per-device budgets from the concurrency manager;
+        # `threads` optionally caps this search's workers per device
         self.threads = threads
+        self.concurrency: ConcurrencyManager = concurrency or default_manager()
+        # Global exclude rules, combined with per-search rules
+        self.exclude_patterns = list(exclude_patterns or [])
+        self.use_ignore_files = use_ignore_files
+        # Optional SearchIndex used instead of a live walk for covered directories
+        self.index = index
+        # Optional SummaryStore of subtree summaries, used to skip subtrees in live walks
+        self.summaries: Optional[SummaryStore] = summaries
+        # Optional ArchiveIndex for searches inside archives (a process-wide one otherwise)
+        self.archives: Optional[ArchiveIndex] = archives
+        # Optional app.profiling.StageTimer charged with walk/filter/stat/materialize time
+        self.stage_timer = stage_timer
         self.results_queue = Queue()
-        self.active_threads = 0
-        self.search_complete = threading.Event()
     
     def search(self, 
                query: str, 
@@ -97,7 +57,42 @@ class SearchEngine:
                use_regex: bool = False,
                case_sensitive: bool = False,
                include_hidden: bool = False,
-               max_depth: Optional[int] = None) -> List[Dict[str, Any]]:
+               max_depth: Optional[int] = None,
+               exclude: Optional[List[str]] = None,
+               same_filesystem: bool = False,
+               match_mode: str = 'glob',
+               search_archives: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search for files and directories matching the query
+        
+        Takes the same arguments as search_results()
+            
+        Returns:
+            List of matching files and directories as dictionaries
+        """
+        results = self.search_results(query, paths, file_types, date_range, size_range, use_regex,
+                                      case_sensitive, include_hidden, max_depth, exclude,
+                                      same_filesystem, match_mode, search_archives)
+        convert_start = time.perf_counter()
+        results = results.to_dicts()
+        if self.stage_timer is not None:
+            self.stage_timer.add('materialize', time.perf_counter() - convert_start)
+        return results
+    
+    def search_results(self,
+                       query: str,
+                       paths: List[str],
+                       file_types: Optional[List[str]] = None,
+                       date_range: Optional[tuple] = None,
+                       size_range: Optional[tuple] = None,
+                       use_regex: bool = False,
+                       case_sensitive: bool = False,
+                       include_hidden: bool = False,
+                       max_depth: Optional[int] = None,
+                       exclude: Optional[List[str]] = None,
+                       same_filesystem: bool = False,
+                       match_mode: str = 'glob',
+                       search_archives: bool = False) -> ResultBatch:
         """
         Search for files and directories matching the query
         
@@ -111,20 +106,34 @@ class SearchEngine:
             case_sensitive: Whether to perform case-sensitive search
             include_hidden: Whether to include hidden files/folders
             max_depth: Maximum directory depth to search
+            exclude: Additional gitignore-style patterns to exclude for this search
+            same_filesystem: Whether to stay on each root's filesystem (don't cross mount points)
+            match_mode: 'glob' (default; or regex with use_regex), 'fuzzy' for ranked
+                        typo-tolerant subsequence matching, or 'structured' for the query
+                        language in app.search.query_language
+            search_archives: Whether to also match the members of zip and tar archives, returned
+                             under virtual paths such as /backups/site.zip/docs/index.html
             
         Returns:
-            List of matching files and directories as dictionaries
+            Matching files and directories as a columnar ResultBatch
+            
+        Raises:
+            QuerySyntaxError: If a structured query is malformed
         """
-        # Prepare the query
-        if not use_regex:
-            # Escape special characters and convert wildcard pattern to regex
-            query = fnmatch.translate(query)
-        
-        if not case_sensitive:
-            pattern = re.compile(query, re.IGNORECASE)
+        # Prepare the query: pick the cheapest matching strategy (cached across searches)
+        fuzzy = match_mode == 'fuzzy'
+        query_plan = None
+        name_pattern = None
+        if fuzzy:
+            fuzzy_matcher = get_fuzzy_matcher(query)
+        elif match_mode == 'structured':
+            query_plan = plan_query(query)
         else:
-            pattern = re.compile(query)
-            
+            name_pattern = plan_name_pattern(query, use_regex, case_sensitive)
+        
+        # Ranked searches collect extra candidates before keeping the best max_results
+        self._result_cap = self.max_results * FUZZY_OVERSCAN if fuzzy else self.max_results
+        
         # Convert date range to timestamps if provided
         timestamp_range = None
         if date_range:
@@ -134,111 +143,388 @@ class SearchEngine:
                 end_date.timestamp() if end_date else float('inf')
             )
         
-        # Process search with multiple threads
+        # Structured queries take the separate filters into their plan
+        if query_plan is not None:
+            query_plan = query_plan.with_filters(file_types, timestamp_range, size_range)
+            file_types = timestamp_range = size_range = None
+        
+        # Compile global and per-search exclude rules into one matcher
+        exclude_matcher = ExcludeMatcher.from_patterns(
+            self.exclude_patterns + list(exclude or []), self.use_ignore_files)
+        if not exclude_matcher.active:
+            exclude_matcher = None
+        
+        # Resolve per-entry operations once, wrapped with stage timers when profiling
+        if fuzzy:
+            match = lambda name: fuzzy_matcher.score(name.casefold())
+        elif query_plan is not None:
+            # Reject by name before the stat; the full predicate runs on stat()ed entries
+            match = query_plan.matches_name
+        else:
+            match = name_pattern.match
+        self._accept = query_plan.predicate if query_plan is not None else None
+        self._stat_entry = os.DirEntry.stat
+        if self.stage_timer is not None:
+            match = self.stage_timer.timed('filter', match)
+            self._stat_entry = self.stage_timer.timed('stat', self._stat_entry)
+        
+        # Subtree summaries: skip subdirectories that cannot hold a match, and rebuild
+        # summaries for what the walk reads. Summaries are kept per exclude rule set; ignore
+        # files can change without changing a directory's mtime, so they turn summaries off.
+        self._summary_walk = None
+        if self.summaries is not None and (exclude_matcher is None or not exclude_matcher.ignore_filenames):
+            if fuzzy or search_archives:
+                # Archive members are not in the summaries
+                subtree_filter = None
+            elif query_plan is not None:
+                subtree_filter = SubtreeFilter.for_plan(query_plan)
+            else:
+                subtree_filter = SubtreeFilter.for_pattern(name_pattern, file_types)
+            self._summary_walk = SummaryWalk(self.summaries, subtree_filter, include_hidden,
+                                             rules_key(self.exclude_patterns + list(exclude or [])))
+        
+        # Collapse duplicate and nested roots so no subtree is walked twice
+        roots = normalize_roots(paths, include_hidden, max_depth, exclude_matcher)
+        
+        # Directories already walked, by (st_dev, st_ino); stops symlink and bind-mount loops
+        self._visited = VisitedSet()
+        
+        # Per-search walk settings read by _scan_directory
+        self._match = match
+        self._filters = (file_types, timestamp_range, size_range)
+        self._include_hidden = include_hidden
+        self._max_depth = max_depth
+        
+        # Archives found by the walk are listed (or looked up in the member cache) in a pool
+        self._archive_index = None
+        self._archive_futures = []
+        self._archive_lock = threading.Lock()
+        if search_archives:
+            self._archive_index = self.archives or default_archive_index()
+        
+        # Walk directories on per-device worker pools sized by the concurrency manager
+        search_start = time.perf_counter()
         self.results = []
-        self.search_complete.clear()
-        self.active_threads = 0
-        
-        # Create and start search threads
-        for path in paths:
-            if os.path.exists(path):
-                self.active_threads += 1
-                threading.Thread(
-                    target=self._search_worker,
-                    args=(path, pattern, file_types, timestamp_range, size_range, include_hidden, max_depth, 0),
-                    daemon=True
-                ).start()
-        
-        # Wait for all threads to complete or max results reached
-        if self.active_threads > 0:
-            self.search_complete.wait()
+        # Workers are short-lived: they close the summary connections they open as they exit
+        self._pool = AdaptivePool(self.concurrency, self._scan_directory, thread_name='fastique-search',
+                                  max_workers=self.threads,
+                                  finalizer=self.summaries.close_connection if self._summary_walk is not None else None)
+        
+        for path in roots:
+            # Serve from the index when one covers this path
+            if not include_hidden and not exclude and not same_filesystem and self._search_index(
+                    path, name_pattern, file_types, timestamp_range, size_range, max_depth,
+                    query if fuzzy else None, query_plan):
+                if self._archive_index is not None:
+                    self._search_indexed_archives(path, max_depth)
+                continue
+            
+            try:
+                root_stats = os.stat(path)
+            except OSError as e:
+                SCAN_ERRORS.inc(source='search')
+                logger.warning("Error accessing %s: %s", path, e)
+                continue
+            if not self._visited.visit(root_stats):
+                continue
+            
+            self._pool.submit(root_stats.st_dev, path, (
+                path, 0, exclude_matcher, root_stats.st_dev if same_filesystem else None,
+                root_stats.st_mtime_ns))
+        
+        # Wait for the walk to finish or the result cap to stop it
+        self._pool.wait()
+        if self._summary_walk is not None:
+            self._summary_walk.finish()
+        self._wait_for_archives()
             
         # Get all results from the queue
-        results = []
-        while not self.results_queue.empty() and len(results) < self.max_results:
-            results.append(self.results_queue.get().to_dict())
+        materialize_start = time.perf_counter()
+        rows = []
+        if fuzzy:
+            while not self.results_queue.empty():
+                rows.append(self.results_queue.get())
+            rows.sort(key=lambda row: row[5], reverse=True)
+            del rows[self.max_results:]
+        while not self.results_queue.empty() and len(rows) < self.max_results:
+            rows.append(self.results_queue.get())
+        results = ResultBatch.from_rows(rows)
+        if self.stage_timer is not None:
+            self.stage_timer.add('materialize', time.perf_counter() - materialize_start)
         
+        SEARCH_DURATION.observe(time.perf_counter() - search_start)
         return results
     
-    def _search_worker(self, 
-                      directory: str, 
-                      pattern: re.Pattern, 
+    def _search_index(self,
+                      path: str,
+                      name_pattern: NamePattern,
                       file_types: Optional[List[str]],
                       timestamp_range: Optional[tuple],
                       size_range: Optional[tuple],
-                      include_hidden: bool,
                       max_depth: Optional[int],
-                      current_depth: int):
-        """Worker thread for searching a directory"""
+                      fuzzy_query: Optional[str] = None,
+                      query_plan: Optional[QueryPlan] = None) -> bool:
+        """
+        Answer the search for one path from the index
+        
+        A structured query probes the index once per top-level OR branch, with that branch's
+        name pattern, extensions and ranges pushed down to postings and sorted columns, then
+        applies the full predicate to the candidates.
+        
+        Returns:
+            True if the index covered the path, False if a live walk is needed
+        """
+        if self.index is None:
+            return False
+        
+        if query_plan is not None:
+            ranked = self._search_index_plan(path, query_plan, max_depth)
+        elif fuzzy_query is not None:
+            ranked = self.index.fuzzy_query(path, fuzzy_query, file_types, timestamp_range, size_range,
+                                            max_depth, limit=self.max_results)
+        else:
+            entries = self.index.query(path, name_pattern, file_types, timestamp_range, size_range,
+                                       max_depth, limit=self.max_results)
+            ranked = None if entries is None else [(None, entry) for entry in entries]
+        if ranked is None:
+            return False
+        
+        for score, entry in ranked:
+            if self.results_queue.qsize() >= self._result_cap:
+                break
+            self.results_queue.put((entry['path'], entry['name'], entry['size'], entry['modified'],
+                                    entry['is_directory'], score))
+        return True
+    
+    def _search_index_plan(self, path: str, query_plan: QueryPlan,
+                           max_depth: Optional[int]) -> Optional[List[tuple]]:
+        """Run a structured query's index probes, returning (None, entry) pairs or None if uncovered"""
+        predicate = query_plan.predicate
+        seen = set()
+        ranked = []
+        for probe in query_plan.probes:
+            entries = self.index.query(path, probe.pattern, probe.file_types, probe.timestamp_range,
+                                       probe.size_range, max_depth)
+            if entries is None:
+                return None
+            for entry in entries:
+                key = (entry['path'], entry['name'])
+                if key in seen:
+                    continue
+                seen.add(key)
+                if predicate((entry['path'], entry['name'], entry['is_directory'],
+                              entry['size'], entry['modified'])):
+                    ranked.append((None, entry))
+                    if len(ranked) >= self._result_cap:
+                        return ranked
+        return ranked
+    
+    def _scan_directory(self, task: tuple) -> tuple:
+        """
+        Scan one directory of a live walk (run by the pool's workers)
+        
+        Args:
+            task: (directory, depth, exclude matcher, device to stay on or None,
+                   directory mtime_ns as stat()ed before the scan)
+            
+        Returns:
+            (subdirectory tasks as (st_dev, path, task), entries examined)
+        """
+        directory, current_depth, exclude, device, mtime_ns = task
+        match = self._match
+        file_types, timestamp_range, size_range = self._filters
+        max_depth = self._max_depth
+        children = []
+        entries = 0
+        evaluations = 0
+        stats_taken = 0
+        # Names and subdirectories read, for the directory's subtree summary
+        summary_walk = self._summary_walk
+        tokens = set()
+        subdirs = []
+        complete = True
         try:
             # Check if we've reached max depth
             if max_depth is not None and current_depth > max_depth:
-                self._thread_complete()
-                return
+                return children, 0
                 
+            DIRECTORIES_SCANNED.inc(source='search')
+            
             # Get all items in directory
-            for item in os.scandir(directory):
+            items = os.scandir(directory)
+            if self.stage_timer is not None:
+                items = self.stage_timer.timed_iter('walk', items)
+            
+            if exclude is not None:
+                # List up front so ignore files in this directory apply to its entries
+                items = list(items)
+                exclude = exclude.for_directory(directory, {item.name for item in items})
+            
+            for item in items:
+                entries += 1
+                
                 # Skip hidden files if not including them
-                if not include_hidden and item.name.startswith('.'):
+                if not self._include_hidden and item.name.startswith('.'):
                     continue
                 
-                # Check if item matches search pattern
-                if pattern.search(item.name):
-                    # Check file type filter if applicable
-                    if file_types and not item.is_dir():
-                        ext = os.path.splitext(item.name)[1][1:].lower()
-                        if ext not in file_types:
-                            continue
-                    
+                # Skip excluded entries; excluded directories are never descended into
+                if exclude is not None and exclude.is_excluded(item.name, item.path, item.is_dir()):
+                    continue
+                
+                # Check if item matches search pattern and file type filter
+                # (a file type filter only selects files)
+                is_dir = item.is_dir()
+                if summary_walk is not None:
+                    tokens.update(name_tokens(item.name, is_dir))
+                    if is_dir:
+                        subdirs.append(item.name)
+                evaluations += 1
+                matched = match(item.name)
+                if matched is not None and matched is not False and (not file_types or (
+                        not is_dir and os.path.splitext(item.name)[1][1:].lower() in file_types)):
                     # Get file stats
-                    stats = item.stat()
-                    
-                    # Check date range if applicable
-                    if timestamp_range:
-                        mtime = stats.st_mtime
-                        if mtime < timestamp_range[0] or mtime > timestamp_range[1]:
-                            continue
-                    
-                    # Check size range if applicable (only for files)
-                    if size_range and not item.is_dir():
-                        size = stats.st_size
-                        if size < size_range[0] or size > size_range[1]:
-                            continue
-                    
-                    # Create and add result
-                    result = SearchResult(
-                        path=directory,
-                        filename=item.name,
-                        size=stats.st_size if not item.is_dir() else 0,
-                        modified_time=stats.st_mtime,
-                        is_directory=item.is_dir()
-                    )
+                    stats = self._stat_entry(item)
+                    stats_taken += 1
                     
-                    self.results_queue.put(result)
-                    
-                    # Check if we've reached the maximum results
-                    if self.results_queue.qsize() >= self.max_results:
-                        self._thread_complete()
-                        return
+                    size = stats.st_size if not is_dir else 0
+                    if self._in_ranges(stats, is_dir, timestamp_range, size_range) and (
+                            self._accept is None
+                            or self._accept((directory, item.name, is_dir, size, stats.st_mtime))):
+                        # Add a result row (see app.search.results.ResultRow)
+                        self.results_queue.put((directory, item.name, size, stats.st_mtime,
+                                                is_dir, None if matched is True else matched))
+                        
+                        # Check if we've reached the maximum results
+                        if self.results_queue.qsize() >= self._result_cap:
+                            self._pool.stop()
+                            complete = False
+                            break
+                
+                # Search inside archives when asked to
+                if self._archive_index is not None and not is_dir and is_archive(item.name):
+                    self._submit_archive(item.path, item)
                 
-                # Recursively search subdirectories
-                if item.is_dir():
-                    self.active_threads += 1
-                    threading.Thread(
-                        target=self._search_worker,
-                        args=(item.path, pattern, file_types, timestamp_range, size_range, 
-                              include_hidden, max_depth, current_depth + 1),
-                        daemon=True
-                    ).start()
+                # Queue subdirectories, once per (st_dev, st_ino)
+                if is_dir and (max_depth is None or current_depth < max_depth):
+                    stats = self._descend_stats(item, device)
+                    if stats is not None and (summary_walk is None
+                                              or not summary_walk.prune(item.path, stats)):
+                        children.append((stats.st_dev, item.path,
+                                         (item.path, current_depth + 1, exclude, device,
+                                          stats.st_mtime_ns)))
+            
+            if summary_walk is not None and complete:
+                summary_walk.record(directory, mtime_ns, tokens, subdirs)
                 
         except (PermissionError, FileNotFoundError) as e:
             # Log the error but continue
-            print(f"Error accessing {directory}: {str(e)}")
+            SCAN_ERRORS.inc(source='search')
+            logger.warning("Error accessing %s: %s", directory, e)
+        
+        self._record_scan(entries, evaluations, stats_taken)
+        return children, entries
+    
+    def _submit_archive(self, path: str, item: Optional[os.DirEntry] = None) -> None:
+        """Queue an archive for member matching"""
+        try:
+            stats = self._stat_entry(item) if item is not None else os.stat(path)
+        except OSError:
+            return
+        future = self._archive_index.submit(path, stats, self._match_members)
+        with self._archive_lock:
+            self._archive_futures.append(future)
+    
+    def _search_indexed_archives(self, path: str, max_depth: Optional[int]) -> None:
+        """Queue the archives of an index-covered root"""
+        entries = self.index.query(path, plan_name_pattern(''), ARCHIVE_EXTENSIONS, max_depth=max_depth)
+        for entry in entries or ():
+            if is_archive(entry['name']):
+                self._submit_archive(entry['full_path'])
+    
+    def _wait_for_archives(self) -> None:
+        """Wait for queued archives, including any queued while waiting"""
+        while True:
+            with self._archive_lock:
+                if not self._archive_futures:
+                    return
+                future = self._archive_futures.pop()
+            try:
+                future.result()
+            except Exception:
+                logger.exception("Archive search failed")
+    
+    def _match_members(self, archive: str, members: List[tuple]) -> None:
+        """
+        Match an archive's members like directory entries; results use virtual paths with
+        the archive as a directory
         
-        self._thread_complete()
+        Args:
+            archive: Archive file
+            members: (path inside the archive, size, mtime, is_directory) tuples
+        """
+        match = self._match
+        file_types, timestamp_range, size_range = self._filters
+        accept = self._accept
+        join = os.path.join
+        evaluations = 0
+        for member, size, mtime, is_dir in members:
+            if self.results_queue.qsize() >= self._result_cap:
+                self._pool.stop()
+                break
+            directory, _, name = member.rpartition('/')
+            if not self._include_hidden and name.startswith('.'):
+                continue
+            evaluations += 1
+            matched = match(name)
+            if matched is None or matched is False:
+                continue
+            if file_types and (is_dir or os.path.splitext(name)[1][1:].lower() not in file_types):
+                continue
+            if timestamp_range and (mtime < timestamp_range[0] or mtime > timestamp_range[1]):
+                continue
+            if size_range and not is_dir and (size < size_range[0] or size > size_range[1]):
+                continue
+            virtual_directory = join(archive, *directory.split('/')) if directory else archive
+            if accept is not None and not accept((virtual_directory, name, is_dir, size, mtime)):
+                continue
+            self.results_queue.put((virtual_directory, name, size, mtime, is_dir,
+                                    None if matched is True else matched))
+        ENTRIES_SCANNED.inc(len(members), source='archive')
+        REGEX_EVALUATIONS.inc(evaluations)
+    
+    @staticmethod
+    def _in_ranges(stats: os.stat_result, is_dir: bool,
+                   timestamp_range: Optional[tuple], size_range: Optional[tuple]) -> bool:
+        """Check the date range and (for files) the size range"""
+        if timestamp_range:
+            mtime = stats.st_mtime
+            if mtime < timestamp_range[0] or mtime > timestamp_range[1]:
+                return False
+        if size_range and not is_dir:
+            size = stats.st_size
+            if size < size_range[0] or size > size_range[1]:
+                return False
+        return True
+    
+    def _descend_stats(self, item: os.DirEntry, device: Optional[int]) -> Optional[os.stat_result]:
+        """
+        Check a subdirectory against the visited set and the filesystem boundary
+        
+        Returns:
+            The subdirectory's stats if it should be walked, otherwise None
+        """
+        try:
+            stats = self._stat_entry(item)
+        except OSError:
+            return None
+        STAT_CALLS.inc(source='search')
+        if device is not None and stats.st_dev != device:
+            return None
+        return stats if self._visited.visit(stats) else None
     
-    def _thread_complete(self):
-        """Mark a thread as complete and check if search is finished"""
-        self.active_threads -= 1
-        if self.active_threads <= 0:
-            self.search_complete.set()
\ No newline at end of file
+    @staticmethod
+    def _record_scan(entries: int, evaluations: int, stats_taken: int):
+        """Flush per-directory counters to the metrics registry"""
+        ENTRIES_SCANNED.inc(entries, source='search')
+        REGEX_EVALUATIONS.inc(evaluations)
+        STAT_CALLS.inc(stats_taken, source='search')
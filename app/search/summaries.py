@@ -0,0 +1,465 @@
+# fastique/app/search/summaries.py
+# Persisted per-directory subtree summaries (Bloom filters of name trigrams) that let live walks skip subtrees
+
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from queue import Empty, Queue
+from pathlib import Path
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.metrics import STAT_CALLS, SUBTREES_PRUNED
+from app.search.query_planner import (NamePattern, MATCH_EXACT, MATCH_PREFIX, MATCH_SUFFIX,
+                                      MATCH_PREFIX_SUFFIX, MATCH_SUBSTRING)
+from app.search.results import file_extension
+
+logger = logging.getLogger(__name__)
+
+# Bloom filter geometry: every summary has the same size so subtree filters combine with OR
+BLOOM_BITS = 8192
+BLOOM_HASHES = 3
+# Subtrees with fewer distinct tokens keep them as a set (cheap to merge) and store no filter
+BLOOM_MIN_TOKENS = 128
+# Directories modified this recently are not summarized; coarse mtimes could hide a change
+RACY_NS = 2 * 10 ** 9
+
+# Bumped when the table layout changes; the store is a cache and is simply rebuilt
+SCHEMA_VERSION = 2
+# Most summaries written per transaction by the background writer
+WRITE_BATCH = 512
+
+# Token markers: names are padded so trigrams also encode prefixes and suffixes
+_EDGE = '\0'
+_EXTENSION = '\1'
+
+def name_tokens(name: str, is_directory: bool) -> List[str]:
+    """
+    Tokens a name contributes to its ancestors' summaries: casefolded trigrams of the
+    padded name, plus the extension of a file
+
+    Args:
+        name: Entry name
+        is_directory: Whether the entry is a directory
+
+    Returns:
+        List of tokens
+    """
+    padded = _EDGE + name.casefold() + _EDGE
+    tokens = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    if not is_directory:
+        tokens.append(_EXTENSION + file_extension(name))
+    return tokens
+
+def _trigrams(text: str) -> List[str]:
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+@lru_cache(maxsize=65536)
+def token_mask(token: str) -> int:
+    """Bloom filter bits of one token (stable across processes)"""
+    digest = hashlib.blake2b(token.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    value = int.from_bytes(digest, 'little')
+    mask = 0
+    for _ in range(BLOOM_HASHES):
+        mask |= 1 << (value % BLOOM_BITS)
+        value //= BLOOM_BITS
+    return mask
+
+def bloom_of(tokens: Iterable[str]) -> int:
+    bloom = 0
+    for token in tokens:
+        bloom |= token_mask(token)
+    return bloom
+
+def pattern_tokens(pattern: NamePattern) -> List[str]:
+    """
+    Tokens every name matching a pattern must contain (empty when the pattern has no
+    literal part of three or more characters, such as regexes and match-all)
+    """
+    kind = pattern.kind
+    literal, prefix, suffix = (pattern.literal.casefold(), pattern.prefix.casefold(),
+                               pattern.suffix.casefold())
+    if kind == MATCH_EXACT:
+        return _trigrams(_EDGE + literal + _EDGE)
+    if kind == MATCH_PREFIX:
+        return _trigrams(_EDGE + prefix)
+    if kind == MATCH_SUFFIX:
+        return _trigrams(suffix + _EDGE)
+    if kind == MATCH_PREFIX_SUFFIX:
+        return _trigrams(_EDGE + prefix) + _trigrams(suffix + _EDGE)
+    if kind == MATCH_SUBSTRING:
+        return _trigrams(literal)
+    return []
+
+def rules_key(patterns: Iterable[str]) -> str:
+    """
+    Key of the exclude rules a summary was built under; a summary only rules out names
+    for walks that hide the same entries
+
+    Args:
+        patterns: Global and per-search exclude patterns, in order
+
+    Returns:
+        Short digest ('' without rules)
+    """
+    patterns = list(patterns)
+    if not patterns:
+        return ''
+    return hashlib.blake2b('\n'.join(patterns).encode('utf-8', 'surrogatepass'), digest_size=8).hexdigest()
+
+class SubtreeFilter:
+    """
+    Necessary condition for a subtree to hold a match, checked against its Bloom summary:
+    one alternative per query branch, each a mask of required bits and optionally a set of
+    extension masks of which one must be present
+    """
+    __slots__ = ('alternatives',)
+
+    def __init__(self, alternatives: List[Tuple[int, Optional[List[int]]]]):
+        self.alternatives = alternatives
+
+    @classmethod
+    def for_pattern(cls, pattern: NamePattern,
+                    file_types: Optional[List[str]] = None) -> Optional['SubtreeFilter']:
+        """
+        Filter for a name pattern and optional file type filter
+
+        Returns:
+            The filter, or None when summaries cannot rule anything out for this query
+        """
+        return cls.for_branches([(pattern, file_types)])
+
+    @classmethod
+    def for_plan(cls, query_plan) -> Optional['SubtreeFilter']:
+        """Filter for a structured query, from its per-branch index probes"""
+        return cls.for_branches([(probe.pattern, probe.file_types) for probe in query_plan.probes])
+
+    @classmethod
+    def for_branches(cls, branches) -> Optional['SubtreeFilter']:
+        alternatives = []
+        for pattern, file_types in branches:
+            required = bloom_of(pattern_tokens(pattern))
+            extensions = None
+            if file_types:
+                extensions = [token_mask(_EXTENSION + ext.lstrip('.').lower()) for ext in file_types]
+            if not required and extensions is None:
+                return None
+            alternatives.append((required, extensions))
+        return cls(alternatives) if alternatives else None
+
+    def might_match(self, bloom: int) -> bool:
+        for required, extensions in self.alternatives:
+            if bloom & required != required:
+                continue
+            if extensions is None or any(bloom & mask == mask for mask in extensions):
+                return True
+        return False
+
+class SummaryStore:
+    """
+    SQLite table of directory summaries. Each row holds a directory's mtime (st_mtime_ns),
+    the subdirectories it had, whether hidden entries were included, the exclude rules it
+    was built under (see rules_key) and, for larger subtrees, a Bloom filter of every name
+    below it.
+
+    A directory's mtime changes whenever an entry is added, removed or renamed in it, so a
+    subtree summary is current exactly when every directory in the subtree still has its
+    recorded mtime. Checking that costs one stat per directory and no directory reads.
+
+    Summaries are written by a background thread, so walks never wait for SQLite.
+    """
+    def __init__(self, db_path: Optional[str] = None, governor=None):
+        """
+        Open (or create) the store
+
+        Args:
+            db_path: SQLite file (defaults to ~/.fastique/cache/summaries.sqlite)
+            governor: Optional ResourceGovernor; the writer thread runs at its background priority
+        """
+        if db_path is None:
+            db_path = os.path.join(str(Path.home()), '.fastique', 'cache', 'summaries.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.governor = governor
+        self._local = threading.local()
+        self._pending: Queue = Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        if connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+            connection.execute('DROP TABLE IF EXISTS summaries')
+            connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS summaries ('
+            ' path TEXT NOT NULL, rules TEXT NOT NULL, mtime_ns INTEGER NOT NULL,'
+            ' hidden INTEGER NOT NULL, subdirs TEXT NOT NULL, bloom BLOB,'
+            ' PRIMARY KEY (path, rules))'
+        )
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Per-thread connection (sqlite3 connections are not shared across threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _subtree_range(path: str) -> Tuple[str, str]:
+        """Bounds of the paths strictly below a directory, for a range scan of the primary key"""
+        prefix = path.rstrip(os.sep) + os.sep
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def get(self, path: str, rules: str = '') -> Optional[Tuple[int, bool, int]]:
+        """
+        Look up a directory's summary
+
+        Args:
+            path: Directory
+            rules: Exclude rules key the summary must have been built under
+
+        Returns:
+            (mtime_ns, includes hidden entries, Bloom filter) or None without a filter
+        """
+        row = self._connection().execute(
+            'SELECT mtime_ns, hidden, bloom FROM summaries WHERE path = ? AND rules = ?',
+            (path, rules)).fetchone()
+        if row is None or row[2] is None:
+            return None
+        return row[0], bool(row[1]), int.from_bytes(row[2], 'little')
+
+    def validate(self, path: str, include_hidden: bool, rules: str = '') -> bool:
+        """
+        Check that no directory below `path` changed since it was summarized (the caller has
+        already compared `path`'s own mtime)
+
+        Args:
+            path: Summarized directory
+            include_hidden: Whether the summaries must cover hidden entries
+            rules: Exclude rules key the summaries must have been built under
+
+        Returns:
+            True if the subtree summary is current
+        """
+        low, high = self._subtree_range(path)
+        connection = self._connection()
+        rows = {row[0]: row[1:] for row in connection.execute(
+            'SELECT path, mtime_ns, hidden, subdirs FROM summaries'
+            ' WHERE (path = ? OR (path > ? AND path < ?)) AND rules = ?',
+            (path, low, high, rules))}
+        if path not in rows:
+            return False
+        stack = [os.path.join(path, name) for name in json.loads(rows[path][2])]
+        stats_taken = 0
+        try:
+            while stack:
+                directory = stack.pop()
+                row = rows.get(directory)
+                if row is None or (include_hidden and not row[1]):
+                    return False
+                stats_taken += 1
+                try:
+                    if os.stat(directory).st_mtime_ns != row[0]:
+                        return False
+                except OSError:
+                    return False
+                stack.extend(os.path.join(directory, name) for name in json.loads(row[2]))
+            return True
+        finally:
+            STAT_CALLS.inc(stats_taken, source='summary')
+
+    def store(self, rows: List[Tuple[str, str, int, bool, List[str], Optional[int]]]) -> None:
+        """
+        Write summaries now, dropping rows of subdirectories that no longer exist
+
+        Args:
+            rows: (path, rules key, mtime_ns, includes hidden, subdirectory names, Bloom filter or None)
+        """
+        if not rows:
+            return
+        connection = self._connection()
+        with connection:
+            for path, rules, _, _, subdirs, _ in rows:
+                old = connection.execute('SELECT subdirs FROM summaries WHERE path = ? AND rules = ?',
+                                         (path, rules)).fetchone()
+                if old is None:
+                    continue
+                for name in set(json.loads(old[0])) - set(subdirs):
+                    removed = os.path.join(path, name)
+                    low, high = self._subtree_range(removed)
+                    connection.execute('DELETE FROM summaries WHERE path = ? OR (path > ? AND path < ?)',
+                                       (removed, low, high))
+            connection.executemany(
+                'INSERT OR REPLACE INTO summaries (path, rules, mtime_ns, hidden, subdirs, bloom)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                [(path, rules, mtime_ns, int(hidden), json.dumps(subdirs, ensure_ascii=False),
+                  None if bloom is None else bloom.to_bytes(BLOOM_BITS // 8, 'little'))
+                 for path, rules, mtime_ns, hidden, subdirs, bloom in rows]
+            )
+
+    def submit(self, row: Tuple[str, str, int, bool, List[str], Optional[int]]) -> None:
+        """Queue a summary for the background writer (see store for the row layout)"""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write, daemon=True,
+                                                    name='fastique-summary-writer')
+                    self._writer.start()
+        self._pending.put(row)
+
+    def flush(self) -> None:
+        """Wait until every submitted summary is written"""
+        self._pending.join()
+
+    def _write(self) -> None:
+        if self.governor is not None:
+            self.governor.enter_background()
+        while True:
+            rows = [self._pending.get()]
+            while len(rows) < WRITE_BATCH:
+                try:
+                    rows.append(self._pending.get_nowait())
+                except Empty:
+                    break
+            try:
+                self.store(rows)
+            except sqlite3.Error as e:
+                logger.warning("Cannot store directory summaries: %s", e)
+            finally:
+                for _ in rows:
+                    self._pending.task_done()
+
+    def close_connection(self) -> None:
+        """Close the calling thread's connection, if it opened one (walk workers call this as they exit)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def close(self) -> None:
+        """Write pending summaries and close this thread's connection"""
+        self.flush()
+        self.close_connection()
+
+class _Subtree:
+    """A scanned directory waiting for its subdirectories' summaries"""
+    __slots__ = ('mtime_ns', 'subdirs', 'waiting', 'tokens', 'bloom')
+
+    def __init__(self, mtime_ns: int, subdirs: List[str], waiting: Set[str], tokens: Set[str], bloom: int):
+        self.mtime_ns = mtime_ns
+        self.subdirs = subdirs
+        self.waiting = waiting
+        self.tokens = tokens
+        self.bloom = bloom
+
+    def add(self, tokens: Set[str], bloom: int) -> None:
+        """Merge a subtree's names, switching to a Bloom filter once there are many"""
+        self.bloom |= bloom
+        self.tokens |= tokens
+        if self.bloom or len(self.tokens) >= BLOOM_MIN_TOKENS:
+            self.bloom |= bloom_of(self.tokens)
+            self.tokens = set()
+
+class SummaryWalk:
+    """
+    Per-search companion of a live walk: decides which subdirectories can be skipped and
+    builds summaries for directories it scans. A directory's summary is completed as soon as
+    each of its subdirectories was scanned or skipped on a current summary, then handed to
+    the store's background writer and merged into its parent; only directories still waiting
+    for subdirectories are kept in memory.
+    """
+    def __init__(self, store: SummaryStore, subtree_filter: Optional[SubtreeFilter], include_hidden: bool,
+                 rules: str = ''):
+        """
+        Args:
+            store: Summary store
+            subtree_filter: Query's filter, or None if nothing can be pruned
+            include_hidden: Whether the walk includes hidden entries
+            rules: Key of the walk's exclude rules (see rules_key)
+        """
+        self.store = store
+        self.subtree_filter = subtree_filter
+        self.include_hidden = include_hidden
+        self.rules = rules
+        self.started_ns = time.time_ns()
+        self.lock = threading.Lock()
+        self.closed = False
+        # Scanned directories waiting for subdirectories
+        self.waiting: Dict[str, _Subtree] = {}
+        # Subdirectories skipped on a current summary, until their parent is recorded: path -> Bloom filter
+        self.pruned: Dict[str, int] = {}
+
+    def prune(self, path: str, stats: os.stat_result) -> bool:
+        """
+        Check whether a subdirectory can be skipped
+
+        Args:
+            path: Subdirectory about to be queued
+            stats: Its stat() result
+
+        Returns:
+            True if its summary is current and rules the query out
+        """
+        if self.subtree_filter is None:
+            return False
+        summary = self.store.get(path, self.rules)
+        if summary is None:
+            return False
+        mtime_ns, hidden, bloom = summary
+        if mtime_ns != stats.st_mtime_ns or (self.include_hidden and not hidden):
+            return False
+        if self.subtree_filter.might_match(bloom) or not self.store.validate(path, self.include_hidden, self.rules):
+            return False
+        with self.lock:
+            self.pruned[path] = bloom
+        SUBTREES_PRUNED.inc()
+        return True
+
+    def record(self, directory: str, mtime_ns: Optional[int], tokens: Set[str], subdirs: List[str]) -> None:
+        """Note a directory the walk read completely (before its subdirectories are scanned)"""
+        bloom = 0
+        if len(tokens) >= BLOOM_MIN_TOKENS:
+            bloom = bloom_of(tokens)
+            tokens = set()
+        paths = [os.path.join(directory, name) for name in subdirs]
+        with self.lock:
+            pruned = {path: self.pruned.pop(path) for path in paths if path in self.pruned}
+            if self.closed or mtime_ns is None or mtime_ns >= self.started_ns - RACY_NS:
+                return
+            subtree = _Subtree(mtime_ns, subdirs, {path for path in paths if path not in pruned},
+                               tokens, bloom)
+            for child_bloom in pruned.values():
+                subtree.add(set(), child_bloom)
+            if subtree.waiting:
+                self.waiting[directory] = subtree
+            else:
+                self._complete(directory, subtree)
+
+    def _complete(self, directory: str, subtree: _Subtree) -> None:
+        """Write a finished summary and merge it into its parent, completing that in turn (lock held)"""
+        while True:
+            self.store.submit((directory, self.rules, subtree.mtime_ns, self.include_hidden,
+                               subtree.subdirs, subtree.bloom or None))
+            parent_path = os.path.dirname(directory)
+            parent = self.waiting.get(parent_path)
+            if parent is None or directory not in parent.waiting:
+                return
+            parent.add(subtree.tokens, subtree.bloom)
+            parent.waiting.discard(directory)
+            if parent.waiting:
+                return
+            directory, subtree = parent_path, self.waiting.pop(parent_path)
+
+    def finish(self) -> None:
+        """Stop collecting; directories still waiting for subdirectories get no summary"""
+        with self.lock:
+            self.closed = True
+            self.waiting.clear()
+            self.pruned.clear()
@@ -0,0 +1,99 @@
+# fastique/app/search/traversal.py
+# Root normalization and loop detection shared by the search walkers
+
+import os
+import threading
+from typing import List, Optional, Set, Tuple
+
+def _is_reachable(ancestor: str, nested: str, include_hidden: bool, exclude) -> bool:
+    """
+    Check whether a walk of `ancestor` would reach `nested`
+
+    Args:
+        ancestor: Normalized ancestor root
+        nested: Normalized root below the ancestor
+        include_hidden: Whether the walk descends into hidden directories
+        exclude: Optional ExcludeMatcher applied by the walk
+
+    Returns:
+        True if every directory between the two would be descended into
+    """
+    current = ancestor
+    for part in os.path.relpath(nested, ancestor).split(os.sep):
+        if not include_hidden and part.startswith('.'):
+            return False
+        current = os.path.join(current, part)
+        if exclude is not None and exclude.is_excluded(part, current, True):
+            return False
+    return True
+
+def normalize_roots(paths: List[str],
+                    include_hidden: bool = False,
+                    max_depth: Optional[int] = None,
+                    exclude=None) -> List[str]:
+    """
+    Resolve search roots and drop duplicates and roots nested inside other roots,
+    so overlapping subtrees are only walked once
+
+    Args:
+        paths: Requested search roots
+        include_hidden: Whether the walk descends into hidden directories
+        max_depth: Maximum walk depth (nested roots are only merged when unlimited)
+        exclude: Optional ExcludeMatcher applied by the walk
+
+    Returns:
+        Existing, canonical roots in their original order
+    """
+    resolved = []
+    seen = set()
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            resolved.append(real)
+
+    if max_depth is not None:
+        return resolved
+
+    # Shorter paths first so ancestors are kept before their descendants
+    kept: List[str] = []
+    for root in sorted(resolved, key=len):
+        covered = False
+        for ancestor in kept:
+            prefix = ancestor if ancestor.endswith(os.sep) else ancestor + os.sep
+            if root.startswith(prefix) and _is_reachable(ancestor, root, include_hidden, exclude):
+                covered = True
+                break
+        if not covered:
+            kept.append(root)
+
+    kept_set = set(kept)
+    return [root for root in resolved if root in kept_set]
+
+class VisitedSet:
+    """Thread-safe set of (st_dev, st_ino) pairs for directories already walked"""
+    def __init__(self):
+        self._seen: Set[Tuple[int, int]] = set()
+        self._lock = threading.Lock()
+
+    def visit(self, stats: os.stat_result) -> bool:
+        """
+        Mark a directory as visited
+
+        Args:
+            stats: stat() result of the directory (following symlinks)
+
+        Returns:
+            True the first time a directory is seen, False for revisits and cycles
+        """
+        key = (stats.st_dev, stats.st_ino)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._seen)
\ No newline at end of file
@@ -0,0 +1,262 @@
+# fastique/app/search/usage.py
+# Access-frequency tracking and background warming of indexes for hot directories
+
+import os
+import json
+import atexit
+import math
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class UsageTracker:
+    """
+    Exponentially decayed access counts per directory. A count halves every `half_life`
+    seconds without use, so recent traffic outweighs old traffic. Scores are stored as
+    log-scale values relative to a fixed epoch, so updates never touch other entries.
+    """
+    def __init__(self, half_life: float = 86400.0, max_entries: int = 10000,
+                 persist_path: Optional[str] = None):
+        """
+        Initialize the tracker
+
+        Args:
+            half_life: Seconds for an unused directory's score to halve
+            max_entries: Maximum directories tracked (coldest are dropped)
+            persist_path: JSON file the scores are saved to and loaded from
+        """
+        self.half_life = half_life
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self.decay = math.log(2) / half_life
+        # path -> log of the score as of time 0 (score(t) = exp(value - decay * t))
+        self.scores: Dict[str, float] = {}
+        self.lock = threading.Lock()
+        self.dirty = False
+        self._save_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if persist_path:
+            self.load()
+
+    def record(self, path: str, weight: float = 1.0) -> None:
+        """
+        Record an access
+
+        Args:
+            path: Directory searched, or a file whose parent directory was used
+            weight: Importance of the access
+        """
+        if not path:
+            return
+        directory = os.path.realpath(path)
+        if not os.path.isdir(directory):
+            directory = os.path.dirname(directory)
+        now_value = math.log(weight) + self.decay * time.time()
+        with self.lock:
+            current = self.scores.get(directory)
+            if current is None:
+                self.scores[directory] = now_value
+            else:
+                # log(exp(a) + exp(b)) without overflow
+                high, low = max(current, now_value), min(current, now_value)
+                self.scores[directory] = high + math.log1p(math.exp(low - high))
+            self.dirty = True
+            if len(self.scores) > self.max_entries:
+                self._prune()
+
+    def score(self, path: str, now: Optional[float] = None) -> float:
+        """Current decayed score of a directory"""
+        with self.lock:
+            value = self.scores.get(os.path.realpath(path))
+        if value is None:
+            return 0.0
+        return math.exp(value - self.decay * (now if now is not None else time.time()))
+
+    def top(self, count: int, min_score: float = 0.0) -> List[Tuple[str, float]]:
+        """
+        The hottest directories
+
+        Args:
+            count: Maximum number of directories
+            min_score: Ignore directories whose decayed score is lower
+
+        Returns:
+            List of (directory, score), hottest first
+        """
+        offset = self.decay * time.time()
+        with self.lock:
+            ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)[:count]
+        return [(path, math.exp(value - offset)) for path, value in ranked
+                if math.exp(value - offset) >= min_score]
+
+    def _prune(self) -> None:
+        """Drop the coldest tenth of the entries (lock held)"""
+        keep = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)[:int(self.max_entries * 0.9)]
+        self.scores = dict(keep)
+
+    def load(self) -> None:
+        """Load persisted scores"""
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('half_life') != self.half_life:
+            return
+        with self.lock:
+            self.scores.update(data.get('scores', {}))
+
+    def save(self) -> None:
+        """Persist scores if they changed since the last save"""
+        if not self.persist_path or not self.dirty:
+            return
+        with self._save_lock:
+            with self.lock:
+                data = {'half_life': self.half_life, 'scores': dict(self.scores)}
+                self.dirty = False
+            temp_file = f"{self.persist_path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.persist_path)), exist_ok=True)
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(temp_file, self.persist_path)
+            except OSError as e:
+                logger.warning("Cannot save usage data to %s: %s", self.persist_path, e)
+
+    def start_autosave(self, interval: float = 300.0) -> None:
+        """
+        Save changed scores every `interval` seconds from a daemon thread, and once more
+        when the process exits
+
+        Args:
+            interval: Seconds between saves
+        """
+        if self._thread is not None or not self.persist_path:
+            return
+        self._thread = threading.Thread(target=self._autosave, args=(interval,), daemon=True,
+                                        name='fastique-usage-save')
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _autosave(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.save()
+
+    def close(self) -> None:
+        """Stop autosaving and save pending changes"""
+        self._stop.set()
+        self.save()
+
+def default_usage_path() -> str:
+    """Default location of the persisted usage scores"""
+    return os.path.join(str(Path.home()), '.fastique', 'usage.json')
+
+class IndexWarmer:
+    """
+    Keeps indexes of the hottest directories loaded and fresh. Each cycle rebuilds the top-N
+    roots whose index is missing or nearing expiry, within a duty-cycle budget (indexing may
+    use at most `duty_cycle` of wall time), and unloads warmed roots that have gone cold.
+    """
+    def __init__(self, index, tracker: UsageTracker, top_n: int = 5, interval: float = 60.0,
+                 duty_cycle: float = 0.25, min_score: float = 1.0, refresh_fraction: float = 0.8,
+                 governor=None):
+        """
+        Initialize the warmer
+
+        Args:
+            index: SearchIndex to populate
+            tracker: Source of hot directories
+            top_n: Number of hot roots kept warm
+            interval: Seconds between cycles
+            duty_cycle: Fraction of wall time indexing may use (CPU and I/O budget)
+            min_score: Minimum decayed score for a root to be warmed
+            refresh_fraction: Rebuild once this fraction of the index expiry has passed
+            governor: Optional ResourceGovernor; the warming thread runs at its background priority
+        """
+        self.index = index
+        self.tracker = tracker
+        self.top_n = top_n
+        self.interval = interval
+        self.duty_cycle = min(max(duty_cycle, 0.01), 1.0)
+        self.min_score = min_score
+        self.refresh_fraction = refresh_fraction
+        self.governor = governor
+        self.warmed: Dict[str, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the background thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name='fastique-index-warmer')
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        if self.governor is not None:
+            self.governor.enter_background()
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Index warming cycle failed")
+
+    def hot_roots(self) -> List[str]:
+        """Hot directories, hottest first, without those covered by another selected root"""
+        selected = [path for path, _ in self.tracker.top(self.top_n, self.min_score) if os.path.isdir(path)]
+        
+        def covered(path: str) -> bool:
+            # An ancestor's index covers the path, whichever of the two is hotter
+            return any(path != root and path.startswith(root.rstrip(os.sep) + os.sep) for root in selected)
+        
+        return [path for path in selected if not covered(path)]
+
+    def run_once(self) -> List[str]:
+        """
+        Run one warming cycle
+
+        Returns:
+            Roots rebuilt during this cycle
+        """
+        hot = self.hot_roots()
+        rebuilt = []
+        for root in hot:
+            if self._stop.is_set():
+                break
+            if not self._needs_refresh(root):
+                continue
+            start_time = time.monotonic()
+            self.index.refresh_index(root)
+            elapsed = time.monotonic() - start_time
+            self.warmed[root] = time.time()
+            rebuilt.append(root)
+            logger.info("Warmed index for %s in %.2fs", root, elapsed)
+            # Stay within the duty cycle: idle proportionally to the work just done
+            if self.duty_cycle < 1.0 and self._stop.wait(elapsed * (1 / self.duty_cycle - 1)):
+                break
+
+        # Let roots that dropped out of the hot set go cold
+        for root in list(self.warmed):
+            if root not in hot:
+                self.index.unload(root)
+                del self.warmed[root]
+        return rebuilt
+
+    def _needs_refresh(self, root: str) -> bool:
+        """Whether a root's index is missing or close to expiry"""
+        age = self.index.index_age(root)
+        if age is None:
+            # Loading a fresh index from disk is cheap; only rebuild if there is none
+            if self.index.has_index(root):
+                self.warmed.setdefault(root, time.time())
+                return False
+            return True
+        return age >= self.index.expiry_time * self.refresh_fraction
@@ -181,15 +181,14 @@ const FileOperations = {
         const currentPathInput = document.getElementById('current-path');
         currentPathInput.value = path;
 
-        // Trigger a search to show directory contents
         const searchInput = document.getElementById('search-input');
         searchInput.value = ''; // Clear search
 
         // Update breadcrumbs
         this.updateBreadcrumbs(path);
 
-        // Trigger search with empty query to show all files
-        SearchUI.performSearch();
+        // List the directory's contents
+        SearchModule.browse(path);
     },
 
     /**
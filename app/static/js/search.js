@@ -144,6 +144,7 @@ document.addEventListener('DOMContentLoaded', function () {
             searchParams.file_types = getSelectedFileTypes();
             searchParams.case_sensitive = document.getElementById('case-sensitive').checked;
             searchParams.include_hidden = document.getElementById('include-hidden').checked;
+            searchParams.search_archives = document.getElementById('search-archives').checked;
             searchParams.use_regex = document.getElementById('use-regex').checked;
 
             // Get date range if specified
@@ -190,6 +191,53 @@ document.addEventListener('DOMContentLoaded', function () {
             });
     }
 
+    // List a directory page by page (sorted and paged by the server)
+    function browse(path, offset = 0, sort = 'name', order = 'asc') {
+        const params = new URLSearchParams({ path: path, offset: offset, sort: sort, order: order });
+        if (document.getElementById('include-hidden').checked) {
+            params.set('hidden', '1');
+        }
+
+        loadingIndicator.classList.remove('hidden');
+        fetch(`/browse?${params}`)
+            .then(response => response.json())
+            .then(data => {
+                if (data.error) {
+                    displayError(data.error);
+                    return;
+                }
+                if (offset === 0) {
+                    displayResults(data);
+                } else {
+                    const resultsList = resultsContainer.querySelector('.results-list');
+                    data.results.forEach(result => resultsList.appendChild(createResultItem(result)));
+                }
+                // Removed entries are skipped, so count can fall short of the page size
+                const shown = data.next_offset;
+                resultsCount.textContent = `${shown} of ${data.total} items`;
+
+                // Offer the next page
+                const previous = resultsContainer.querySelector('.load-more');
+                if (previous) {
+                    previous.remove();
+                }
+                if (shown < data.total) {
+                    const more = document.createElement('button');
+                    more.className = 'action-button load-more';
+                    more.textContent = 'Load more';
+                    more.addEventListener('click', () => browse(path, shown, sort, order));
+                    resultsContainer.appendChild(more);
+                }
+            })
+            .catch(error => {
+                console.error('Browse error:', error);
+                displayError('An error occurred while listing the folder. Please try again.');
+            })
+            .finally(() => {
+                loadingIndicator.classList.add('hidden');
+            });
+    }
+
     // Get selected file types
     function getSelectedFileTypes() {
         const fileTypeCheckboxes = document.querySelectorAll('input[name="file-type"]:checked');
@@ -369,6 +417,7 @@ document.addEventListener('DOMContentLoaded', function () {
     // Export public methods (for other modules to use)
     window.SearchModule = {
         search: handleSearch,
+        browse: browse,
         refreshResults: function () {
             if (currentSearch) {
                 handleSearch(null);
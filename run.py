@@ -2,9 +2,16 @@
 # fastique/run.py
 # Main entry point for the application
 
+import sys
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    if '--asgi' in sys.argv:
+        # Async serving mode; requires uvicorn
+        import uvicorn
+        from app.asgi import FastiqueASGI
+        uvicorn.run(FastiqueASGI(app), host='127.0.0.1', port=5000)
+    else:
+        app.run(debug=True)
\ No newline at end of file
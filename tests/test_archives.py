@@ -0,0 +1,99 @@
+# fastique/tests/test_archives.py
+# Tests for archive member search and the member cache
+
+import unittest
+import io
+import os
+import tarfile
+import tempfile
+import zipfile
+from app.metrics import ARCHIVE_REQUESTS
+from app.search.archives import ArchiveIndex, is_archive, read_members
+from app.search.indexer import SearchIndex
+from app.search.search_engine import SearchEngine
+
+class TestArchives(unittest.TestCase):
+    """Test case for searching inside zip and tar archives"""
+
+    def setUp(self):
+        """Create a zip, a gzipped tar, a corrupt zip and a plain file"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(os.path.realpath(self.temp_dir.name), 'backups')
+        os.makedirs(self.root)
+        self.zip_path = os.path.join(self.root, 'site.zip')
+        self.write_zip({'docs/report.txt': b'x' * 42, 'docs/img/logo.png': b'png', 'readme.md': b''})
+        with tarfile.open(os.path.join(self.root, 'etc.tar.gz'), 'w:gz') as archive:
+            info = tarfile.TarInfo('./etc/report.conf')
+            info.size = 7
+            archive.addfile(info, io.BytesIO(b'a=1\nb=2'))
+        with open(os.path.join(self.root, 'broken.zip'), 'wb') as f:
+            f.write(b'not a zip')
+        open(os.path.join(self.root, 'report_live.txt'), 'w').close()
+        self.archives = ArchiveIndex(os.path.join(self.temp_dir.name, 'archives.sqlite'), workers=2)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.archives.close()
+        self.temp_dir.cleanup()
+
+    def write_zip(self, members):
+        with zipfile.ZipFile(self.zip_path, 'w') as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+
+    def search(self, query, index=None, archives=None, **kwargs):
+        engine = SearchEngine(index=index, archives=archives or self.archives)
+        results = engine.search(query, [self.root], search_archives=True, **kwargs)
+        return {os.path.relpath(result['full_path'], self.root): result['size'] for result in results}
+
+    def test_read_members(self):
+        """Test listing members without extracting"""
+        self.assertTrue(is_archive('Backup.TAR.GZ'))
+        self.assertFalse(is_archive('notes.gz.txt'))
+        self.assertEqual(sorted(name for name, _, _, _ in read_members(self.zip_path)),
+                         ['docs/img/logo.png', 'docs/report.txt', 'readme.md'])
+        members = read_members(os.path.join(self.root, 'etc.tar.gz'))
+        self.assertEqual([(name, size, is_dir) for name, size, _, is_dir in members],
+                         [('etc/report.conf', 7, False)])
+
+    def test_member_search(self):
+        """Test that members are matched and returned under virtual paths with their sizes"""
+        self.assertEqual(self.search('report*'), {
+            'report_live.txt': 0,
+            os.path.join('site.zip', 'docs', 'report.txt'): 42,
+            os.path.join('etc.tar.gz', 'etc', 'report.conf'): 7,
+        })
+        self.assertEqual(list(self.search('*', file_types=['png'])),
+                         [os.path.join('site.zip', 'docs', 'img', 'logo.png')])
+        self.assertEqual(list(self.search('report ext:conf', match_mode='structured')),
+                         [os.path.join('etc.tar.gz', 'etc', 'report.conf')])
+
+        # Off by default
+        results = SearchEngine(archives=self.archives).search('report*', [self.root])
+        self.assertEqual([result['filename'] for result in results], ['report_live.txt'])
+
+    def test_member_cache(self):
+        """Test that unchanged archives are not reread, and changed ones are"""
+        self.search('report*')
+        misses = ARCHIVE_REQUESTS.get(result='miss')
+        reopened = ArchiveIndex(self.archives.db_path, workers=1)
+        try:
+            self.search('report*', archives=reopened)
+        finally:
+            reopened.close()
+        self.assertEqual(ARCHIVE_REQUESTS.get(result='miss'), misses)
+
+        self.write_zip({'docs/report_v2.txt': b'x' * 5})
+        stats = os.stat(self.zip_path)
+        os.utime(self.zip_path, ns=(stats.st_atime_ns, stats.st_mtime_ns + 10 ** 9))
+        self.assertIn(os.path.join('site.zip', 'docs', 'report_v2.txt'), self.search('report*'))
+        self.assertEqual(ARCHIVE_REQUESTS.get(result='miss'), misses + 1)
+
+    def test_indexed_root(self):
+        """Test that archives are searched when the root is served from the index"""
+        index = SearchIndex(cache_dir=os.path.join(self.temp_dir.name, 'cache'))
+        index.get_index(self.root)
+        self.assertIn(os.path.join('site.zip', 'docs', 'report.txt'), self.search('report*', index=index))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# fastique/tests/test_asgi.py
+# Tests for the async (ASGI) serving mode
+
+import unittest
+import os
+import json
+import asyncio
+import tempfile
+from app import create_app
+from app.asgi import FastiqueASGI
+from app.config import Config
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+    ASGI_SEARCH_WORKERS = 2
+    ASGI_MAX_PENDING = 4
+
+async def call_asgi(app, method, path, body=b'', query_string=b'', headers=None):
+    """Drive one HTTP request through an ASGI app and collect the response"""
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string,
+        'headers': [(b'content-type', b'application/json')] + (headers or []),
+    }
+    incoming = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    messages = []
+    
+    async def receive():
+        return incoming.pop(0)
+    
+    async def send(message):
+        messages.append(message)
+    
+    await app(scope, receive, send)
+    status = messages[0]['status']
+    chunks = [m['body'] for m in messages[1:]]
+    return status, dict(messages[0]['headers']), chunks
+
+class TestASGI(unittest.TestCase):
+    """Test case for FastiqueASGI"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        for i in range(250):
+            with open(os.path.join(self.temp_path, f'file{i}.txt'), 'w') as f:
+                f.write('x')
+        self.app = FastiqueASGI(create_app(TestConfig))
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def test_search_and_file_routes(self):
+        """Test that blueprint routes are served through the executor lanes"""
+        body = json.dumps({'query': '*.txt', 'paths': [self.temp_path]}).encode()
+        status, _, chunks = asyncio.run(call_asgi(self.app, 'POST', '/search/', body))
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(b''.join(chunks))['count'], 250)
+        
+        status, _, chunks = asyncio.run(call_asgi(
+            self.app, 'GET', '/file/info', query_string=f'path={self.temp_path}'.encode()))
+        self.assertEqual(status, 200)
+        self.assertTrue(json.loads(b''.join(chunks))['info']['is_directory'])
+    
+    def test_streamed_search(self):
+        """Test NDJSON results are sent as multiple body chunks"""
+        body = json.dumps({'query': '*.txt', 'paths': [self.temp_path], 'stream': True}).encode()
+        status, headers, chunks = asyncio.run(call_asgi(self.app, 'POST', '/search/', body))
+        
+        self.assertEqual(status, 200)
+        self.assertEqual(headers[b'content-type'], b'application/x-ndjson')
+        self.assertGreater(len(chunks), 2)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['count'], 250)
+        self.assertEqual(len(lines), 251)
+    
+    def test_body_size_limit(self):
+        """Test that bodies over ASGI_MAX_BODY_SIZE are refused"""
+        self.assertEqual(self.app.max_body_size, Config.ASGI_MAX_BODY_SIZE)
+        
+        class SmallBodyConfig(TestConfig):
+            ASGI_MAX_BODY_SIZE = 16
+        
+        app = FastiqueASGI(create_app(SmallBodyConfig))
+        body = json.dumps({'query': '*.txt', 'paths': [self.temp_path]}).encode()
+        status, _, _ = asyncio.run(call_asgi(app, 'POST', '/search/', body))
+        self.assertEqual(status, 413)
+    
+    def test_concurrent_clients_are_bounded(self):
+        """Test that many clients share a bounded pool and excess load is shed"""
+        body = json.dumps({'query': 'file1*', 'paths': [self.temp_path]}).encode()
+        
+        async def many():
+            return await asyncio.gather(*(call_asgi(self.app, 'POST', '/search/', body) for _ in range(20)))
+        
+        statuses = [status for status, _, _ in asyncio.run(many())]
+        lane = self.app.lane_for('/search/')
+        self.assertEqual(lane.executor._max_workers, 2)
+        self.assertEqual(statuses.count(200) + statuses.count(503), 20)
+        self.assertGreaterEqual(statuses.count(200), 6)
+        self.assertEqual(lane.pending, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# fastique/tests/test_browse.py
+# Tests for the directory listing cache and the /browse endpoint
+
+import unittest
+import os
+import time
+import tempfile
+from app import create_app
+from app.config import Config
+from app.metrics import LISTING_REQUESTS, STAT_CALLS
+from app.search.indexer import SearchIndex
+from app.search.listing import ListingCache
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestBrowse(unittest.TestCase):
+    """Test case for sorted, paged directory listings"""
+
+    def setUp(self):
+        """Create a directory with files of different sizes, folders and a hidden file"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(os.path.realpath(self.temp_dir.name), 'tree')
+        os.makedirs(os.path.join(self.root, 'Zeta'))
+        os.makedirs(os.path.join(self.root, 'alpha'))
+        for index, name in enumerate(['b.txt', 'C.md', 'a.py', '.hidden']):
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write('x' * (index + 1) * 10)
+        self.age()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.temp_dir.cleanup()
+
+    def age(self, seconds=600):
+        past = time.time() - seconds
+        os.utime(self.root, (past, past))
+
+    @staticmethod
+    def names(page):
+        return [result['filename'] for result in page['results']]
+
+    def test_sorting_and_paging(self):
+        """Test sort keys, folders first, hidden entries and paging"""
+        cache = ListingCache()
+        self.assertEqual(self.names(cache.page(self.root)), ['alpha', 'Zeta', 'a.py', 'b.txt', 'C.md'])
+        self.assertEqual(self.names(cache.page(self.root, 'size', descending=True, directories_first=False))[:3],
+                         ['a.py', 'C.md', 'b.txt'])
+        self.assertEqual(self.names(cache.page(self.root, 'type'))[2:], ['C.md', 'a.py', 'b.txt'])
+        self.assertIn('.hidden', self.names(cache.page(self.root, include_hidden=True)))
+
+        page = cache.page(self.root, offset=3, limit=2)
+        self.assertEqual((page['total'], self.names(page)), (5, ['b.txt', 'C.md']))
+        self.assertEqual(page['results'][0]['size'], 10)
+        with self.assertRaises(ValueError):
+            cache.page(self.root, 'owner')
+
+    def test_removed_entries_keep_paging(self):
+        """Test that entries removed since the listing was read do not shift the next page"""
+        cache = ListingCache()
+        cache.page(self.root)
+        stats = os.stat(self.root)
+        os.remove(os.path.join(self.root, 'a.py'))
+        # Keep the cached listing by restoring the directory's mtime
+        os.utime(self.root, ns=(stats.st_atime_ns, stats.st_mtime_ns))
+        page = cache.page(self.root, offset=1, limit=2)
+        self.assertEqual((self.names(page), page['next_offset']), (['Zeta'], 3))
+        page = cache.page(self.root, offset=page['next_offset'], limit=2)
+        self.assertEqual((self.names(page), page['next_offset']), (['b.txt', 'C.md'], 5))
+
+    def test_listing_validated_by_mtime(self):
+        """Test that a listing is reused until the directory changes"""
+        cache = ListingCache()
+        cache.page(self.root)
+        hits = LISTING_REQUESTS.get(result='hit')
+        cache.page(self.root, offset=2)
+        self.assertEqual(LISTING_REQUESTS.get(result='hit'), hits + 1)
+
+        open(os.path.join(self.root, 'new.txt'), 'w').close()
+        self.age(300)
+        self.assertIn('new.txt', self.names(cache.page(self.root)))
+
+        # Freshly modified directories are re-read every time
+        open(os.path.join(self.root, 'newer.txt'), 'w').close()
+        cache.page(self.root)
+        misses = LISTING_REQUESTS.get(result='miss')
+        cache.page(self.root)
+        self.assertEqual(LISTING_REQUESTS.get(result='miss'), misses + 1)
+
+    def test_sort_attributes_from_index(self):
+        """Test that sizes for sorting come from a covering index instead of stat()"""
+        index = SearchIndex(cache_dir=os.path.join(self.temp_dir.name, 'cache'))
+        index.get_index(self.root)
+        cache = ListingCache()
+        stats = STAT_CALLS.get(source='listing')
+        page = cache.page(self.root, 'size', limit=2, index=index)
+        # Only the hidden file (not indexed) and the page itself were stat()ed
+        self.assertEqual(STAT_CALLS.get(source='listing') - stats, 1 + 2)
+        self.assertEqual(self.names(page), ['alpha', 'Zeta'])
+
+    def test_endpoint(self):
+        """Test the /browse route"""
+        client = create_app(TestConfig).test_client()
+        response = client.get('/browse', query_string={'path': self.root, 'sort': 'name', 'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual((data['total'], data['count'], data['next_offset']), (5, 2, 2))
+        self.assertEqual(data['results'][0]['full_path'], os.path.join(self.root, 'alpha'))
+
+        self.assertEqual(client.get('/browse').status_code, 400)
+        self.assertEqual(client.get('/browse', query_string={'path': self.root, 'sort': 'x'}).status_code, 400)
+        missing = os.path.join(self.root, 'missing')
+        self.assertEqual(client.get('/browse', query_string={'path': missing}).status_code, 404)
+        not_dir = os.path.join(self.root, 'a.py')
+        self.assertEqual(client.get('/browse', query_string={'path': not_dir}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
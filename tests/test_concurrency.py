@@ -0,0 +1,132 @@
+# fastique/tests/test_concurrency.py
+# Tests for per-device adaptive walker concurrency
+
+import unittest
+import os
+import time
+import tempfile
+import threading
+from app.search.concurrency import (AIMDController, AdaptivePool, ConcurrencyManager, MountTable,
+                                    classify, parse_mountinfo)
+from app.search.indexer import SearchIndex
+
+MOUNTINFO = """\
+22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+40 22 0:45 / /mnt/shared\\040files rw,relatime shared:20 - nfs4 server:/export rw,vers=4.2
+41 22 0:46 / /tmp rw,nosuid - tmpfs tmpfs rw
+"""
+
+class TestConcurrency(unittest.TestCase):
+    """Test case for mount detection, AIMD tuning and the adaptive pool"""
+
+    def test_mountinfo(self):
+        """Test parsing, escaped mount points and filesystem classification"""
+        table = MountTable(parse_mountinfo(MOUNTINFO))
+        nfs = table.find(os.makedev(0, 45))
+        self.assertEqual((nfs.mount_point, nfs.fs_type), ('/mnt/shared files', 'nfs4'))
+        self.assertEqual(classify(nfs, nfs.device), 'network')
+        self.assertEqual(classify(table.find(os.makedev(0, 46)), os.makedev(0, 46)), 'memory')
+        # Unknown devices fall back to the longest mount point prefix
+        self.assertEqual(table.find(os.makedev(0, 99), '/tmp/build/x').fs_type, 'tmpfs')
+
+        manager = ConcurrencyManager(mount_table=table)
+        self.assertEqual(manager.budget(os.makedev(0, 45)).limit, 16)
+        static = ConcurrencyManager(adaptive=False, default_threads=3, mount_table=table)
+        self.assertEqual(static.budget(os.makedev(0, 45)).limit, 3)
+
+    def test_aimd(self):
+        """Test additive increase on steady latency and multiplicative decrease on congestion"""
+        controller = AIMDController(4, maximum=8)
+        for _ in range(40):
+            controller.observe(0.001)
+        self.assertEqual(controller.limit, 8)
+        for _ in range(40):
+            controller.observe(0.010)
+        self.assertLess(controller.limit, 4)
+        self.assertGreaterEqual(controller.limit, 1)
+
+    def test_pool_limits_workers(self):
+        """Test that the pool walks every task without exceeding its worker cap"""
+        manager = ConcurrencyManager(adaptive=False, default_threads=8, mount_table=MountTable([]))
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0, 'done': 0}
+
+        def process(depth):
+            with lock:
+                state['running'] += 1
+                state['peak'] = max(state['peak'], state['running'])
+            time.sleep(0.005)
+            with lock:
+                state['running'] -= 1
+                state['done'] += 1
+            return ([(1, 'child', depth + 1)] * 3 if depth < 3 else []), 1
+
+        pool = AdaptivePool(manager, process, max_workers=2)
+        pool.submit(1, 'root', 0)
+        self.assertTrue(pool.wait(10))
+        self.assertEqual(state['done'], 1 + 3 + 9 + 27)
+        self.assertLessEqual(state['peak'], 2)
+        self.assertEqual(manager.budget(1).in_flight, 0)
+
+    def test_background_pool_is_separate(self):
+        """Test that throttled background walks neither hold nor shrink the search budget"""
+        manager = ConcurrencyManager(mount_table=MountTable([]))
+        foreground = manager.budget(1)
+        limit = foreground.limit
+        throttled = []
+
+        def throttle(entries):
+            throttled.append(entries)
+            time.sleep(0.01)
+
+        pool = AdaptivePool(manager, lambda depth: (([(1, 'child', depth + 1)] * 2 if depth < 3 else []), 100),
+                            throttle=throttle, background=True)
+        pool.submit(1, 'root', 0)
+        self.assertEqual(foreground.in_flight, 0)
+        self.assertTrue(pool.wait(10))
+
+        background = manager.budget(1, background=True)
+        self.assertEqual(len(throttled), 15)
+        self.assertEqual(background.controller.samples, 15)
+        # The sleeps were not taken for scan latency (0.01s / 100 entries would be 100us)
+        self.assertLess(background.controller.baseline, 1e-5)
+        self.assertEqual((foreground.limit, foreground.controller.samples), (limit, 0))
+        self.assertIn('0:1 background', manager.snapshot())
+
+    def test_finalizer_runs_in_each_worker(self):
+        """Test that every worker thread runs the finalizer as it exits"""
+        manager = ConcurrencyManager(mount_table=MountTable([]))
+        started, finished = [], []
+        pool = AdaptivePool(manager, lambda depth: (([(1, 'child', depth + 1)] * 2 if depth < 3 else []), 1),
+                            initializer=lambda: started.append(threading.get_ident()),
+                            finalizer=lambda: finished.append(threading.get_ident()))
+        pool.submit(1, 'root', 0)
+        self.assertTrue(pool.wait(10))
+        # Workers exit right after the last task is done
+        deadline = time.monotonic() + 5
+        while len(finished) < len(started) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(started)
+        self.assertEqual(sorted(finished), sorted(started))
+
+    def test_parallel_index_matches_walk(self):
+        """Test that the parallel index build keeps os.walk's entries and order"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = os.path.realpath(temp_dir)
+            for path in ['a/b/c', 'a/d', 'e', '.hidden/x']:
+                os.makedirs(os.path.join(root, path))
+            for path in ['f.txt', 'a/g.txt', 'a/b/c/h.txt', 'e/i.txt', '.secret', '.hidden/x/j.txt']:
+                open(os.path.join(root, path), 'w').close()
+
+            expected = []
+            for directory, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if not d.startswith('.') and d != '.cache']
+                expected += [os.path.join(directory, f) for f in files if not f.startswith('.')]
+                expected += [os.path.join(directory, d) for d in dirs]
+
+            index = SearchIndex(cache_dir=os.path.join(root, '.cache'))
+            built = [entry['full_path'] for entry in index.get_index(root)['files']]
+            self.assertEqual(built, expected)
+
+if __name__ == '__main__':
+    unittest.main()
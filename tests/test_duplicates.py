@@ -0,0 +1,85 @@
+# fastique/tests/test_duplicates.py
+# Tests for the duplicate file finder
+
+import unittest
+import os
+import tempfile
+from app import create_app
+from app.config import Config
+from app.search.duplicates import DuplicateFinder, SAMPLE_SIZE
+from app.search.indexer import SearchIndex
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestDuplicateFinder(unittest.TestCase):
+    """Test case for staged duplicate detection"""
+
+    def setUp(self):
+        """Create a tree with duplicates, near-duplicates and hardlinks"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.test_dir.name)
+        os.makedirs(os.path.join(self.root, 'a'))
+        os.makedirs(os.path.join(self.root, 'b'))
+
+        big = os.urandom(64 * 1024)
+        # Same size and same head/tail as `big`, different middle
+        middle = bytearray(big)
+        middle[32 * 1024] ^= 0xFF
+        self.write('a/big.bin', big)
+        self.write('b/big_copy.bin', big)
+        self.write('b/big_changed.bin', bytes(middle))
+        self.write('a/small.txt', b'hello world')
+        self.write('b/small_copy.txt', b'hello world')
+        self.write('b/other.txt', b'hello there')
+        self.write('a/unique.dat', os.urandom(5000))
+        os.link(os.path.join(self.root, 'a/big.bin'), os.path.join(self.root, 'a/big_link.bin'))
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def write(self, relative, data):
+        with open(os.path.join(self.root, relative), 'wb') as f:
+            f.write(data)
+
+    def check_groups(self, result):
+        groups = {tuple(os.path.relpath(p, self.root) for p in group['paths']): group
+                  for group in result['groups']}
+        self.assertEqual(set(groups), {('a/big.bin', 'b/big_copy.bin'),
+                                       ('a/small.txt', 'b/small_copy.txt')})
+        self.assertEqual(result['wasted_bytes'], 64 * 1024 + len(b'hello world'))
+        self.assertEqual(result['stats']['hardlinks_skipped'], 1)
+
+    def test_walk_finds_duplicates(self):
+        """Test grouping, hardlink exclusion and staged reading"""
+        result = DuplicateFinder().find([self.root])
+        self.check_groups(result)
+
+        stats = result['stats']
+        # Only the three large same-size candidates left after hardlinks get full hashes
+        self.assertEqual(stats['full_hashed'], 3)
+        naive = stats['bytes_total']
+        self.assertLess(stats['bytes_read'], naive)
+        self.assertEqual(stats['bytes_read'],
+                         3 * 2 * SAMPLE_SIZE + 3 * 64 * 1024 + 3 * len(b'hello world'))
+
+    def test_index_source(self):
+        """Test that an index covering the directory replaces the walk"""
+        index = SearchIndex(cache_dir=os.path.join(self.root, '.cache'))
+        index.get_index(self.root)
+        self.check_groups(DuplicateFinder(index=index).find([self.root]))
+
+    def test_endpoint(self):
+        """Test the /file/duplicates endpoint"""
+        app = create_app(TestConfig)
+        app.config['HASH_CACHE_PATH'] = os.path.join(self.root, '.cache', 'hashes.sqlite')
+        response = app.test_client().post('/file/duplicates', json={'paths': [self.root]})
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['group_count'], 2)
+        self.assertEqual(data['groups'][0]['size'], 64 * 1024)
+
+if __name__ == '__main__':
+    unittest.main()
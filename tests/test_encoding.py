@@ -0,0 +1,72 @@
+# fastique/tests/test_encoding.py
+# Tests for compact search responses and response compression
+
+import unittest
+import os
+import gzip
+import json
+import zlib
+import tempfile
+from app import create_app
+from app.config import Config
+from app.encoding import negotiate_encoding
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestEncoding(unittest.TestCase):
+    """Test case for the compact format and Accept-Encoding negotiation"""
+
+    def setUp(self):
+        """Create enough files for a compressible response"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.test_dir.name)
+        for directory in ('alpha', 'beta'):
+            os.makedirs(os.path.join(self.root, directory))
+            for index in range(30):
+                with open(os.path.join(self.root, directory, f'report_{index}.txt'), 'w') as f:
+                    f.write('x' * index)
+        self.client = create_app(TestConfig).test_client()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def search(self, headers=None, **body):
+        return self.client.post('/search/', json={'query': 'report_*', 'paths': [self.root], **body},
+                                headers=headers or {})
+
+    def test_compact_format(self):
+        """Test that the compact format carries the same results in less space"""
+        full = self.search().get_json()
+        response = self.search(format='compact')
+        compact = response.get_json()
+
+        self.assertEqual(compact['count'], 60)
+        self.assertEqual(compact['columns'], ['dir', 'name', 'size', 'mtime', 'is_dir'])
+        self.assertEqual(sorted(compact['directories']),
+                         [os.path.join(self.root, 'alpha'), os.path.join(self.root, 'beta')])
+        decoded = sorted((os.path.join(compact['directories'][row[0]], row[1]), row[2])
+                         for row in compact['rows'])
+        self.assertEqual(decoded, sorted((r['full_path'], r['size']) for r in full['results']))
+        self.assertLess(len(response.data) * 3, len(json.dumps(full)))
+
+    def test_compression(self):
+        """Test gzip and deflate negotiation"""
+        plain = self.search().data
+        response = self.search(headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.data))['count'], 60)
+        self.assertLess(len(response.data), len(plain))
+
+        response = self.search(headers={'Accept-Encoding': 'gzip;q=0.2, deflate'})
+        self.assertEqual(response.headers['Content-Encoding'], 'deflate')
+        self.assertEqual(json.loads(zlib.decompress(response.data))['count'], 60)
+
+        response = self.search(headers={'Accept-Encoding': 'identity'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(negotiate_encoding('*;q=0.5, gzip;q=0'), 'deflate')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# fastique/tests/test_exclude.py
+# Tests for exclude rules applied during traversal
+
+import unittest
+import os
+import tempfile
+from app.search.exclude import ExcludeMatcher
+from app.search.indexer import SearchIndex
+from app.search.search_engine import SearchEngine
+
+class TestExcludeRules(unittest.TestCase):
+    """Test case for ExcludeMatcher and its use by the engine and indexer"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        self.root = os.path.join(self.temp_path, 'project')
+        
+        file_structure = {
+            'main.py': '',
+            'node_modules/lib/index.js': '',
+            'src/app.py': '',
+            'src/__pycache__/app.cpython-311.pyc': '',
+            'src/generated/schema.py': '',
+            'src/.fastiqueignore': 'generated/\n*.log\n',
+            'src/debug.log': '',
+            'debug.log': '',
+        }
+        for file_path, content in file_structure.items():
+            full_path = os.path.join(self.root, file_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(content)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def test_matcher_semantics(self):
+        """Test name, directory-only, anchored and negated patterns"""
+        matcher = ExcludeMatcher.from_patterns(['node_modules/', '*.pyc', 'docs/tmp', '!keep.pyc'])
+        
+        self.assertTrue(matcher.is_excluded('node_modules', '/x/node_modules', True))
+        self.assertFalse(matcher.is_excluded('node_modules', '/x/node_modules', False))
+        self.assertTrue(matcher.is_excluded('a.pyc', '/x/y/a.pyc', False))
+        self.assertFalse(matcher.is_excluded('keep.pyc', '/x/keep.pyc', False))
+        self.assertTrue(matcher.is_excluded('tmp', '/x/docs/tmp', True))
+        self.assertFalse(matcher.is_excluded('tmp', '/x/other/tmp', True))
+        self.assertFalse(ExcludeMatcher.from_patterns([]).active)
+    
+    def test_engine_prunes_excluded_trees(self):
+        """Test global, per-request and ignore-file rules in the live engine"""
+        engine = SearchEngine(exclude_patterns=['node_modules/', '__pycache__/'], use_ignore_files=True)
+        results = engine.search(query='*', paths=[self.root], exclude=['main.py'])
+        names = sorted(r['filename'] for r in results)
+        
+        self.assertEqual(names, ['app.py', 'debug.log', 'src'])
+    
+    def test_indexer_prunes_excluded_trees(self):
+        """Test that excluded subtrees are never indexed"""
+        index = SearchIndex(cache_dir=os.path.join(self.temp_path, 'cache'),
+                            exclude_patterns=['node_modules/', '__pycache__/'], use_ignore_files=True)
+        files = index.get_index(self.root)['files']
+        names = sorted(entry['name'] for entry in files)
+        
+        self.assertEqual(names, ['app.py', 'debug.log', 'main.py', 'src'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# fastique/tests/test_federation.py
+# Tests for federated search across several local Fastique instances
+
+import unittest
+import os
+import time
+import tempfile
+import threading
+from werkzeug.serving import make_server
+from app import create_app
+from app.config import Config
+from app.search.federation import merge_results
+
+def start_server(wsgi_app, host='127.0.0.1'):
+    """Serve a WSGI app on an ephemeral port in a background thread"""
+    server = make_server(host, 0, wsgi_app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def slow_app(environ, start_response):
+    """A peer that answers too late"""
+    time.sleep(1.5)
+    start_response('200 OK', [('Content-Type', 'application/json')])
+    return [b'{"results": []}']
+
+def node_config(search_path, peers=(), timeout=2.0):
+    """Build a configuration for one node"""
+    class NodeConfig(Config):
+        TESTING = True
+        DEFAULT_SEARCH_PATHS = [search_path]
+        FEDERATION_PEERS = list(peers)
+        FEDERATION_TIMEOUT = timeout
+    return NodeConfig
+
+class TestFederation(unittest.TestCase):
+    """Test case for scatter-gather search"""
+
+    def setUp(self):
+        """Start two peer nodes, each serving its own directory"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.servers = []
+        self.peer_urls = []
+        for node, names in (('a', ['alpha_report.txt', 'notes.md']), ('b', ['beta_report.txt'])):
+            path = os.path.join(self.temp_dir.name, node)
+            os.makedirs(path)
+            for name in names:
+                with open(os.path.join(path, name), 'w') as f:
+                    f.write(node)
+            server = start_server(create_app(node_config(path)))
+            self.servers.append(server)
+            self.peer_urls.append(f'http://127.0.0.1:{server.server_port}')
+
+        self.local_path = os.path.join(self.temp_dir.name, 'local')
+        os.makedirs(self.local_path)
+        with open(os.path.join(self.local_path, 'gamma_report.txt'), 'w') as f:
+            f.write('local')
+
+    def tearDown(self):
+        """Stop the peer nodes"""
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_merges_results_from_all_nodes(self):
+        """Test that results from the local node and every peer are merged"""
+        app = create_app(node_config(self.local_path, self.peer_urls))
+        response = app.test_client().post('/search/federated', json={'query': '*report*'})
+        data = response.get_json()
+
+        self.assertFalse(data['partial'])
+        self.assertEqual(sorted(r['filename'] for r in data['results']),
+                         ['alpha_report.txt', 'beta_report.txt', 'gamma_report.txt'])
+        self.assertEqual({node['node'] for node in data['nodes']}, {'local'} | set(self.peer_urls))
+        self.assertTrue(all(node['status'] == 'ok' for node in data['nodes']))
+        self.assertEqual({r['node'] for r in data['results']}, {'local'} | set(self.peer_urls))
+
+    def test_slow_peer_gives_partial_results(self):
+        """Test that a slow peer is reported and the other results are still returned"""
+        slow = start_server(slow_app)
+        self.servers.append(slow)
+        slow_url = f'http://127.0.0.1:{slow.server_port}'
+
+        app = create_app(node_config(self.local_path, [self.peer_urls[0], slow_url], timeout=0.5))
+        start_time = time.time()
+        data = app.test_client().post('/search/federated', json={'query': '*report*'}).get_json()
+
+        self.assertLess(time.time() - start_time, 1.4)
+        self.assertTrue(data['partial'])
+        status = {node['node']: node['status'] for node in data['nodes']}
+        self.assertEqual(status[slow_url], 'timeout')
+        self.assertEqual(status[self.peer_urls[0]], 'ok')
+        self.assertEqual(len(data['results']), 2)
+
+    def test_merge_deduplicates_and_ranks(self):
+        """Test the k-way merge on scored results"""
+        def result(path, score):
+            return {'path': os.path.dirname(path), 'filename': os.path.basename(path), 'full_path': path,
+                    'size': 1, 'modified_time': 0, 'score': score}
+        merged = merge_results([[result('/x/a', 5.0), result('/x/c', 1.0)],
+                                [result('/x/b', 3.0), result('/x/a', 5.0)]], limit=10)
+        self.assertEqual([r['full_path'] for r in merged], ['/x/a', '/x/b', '/x/c'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# fastique/tests/test_fuzzy.py
+# Tests for fuzzy filename search
+
+import unittest
+import os
+import tempfile
+from app.search.fuzzy import FuzzyMatcher, FuzzyColumn
+from app.search.indexer import SearchIndex
+from app.search.search_engine import SearchEngine
+
+class TestFuzzySearch(unittest.TestCase):
+    """Test case for the fuzzy scorer, index column and engine mode"""
+    
+    FILES = [
+        'finance/quarterly_report_2024.xlsx',
+        'finance/quarterly_summary.xlsx',
+        'notes/report.txt',
+        'notes/party_rental.txt',
+        'misc/zebra.png',
+    ]
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        self.root = os.path.join(self.temp_path, 'root')
+        for file_path in self.FILES:
+            full_path = os.path.join(self.root, file_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(file_path)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def test_subsequence_scoring(self):
+        """Test that word-start subsequence matches rank highest"""
+        matcher = FuzzyMatcher('qrtrly rpt')
+        best = matcher.score('quarterly_report_2024.xlsx')
+        
+        self.assertIsNotNone(best)
+        self.assertIsNone(matcher.score('zebra.png'))
+        
+        other = matcher.score('quarterly_summary.xlsx')
+        self.assertTrue(other is None or other < best)
+    
+    def test_typo_tolerance(self):
+        """Test that a missing character is tolerated for longer queries"""
+        matcher = FuzzyMatcher('quartz')
+        self.assertIsNotNone(matcher.score('quarterly.txt'))
+        self.assertIsNone(FuzzyMatcher('qz').score('quarterly.txt'))
+    
+    def test_column_pruning_keeps_all_matches(self):
+        """Test that candidate pruning never drops a scoring name"""
+        names = ['quarterly_report_2024.xlsx', 'report.txt', 'zebra.png', 'qrt', 'abc']
+        column = FuzzyColumn(names)
+        for query in ['rpt', 'qrtrly rpt', 'zbra', 'reprt', 'x']:
+            matcher = FuzzyMatcher(query)
+            expected = {i for i, name in enumerate(names) if matcher.score(name) is not None}
+            found = {entry_id for _, entry_id in column.search(matcher, limit=100)}
+            self.assertEqual(found, expected, query)
+    
+    def test_engine_fuzzy_mode(self):
+        """Test ranked fuzzy results from a live walk and from the index"""
+        live = SearchEngine().search(query='qrtrly rpt', paths=[self.root], match_mode='fuzzy')
+        self.assertEqual(live[0]['filename'], 'quarterly_report_2024.xlsx')
+        self.assertIn('score', live[0])
+        
+        index = SearchIndex(cache_dir=os.path.join(self.temp_path, 'cache'))
+        index.get_index(self.root)
+        indexed = SearchEngine(index=index).search(query='qrtrly rpt', paths=[self.root], match_mode='fuzzy')
+        
+        self.assertEqual([r['filename'] for r in indexed], [r['filename'] for r in live])
+        scores = [r['score'] for r in indexed]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+# fastique/tests/test_governor.py
+# Tests for the background resource governor
+
+import unittest
+import os
+import time
+import tempfile
+import threading
+from app import create_app
+from app.config import Config
+from app.search.governor import ResourceGovernor, TokenBucket
+from app.search.indexer import SearchIndex
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestGovernor(unittest.TestCase):
+    """Test case for rate limiting, priorities and yielding to foreground searches"""
+
+    def test_token_bucket(self):
+        """Test that consumption beyond the burst is paced at the configured rate"""
+        bucket = TokenBucket(rate=1000, burst=100)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.consume(100)
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.assertEqual(TokenBucket(None).consume(10 ** 9), 0.0)
+
+    def test_pause_for_foreground(self):
+        """Test that background work waits for foreground work to finish"""
+        governor = ResourceGovernor(max_pause=5.0)
+        finished = threading.Event()
+
+        def background():
+            governor.throttle(entries=1)
+            finished.set()
+
+        with governor.foreground():
+            worker = threading.Thread(target=background)
+            worker.start()
+            self.assertFalse(finished.wait(0.2))
+        self.assertTrue(finished.wait(2))
+        self.assertEqual(governor.to_dict()['pauses'], 1)
+
+        # A pause never exceeds max_pause
+        governor = ResourceGovernor(max_pause=0.1)
+        with governor.foreground():
+            start = time.monotonic()
+            governor.throttle(entries=1)
+            self.assertLess(time.monotonic() - start, 1)
+
+    def test_background_priority(self):
+        """Test that priorities are applied to the calling thread only"""
+        governor = ResourceGovernor(nice=5)
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(governor.enter_background()))
+        thread.start()
+        thread.join()
+        self.assertEqual(set(result), {'nice', 'io_priority'})
+        if hasattr(os, 'getpriority'):
+            self.assertLess(os.getpriority(os.PRIO_PROCESS, threading.get_native_id()), 5)
+
+    def test_throttled_refresh(self):
+        """Test that background rebuilds are rate limited but foreground builds are not"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            root = os.path.realpath(temp_dir)
+            for index in range(5):
+                os.makedirs(os.path.join(root, f'dir{index}'))
+                for file_index in range(10):
+                    open(os.path.join(root, f'dir{index}', f'f{file_index}'), 'w').close()
+            governor = ResourceGovernor(entries_per_second=100)
+            governor.entries.tokens = 0
+            index = SearchIndex(cache_dir=os.path.join(root, '.cache'), governor=governor)
+
+            start = time.monotonic()
+            index.get_index(root)
+            self.assertLess(time.monotonic() - start, 0.3)
+
+            start = time.monotonic()
+            index.refresh_index(root)
+            self.assertGreaterEqual(time.monotonic() - start, 0.4)
+            self.assertGreater(governor.to_dict()['rate_wait'], 0)
+
+    def test_search_requests_are_foreground(self):
+        """Test that search requests are counted while they run and released afterwards"""
+        app = create_app(TestConfig)
+        client = app.test_client()
+        governor = app.extensions['governor']
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client.post('/search/', json={'query': '*', 'paths': [temp_dir]})
+        self.assertEqual(governor.foreground_count, 0)
+        self.assertIn('background', client.get('/health').get_json())
+
+if __name__ == '__main__':
+    unittest.main()
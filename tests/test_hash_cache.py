@@ -0,0 +1,101 @@
+# fastique/tests/test_hash_cache.py
+# Tests for the persistent content-hash cache
+
+import unittest
+import os
+import tempfile
+import threading
+from app.search.hash_cache import HashCache, hash_file
+from app.search.duplicates import DuplicateFinder
+from app.search.file_operations import FileOperations
+
+class TestHashCache(unittest.TestCase):
+    """Test case for HashCache"""
+
+    def setUp(self):
+        """Create a cache and a few files"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name
+        self.cache = HashCache(os.path.join(self.root, 'cache', 'hashes.sqlite'), workers=2)
+        self.paths = []
+        for index, content in enumerate([b'alpha', b'beta', b'alpha']):
+            path = os.path.join(self.root, f'file{index}.txt')
+            with open(path, 'wb') as f:
+                f.write(content)
+            self.paths.append(path)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.cache.close()
+        self.test_dir.cleanup()
+
+    def test_hashes_are_cached(self):
+        """Test that repeat requests are served from the table"""
+        self.assertEqual(self.cache.lookup_many(self.paths), {path: None for path in self.paths})
+
+        digests = self.cache.hash_many(self.paths)
+        self.assertEqual(digests[self.paths[0]], hash_file(self.paths[0]))
+        self.assertEqual(digests[self.paths[0]], digests[self.paths[2]])
+        self.assertNotEqual(digests[self.paths[0]], digests[self.paths[1]])
+
+        read = []
+        self.assertEqual(self.cache.hash_many(self.paths, on_read=read.append), digests)
+        self.assertEqual(read, [])
+
+        # The table survives reopening
+        reopened = HashCache(self.cache.db_path)
+        self.assertEqual(reopened.lookup_many(self.paths), digests)
+        reopened.close()
+
+    def test_metadata_change_invalidates(self):
+        """Test that a modified file is rehashed"""
+        old = self.cache.get_hash(self.paths[1])
+        with open(self.paths[1], 'wb') as f:
+            f.write(b'gamma!')
+        self.assertIsNone(self.cache.lookup_many([self.paths[1]])[self.paths[1]])
+        new = self.cache.get_hash(self.paths[1])
+        self.assertNotEqual(old, new)
+        self.assertEqual(new, hash_file(self.paths[1]))
+
+    def test_consumers(self):
+        """Test the duplicate finder and copy_file through the cache"""
+        big = os.urandom(20000)
+        for name in ('big1.bin', 'big2.bin'):
+            with open(os.path.join(self.root, name), 'wb') as f:
+                f.write(big)
+        result = DuplicateFinder(hash_cache=self.cache).find([self.root])
+        self.assertEqual(result['group_count'], 2)
+
+        destination = os.path.join(self.root, 'copy.txt')
+        self.assertTrue(FileOperations.copy_file(self.paths[0], destination, skip_identical=True,
+                                                 hash_cache=self.cache))
+        self.assertFalse(FileOperations.copy_file(self.paths[2], destination, skip_identical=True,
+                                                  hash_cache=self.cache))
+        self.assertTrue(FileOperations.copy_file(self.paths[1], destination, skip_identical=True))
+
+        # Into a directory: compared with the file of the same name there
+        folder = os.path.join(self.root, 'folder')
+        os.makedirs(folder)
+        self.assertTrue(FileOperations.copy_file(self.paths[0], folder, skip_identical=True,
+                                                 hash_cache=self.cache))
+        self.assertFalse(FileOperations.copy_file(self.paths[0], folder, skip_identical=True,
+                                                  hash_cache=self.cache))
+
+    def test_background_priority(self):
+        """Test that hashing threads enter the governor's background priority"""
+        threads = []
+
+        class Governor:
+            def enter_background(self):
+                threads.append(threading.get_ident())
+
+        cache = HashCache(os.path.join(self.root, 'cache', 'governed.sqlite'), workers=1, governor=Governor())
+        try:
+            cache.hash_many(self.paths)
+        finally:
+            cache.close()
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# fastique/tests/test_index_budget.py
+# Tests for the in-memory index budget and eviction to disk
+
+import unittest
+import os
+import tempfile
+from app.search.indexer import SearchIndex, estimate_index_size
+from app.search.query_planner import plan_name_pattern
+
+class TestIndexBudget(unittest.TestCase):
+    """Test case for LRU eviction of indexes beyond the memory budget"""
+
+    def setUp(self):
+        """Create three roots of similar size"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = os.path.realpath(self.temp_dir.name)
+        self.roots = []
+        for name in ('one', 'two', 'three'):
+            root = os.path.join(self.base, name)
+            os.makedirs(os.path.join(root, 'sub'))
+            for index in range(50):
+                open(os.path.join(root, 'sub', f'{name}_{index}.txt'), 'w').close()
+            self.roots.append(root)
+        self.cache_dir = os.path.join(self.base, '.cache')
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.temp_dir.cleanup()
+
+    def test_lru_eviction_and_reload(self):
+        """Test that the least recently used root is evicted and reloaded on demand"""
+        probe = SearchIndex(cache_dir=self.cache_dir)
+        size = estimate_index_size(probe.get_index(self.roots[0]))
+        self.assertGreater(size, 50 * 200)
+
+        index = SearchIndex(cache_dir=self.cache_dir, memory_budget=int(size * 2.5))
+        one, two, three = self.roots
+        index.get_index(one)
+        index.get_index(two)
+        index.get_index(one)      # 'two' is now least recently used
+        index.get_index(three)
+
+        stats = index.memory_stats()
+        self.assertEqual(set(index.index_cache), {one, three})
+        self.assertEqual(stats['evicted'], [two])
+        self.assertEqual(stats['evictions'], 1)
+        self.assertLessEqual(stats['used'], stats['budget'])
+
+        # A subdirectory query finds the evicted root and reloads it from disk
+        results = index.query(os.path.join(two, 'sub'), plan_name_pattern('two_1*'))
+        self.assertEqual(len(results), 11)
+        stats = index.memory_stats()
+        self.assertEqual(stats['reloads'], 1)
+        self.assertIsNotNone(stats['reload_time_avg'])
+        self.assertIn(two, index.index_cache)
+        self.assertEqual(stats['evictions'], 2)
+
+    def test_unbounded_by_default(self):
+        """Test that without a budget nothing is evicted"""
+        index = SearchIndex(cache_dir=self.cache_dir)
+        for root in self.roots:
+            index.get_index(root)
+        self.assertEqual(len(index.index_cache), 3)
+        self.assertEqual(index.memory_stats()['evictions'], 0)
+
+        index.invalidate_index(self.roots[0])
+        self.assertEqual(sum(index.memory_stats()['indexes'].values()), index.memory_used)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+# fastique/tests/test_index_service.py
+# Tests for the shared index service and its client
+
+import unittest
+import os
+import tempfile
+import threading
+from app.search.indexer import SearchIndex
+from app.search.index_service import IndexService, IndexServer, IndexClient
+from app.search.search_engine import SearchEngine
+
+class TestIndexService(unittest.TestCase):
+    """Test case for serving index queries over a Unix socket"""
+
+    def setUp(self):
+        """Set up a directory tree, an index service and a client"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.temp_dir.name)
+        os.makedirs(os.path.join(self.root, 'docs'))
+        for name in ['docs/report.txt', 'docs/quarterly_report.pdf', 'notes.md']:
+            with open(os.path.join(self.root, name), 'w') as f:
+                f.write('content')
+
+        self.socket_path = os.path.join(self.root, 'index.sock')
+        index = SearchIndex(cache_dir=os.path.join(self.root, '.cache'))
+        self.service = IndexService(index, roots=[self.root])
+        self.server = IndexServer(self.socket_path, self.service)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = IndexClient(self.socket_path, pool_size=2)
+
+    def tearDown(self):
+        """Stop the service"""
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.temp_dir.cleanup()
+
+    def test_engine_uses_service(self):
+        """Test that a search engine answers from the service once the root is indexed"""
+        self.assertTrue(self.client.ping())
+        self.assertFalse(self.client.has_index(self.root))
+
+        summary = self.client.get_index(self.root)
+        self.assertEqual(summary['directory'], self.root)
+        self.assertTrue(self.client.has_index(self.root))
+
+        engine = SearchEngine(index=self.client)
+        results = engine.search('*.txt', [os.path.join(self.root, 'docs')])
+        self.assertEqual([r['filename'] for r in results], ['report.txt'])
+
+        ranked = engine.search('qrtrly', [self.root], match_mode='fuzzy')
+        self.assertEqual(ranked[0]['filename'], 'quarterly_report.pdf')
+        self.assertIn('score', ranked[0])
+        self.assertGreater(self.service.stats()['requests'], 3)
+
+    def test_unavailable_service_falls_back(self):
+        """Test that an unreachable service makes the engine walk the filesystem"""
+        client = IndexClient(os.path.join(self.root, 'missing.sock'))
+        self.assertFalse(client.ping())
+        self.assertIsNone(client.find_indexed_root(self.root))
+
+        results = SearchEngine(index=client).search('*.md', [self.root])
+        self.assertEqual([r['filename'] for r in results], ['notes.md'])
+
+if __name__ == '__main__':
+    unittest.main()
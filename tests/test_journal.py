@@ -0,0 +1,168 @@
+# fastique/tests/test_journal.py
+# Tests for the index change journal, replay and compaction
+
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+from app.search.indexer import SearchIndex
+from app.search.journal import encode_record, decode_records, RECORD_UPSERT
+from app.search.query_planner import plan_name_pattern
+
+class TestJournal(unittest.TestCase):
+    """Test case for incremental index updates persisted through the journal"""
+
+    def setUp(self):
+        """Create and index a small tree"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(os.path.join(self.temp_dir.name, 'root'))
+        os.makedirs(os.path.join(self.root, 'docs'))
+        for name in ('docs/a.txt', 'docs/b.txt', 'c.txt'):
+            open(os.path.join(self.root, name), 'w').close()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        self.index = SearchIndex(cache_dir=self.cache_dir)
+        self.index.get_index(self.root)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.temp_dir.cleanup()
+
+    def names(self, index):
+        return sorted(entry['name'] for entry in index.get_index(self.root)['files'])
+
+    def change_tree(self):
+        """Add a file and a populated directory, delete a file"""
+        with open(os.path.join(self.root, 'new.txt'), 'w') as f:
+            f.write('new')
+        os.makedirs(os.path.join(self.root, 'added', 'inner'))
+        open(os.path.join(self.root, 'added', 'inner', 'deep.txt'), 'w').close()
+        os.remove(os.path.join(self.root, 'docs', 'a.txt'))
+        paths = [os.path.join(self.root, name) for name in ('new.txt', 'added', 'docs/a.txt')]
+        return self.index.record_changes(paths)
+
+    def test_records(self):
+        """Test that a torn final record is detected by its checksum"""
+        data = encode_record(['base', 1]) + encode_record([RECORD_UPSERT, 'x', '/', 1, 2.0, False])
+        records, valid = decode_records(data + data[:10])
+        self.assertEqual(len(records), 2)
+        self.assertEqual(valid, len(data))
+        corrupt = data.replace(b'"x"', b'"y"')
+        self.assertEqual(len(decode_records(corrupt)[0]), 1)
+
+    def test_incremental_update_and_replay(self):
+        """Test that changes apply in memory, cost a journal append and survive a reload"""
+        cache_file = self.index._get_cache_file_path(self.root)
+        snapshot_mtime = os.stat(cache_file).st_mtime_ns
+
+        self.assertEqual(self.change_tree(), 5)
+        expected = ['added', 'b.txt', 'c.txt', 'deep.txt', 'docs', 'inner', 'new.txt']
+        self.assertEqual(self.names(self.index), expected)
+        self.assertEqual(os.stat(cache_file).st_mtime_ns, snapshot_mtime)
+        self.assertGreater(self.index._journal(self.root).size, 0)
+
+        reloaded = SearchIndex(cache_dir=self.cache_dir)
+        self.assertEqual(self.names(reloaded), expected)
+
+        # Removing a directory removes its subtree
+        shutil.rmtree(os.path.join(self.root, 'added'))
+        reloaded.record_changes([os.path.join(self.root, 'added')])
+        self.assertEqual(self.names(SearchIndex(cache_dir=self.cache_dir)),
+                         ['b.txt', 'c.txt', 'docs', 'new.txt'])
+
+    def test_changes_patch_lookup(self):
+        """Test that changes leave the entry list alone and patch the lookup instead of rebuilding it"""
+        lookup = self.index.get_lookup(self.root)
+        files = lookup.files
+        self.change_tree()
+        patched = self.index.get_lookup(self.root)
+        self.assertIs(patched.base_files, files)
+        self.assertIs(patched.by_name, lookup.by_name)
+        self.assertEqual(len(lookup.files), 4)
+
+        def query(pattern, **kwargs):
+            return sorted(entry['name'] for entry in self.index.query(self.root, plan_name_pattern(pattern), **kwargs))
+
+        self.assertEqual(query('*.txt'), ['b.txt', 'c.txt', 'deep.txt', 'new.txt'])
+        self.assertEqual(query('a.txt'), [])
+        self.assertEqual(query('*', size_range=(1, 10)), ['added', 'docs', 'inner', 'new.txt'])
+        self.assertEqual(sorted(entry['name'] for entry in self.index.list_directory(os.path.join(self.root, 'docs'))),
+                         ['b.txt'])
+        self.assertEqual([entry['name'] for _, entry in self.index.fuzzy_query(self.root, 'deep')], ['deep.txt'])
+
+        # Replacing and removing entries recorded earlier
+        with open(os.path.join(self.root, 'new.txt'), 'w') as f:
+            f.write('newer')
+        shutil.rmtree(os.path.join(self.root, 'added'))
+        self.index.record_changes([os.path.join(self.root, 'new.txt'), os.path.join(self.root, 'added')])
+        self.assertEqual(query('*'), ['b.txt', 'c.txt', 'docs', 'new.txt'])
+        self.assertEqual(self.index.query(self.root, plan_name_pattern('new.txt'))[0]['size'], 5)
+        self.assertEqual(self.index.loaded_indexes()[self.root]['entries'], 4)
+
+        # Compaction folds the changes into the entry list
+        self.assertTrue(self.index.compact(self.root))
+        compacted = self.index.get_lookup(self.root)
+        self.assertEqual((compacted.added, compacted.removed), ([], set()))
+        self.assertEqual(query('*'), ['b.txt', 'c.txt', 'docs', 'new.txt'])
+
+    def test_compaction(self):
+        """Test compaction, including a crash before the journal was replaced"""
+        self.change_tree()
+        journal = self.index._journal(self.root)
+        old_journal = journal.read_from(0)
+
+        self.assertTrue(self.index.compact(self.root))
+        self.assertLess(journal.size, len(old_journal))
+        expected = self.names(self.index)
+        self.assertEqual(self.names(SearchIndex(cache_dir=self.cache_dir)), expected)
+
+        # Crash between the snapshot and journal replacement: the old journal is still
+        # there, with one more change appended after the compaction point
+        open(os.path.join(self.root, 'late.txt'), 'w').close()
+        late = encode_record([RECORD_UPSERT, 'late.txt', self.root, 0, 0.0, False])
+        with open(journal.path, 'wb') as f:
+            f.write(old_journal + late)
+        self.assertEqual(self.names(SearchIndex(cache_dir=self.cache_dir)), sorted(expected + ['late.txt']))
+
+    def test_rebuild_discards_journal(self):
+        """Test that a full rebuild supersedes journaled changes"""
+        self.change_tree()
+        self.index.invalidate_index(self.root)
+        self.assertEqual(self.index._journal(self.root).size, 0)
+        self.index.refresh_index(self.root)
+        self.assertEqual(self.names(SearchIndex(cache_dir=self.cache_dir)),
+                         ['added', 'b.txt', 'c.txt', 'deep.txt', 'docs', 'inner', 'new.txt'])
+
+    def test_refresh_writes_outside_lock(self):
+        """Test that a rebuild writes its snapshot without blocking queries"""
+        write = self.index._write_cache_file
+        acquired = []
+
+        def try_lock():
+            if self.index.lock.acquire(timeout=1):
+                acquired.append(True)
+                self.index.lock.release()
+
+        def write_cache_file(directory, index_data):
+            # A search in another thread must be able to take the lock meanwhile
+            thread = threading.Thread(target=try_lock)
+            thread.start()
+            thread.join()
+            write(directory, index_data)
+
+        self.index._write_cache_file = write_cache_file
+        self.index.refresh_index(self.root)
+        self.assertEqual(acquired, [True])
+
+    def test_stale_journal_after_refresh(self):
+        """Test that changes after a rebuild are not appended to the old index's journal"""
+        old_generation = self.index.get_index(self.root)['generation']
+        self.index.refresh_index(self.root)
+        # A change recorded against the old index while the snapshot was written
+        self.index._journal(self.root).reset(old_generation)
+        self.change_tree()
+        self.assertEqual(self.names(SearchIndex(cache_dir=self.cache_dir)),
+                         ['added', 'b.txt', 'c.txt', 'deep.txt', 'docs', 'inner', 'new.txt'])
+
+if __name__ == '__main__':
+    unittest.main()
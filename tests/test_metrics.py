@@ -0,0 +1,76 @@
+# fastique/tests/test_metrics.py
+# Tests for the instrumentation layer and /metrics endpoint
+
+import unittest
+import os
+import tempfile
+from app import create_app
+from app.config import Config
+from app.metrics import MetricsRegistry, ENTRIES_SCANNED, DIRECTORIES_SCANNED
+from app.search.search_engine import SearchEngine
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestMetrics(unittest.TestCase):
+    """Test case for the metrics registry and endpoint"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        for name in ('a.txt', 'b.txt', 'sub/c.txt'):
+            full_path = os.path.join(self.temp_path, name)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(name)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def test_render_prometheus_text(self):
+        """Test the text exposition format"""
+        registry = MetricsRegistry()
+        counter = registry.counter('test_total', 'A test counter', ['kind'])
+        histogram = registry.histogram('test_seconds', 'A test histogram', buckets=(0.1, 1.0))
+        
+        counter.inc(kind='x')
+        counter.inc(2, kind='x')
+        histogram.observe(0.05)
+        histogram.observe(5)
+        
+        text = registry.render()
+        self.assertIn('# TYPE test_total counter', text)
+        self.assertIn('test_total{kind="x"} 3', text)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 2', text)
+        self.assertIn('test_seconds_count 2', text)
+    
+    def test_search_updates_counters(self):
+        """Test that a search records scan counters"""
+        entries_before = ENTRIES_SCANNED.get(source='search')
+        dirs_before = DIRECTORIES_SCANNED.get(source='search')
+        
+        SearchEngine().search(query='*.txt', paths=[self.temp_path])
+        
+        # Root has a.txt, b.txt and sub; sub has c.txt
+        self.assertEqual(ENTRIES_SCANNED.get(source='search') - entries_before, 4)
+        self.assertEqual(DIRECTORIES_SCANNED.get(source='search') - dirs_before, 2)
+    
+    def test_metrics_endpoint(self):
+        """Test the /metrics endpoint and route latency recording"""
+        client = create_app(TestConfig).test_client()
+        client.get('/search/quick')
+        
+        response = client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith('text/plain'))
+        
+        text = response.get_data(as_text=True)
+        self.assertIn('fastique_request_duration_seconds_count{endpoint="search.quick_search",method="GET",status="200"}', text)
+        self.assertIn('fastique_active_worker_threads', text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# fastique/tests/test_preview.py
+# Tests for file previews and range reads
+
+import unittest
+import os
+import struct
+import zlib
+import tempfile
+from app import create_app
+from app.config import Config
+from app.search.preview import (PreviewCache, PreviewService, RangeNotSatisfiable,
+                                parse_range_header, read_range, image_dimensions)
+
+def png_bytes(width, height):
+    """A minimal valid PNG header with the given dimensions"""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    chunk = struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+    return b'\x89PNG\r\n\x1a\n' + chunk
+
+class TestPreview(unittest.TestCase):
+    """Test case for PreviewService, PreviewCache and /file/preview"""
+
+    def setUp(self):
+        """Create sample files"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = self.test_dir.name
+        self.text_path = os.path.join(self.root, 'notes.txt')
+        with open(self.text_path, 'w') as f:
+            f.write(''.join(f'line {i}\n' for i in range(1000)))
+        self.image_path = os.path.join(self.root, 'image.png')
+        with open(self.image_path, 'wb') as f:
+            f.write(png_bytes(640, 480))
+        self.binary_path = os.path.join(self.root, 'blob.bin')
+        with open(self.binary_path, 'wb') as f:
+            f.write(b'\x00\x01\x02' * 100)
+
+        class TestConfig(Config):
+            TESTING = True
+            PREVIEW_CACHE_DIR = os.path.join(self.root, 'previews')
+        self.client = create_app(TestConfig).test_client()
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def test_range_helpers(self):
+        """Test Range parsing and mmap reads"""
+        self.assertEqual(parse_range_header('bytes=0-9', 100), (0, 10))
+        self.assertEqual(parse_range_header('bytes=90-', 100), (90, 100))
+        self.assertEqual(parse_range_header('bytes=-5', 100), (95, 100))
+        self.assertEqual(parse_range_header('bytes=50-500', 100), (50, 100))
+        self.assertIsNone(parse_range_header('bytes=0-1,5-6', 100))
+        with self.assertRaises(RangeNotSatisfiable):
+            parse_range_header('bytes=100-', 100)
+        # Invalid ranges are ignored rather than rejected
+        self.assertIsNone(parse_range_header('bytes=500-100', 1000))
+        self.assertIsNone(parse_range_header('bytes=--5', 100))
+        self.assertIsNone(parse_range_header('bytes=x-5', 100))
+        self.assertEqual(read_range(self.text_path, 5, 11), b'0\nline')
+        self.assertEqual(image_dimensions(png_bytes(3, 7)), ('png', 3, 7))
+
+    def test_previews_are_cached(self):
+        """Test preview types and that a modified file gets a new preview"""
+        service = PreviewService(PreviewCache(os.path.join(self.root, 'cache')))
+        text = service.preview(self.text_path)
+        self.assertEqual(text['type'], 'text')
+        self.assertEqual(text['snippet'].splitlines()[0], 'line 0')
+        self.assertTrue(text['truncated'])
+        image = service.preview(self.image_path)
+        self.assertEqual((image['type'], image['width'], image['height']), ('image', 640, 480))
+        self.assertEqual(service.preview(self.binary_path)['type'], 'binary')
+        self.assertEqual(len(service.cache.entries), 3)
+
+        with open(self.text_path, 'w') as f:
+            f.write('changed content, longer than before\n')
+        self.assertEqual(service.preview(self.text_path)['snippet'], 'changed content, longer than before')
+
+    def test_cache_is_bounded(self):
+        """Test LRU eviction by total size"""
+        cache = PreviewCache(os.path.join(self.root, 'small'), max_bytes=250)
+        for key in 'abc':
+            cache.put(key, b'x' * 100)
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('b'))
+        cache.put('d', b'x' * 100)
+        self.assertEqual(list(cache.entries), ['b', 'd'])
+        self.assertEqual(sorted(os.listdir(cache.directory)), ['b.preview', 'd.preview'])
+
+    def test_endpoint(self):
+        """Test info and raw modes with Range requests"""
+        data = self.client.get('/file/preview', query_string={'path': self.image_path}).get_json()
+        self.assertEqual(data['preview']['width'], 640)
+
+        response = self.client.get('/file/preview', query_string={'path': self.text_path, 'mode': 'raw'},
+                                   headers={'Range': 'bytes=0-5'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.data, b'line 0')
+        self.assertEqual(response.headers['Content-Range'], f'bytes 0-5/{os.path.getsize(self.text_path)}')
+
+        response = self.client.get('/file/preview', query_string={'path': self.binary_path, 'mode': 'raw'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 300)
+
+        response = self.client.get('/file/preview', query_string={'path': self.binary_path, 'mode': 'raw'},
+                                   headers={'Range': 'bytes=400-'})
+        self.assertEqual(response.status_code, 416)
+
+        # A reversed range is invalid, so the whole file is served
+        response = self.client.get('/file/preview', query_string={'path': self.binary_path, 'mode': 'raw'},
+                                   headers={'Range': 'bytes=200-100'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 300)
+
+if __name__ == '__main__':
+    unittest.main()
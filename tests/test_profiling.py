@@ -0,0 +1,90 @@
+# fastique/tests/test_profiling.py
+# Tests for per-request profiling
+
+import unittest
+import os
+import tempfile
+from app import create_app
+from app.config import Config
+from app.profiling import ProfileStore, StageTimer
+
+class TestProfiling(unittest.TestCase):
+    """Test case for the profiling hooks and ring buffer"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        self.profile_dir = os.path.join(self.temp_path, 'profiles')
+        
+        self.search_root = os.path.join(self.temp_path, 'root')
+        os.makedirs(os.path.join(self.search_root, 'sub'))
+        for name in ('report.txt', 'sub/notes.txt'):
+            with open(os.path.join(self.search_root, name), 'w') as f:
+                f.write(name)
+        
+        profile_dir = self.profile_dir
+        
+        class TestConfig(Config):
+            TESTING = True
+            PROFILE_DIR = profile_dir
+            PROFILE_RING_SIZE = 3
+        
+        self.config_class = TestConfig
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def test_ring_buffer_is_bounded(self):
+        """Test that the store keeps only the newest profiles"""
+        store = ProfileStore(self.profile_dir, capacity=2)
+        ids = [store.save({'n': i}) for i in range(4)]
+        
+        self.assertEqual(store.list_ids(), ids[2:])
+        self.assertEqual(store.load(ids[3]), {'n': 3})
+        self.assertIsNone(store.load(ids[0]))
+    
+    def test_stage_timer_merges_threads(self):
+        """Test that stage times are summed across threads"""
+        import threading
+        timer = StageTimer()
+        threads = [threading.Thread(target=timer.add, args=('walk', 0.5)) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(timer.totals(), {'walk': 2.0})
+    
+    def test_header_triggers_profile(self):
+        """Test profiling a single search via the request header"""
+        client = create_app(self.config_class).test_client()
+        
+        response = client.post('/search/', json={'query': '*.txt', 'paths': [self.search_root]})
+        self.assertNotIn('X-Fastique-Profile-Id', response.headers)
+        
+        response = client.post('/search/', json={'query': '*.txt', 'paths': [self.search_root]},
+                               headers={'X-Fastique-Profile': '1'})
+        self.assertEqual(response.get_json()['count'], 2)
+        profile_id = response.headers['X-Fastique-Profile-Id']
+        
+        profile = ProfileStore(self.profile_dir).load(profile_id)
+        self.assertEqual(profile['endpoint'], 'search.search')
+        self.assertEqual(profile['reason'], 'requested')
+        for stage in ('walk', 'filter', 'stat', 'materialize', 'serialize'):
+            self.assertIn(stage, profile['stages'])
+    
+    def test_slow_requests_captured(self):
+        """Test automatic capture over the latency threshold"""
+        self.config_class.PROFILE_SLOW_THRESHOLD = 0
+        client = create_app(self.config_class).test_client()
+        
+        response = client.get('/file/info', query_string={'path': self.search_root})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('X-Fastique-Profile-Id', response.headers)
+        
+        profile = ProfileStore(self.profile_dir).load(response.headers['X-Fastique-Profile-Id'])
+        self.assertEqual(profile['reason'], 'slow')
+
+if __name__ == '__main__':
+    unittest.main()
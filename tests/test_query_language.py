@@ -0,0 +1,106 @@
+# fastique/tests/test_query_language.py
+# Tests for the structured query language and its planner
+
+import unittest
+import os
+import time
+import tempfile
+from app import create_app
+from app.config import Config
+from app.search.indexer import SearchIndex
+from app.search.search_engine import SearchEngine
+from app.search.query_language import (parse_query, plan_query, QueryPlan, QuerySyntaxError,
+                                       And, Or, Not, Name, Ext, Size, Modified, PathContains)
+
+class TestConfig(Config):
+    """Configuration used by the tests"""
+    TESTING = True
+
+class TestQueryLanguage(unittest.TestCase):
+    """Test case for parsing, planning and running structured queries"""
+
+    def setUp(self):
+        """Create files with different names, sizes and ages"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.test_dir.name)
+        os.makedirs(os.path.join(self.root, 'archive'))
+        files = {
+            'report.pdf': 20 * 1024 * 1024,
+            'report_small.pdf': 100,
+            'report.docx': 11 * 1024 * 1024,
+            'report.txt': 20 * 1024 * 1024,
+            'archive/report_old.pdf': 20 * 1024 * 1024,
+            'invoice.txt': 10,
+            'notes.md': 10,
+        }
+        for name, size in files.items():
+            with open(os.path.join(self.root, name), 'wb') as f:
+                f.truncate(size)
+        old = time.time() - 30 * 86400
+        os.utime(os.path.join(self.root, 'report.docx'), (old, old))
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def test_parse(self):
+        """Test operator precedence, negation and field values"""
+        root = parse_query('report ext:pdf,docx size:>10MB modified:<7d -path:archive OR invoice', now=1000000)
+        self.assertIsInstance(root, Or)
+        left, right = root.children
+        self.assertIsInstance(left, And)
+        self.assertEqual([type(child) for child in left.children], [Name, Ext, Size, Modified, Not])
+        self.assertEqual(left.children[1].extensions, {'pdf', 'docx'})
+        self.assertEqual(left.children[2].low, 10 * 1024 * 1024 + 1)
+        self.assertEqual((left.children[3].low, left.children[3].high), (1000000 - 7 * 86400, float('inf')))
+        self.assertIsInstance(left.children[4].child, PathContains)
+        self.assertIsInstance(right, Name)
+
+        grouped = parse_query('(a OR b) -"c d"')
+        self.assertIsInstance(grouped.children[0], Or)
+        self.assertEqual(grouped.children[1].child.text, 'c d')
+
+        for bad in ['', 'a OR', '(a', 'size:>lots', 'type:socket', 'modified:yesterday']:
+            with self.assertRaises(QuerySyntaxError):
+                parse_query(bad)
+
+    def test_plan(self):
+        """Test name-only rejection and per-branch pushdown"""
+        plan = plan_query('report ext:pdf size:>1MB OR invoice')
+        self.assertEqual(len(plan.probes), 2)
+        self.assertEqual(plan.probes[0].file_types, ['pdf'])
+        self.assertEqual(plan.probes[0].size_range, (1024 * 1024 + 1, float('inf')))
+        self.assertTrue(plan.matches_name('report.pdf'))
+        self.assertTrue(plan.matches_name('invoice.txt'))
+        self.assertFalse(plan.matches_name('notes.md'))
+
+        filtered = QueryPlan('report', parse_query('report')).with_filters(['txt'])
+        self.assertTrue(filtered.predicate(('/', 'report.txt', False, 1, 0)))
+        self.assertFalse(filtered.predicate(('/', 'report.pdf', False, 1, 0)))
+
+    def test_search(self):
+        """Test that live walks and index lookups return the same matches"""
+        query = 'report ext:pdf,docx size:>10MB modified:<7d -path:archive OR invoice'
+        live = SearchEngine().search(query, [self.root], match_mode='structured')
+        self.assertEqual(sorted(r['filename'] for r in live), ['invoice.txt', 'report.pdf'])
+
+        index = SearchIndex(cache_dir=os.path.join(self.root, '.cache'))
+        index.get_index(self.root)
+        indexed = SearchEngine(index=index).search(query, [self.root], match_mode='structured')
+        self.assertEqual(sorted(r['filename'] for r in indexed), ['invoice.txt', 'report.pdf'])
+
+    def test_route(self):
+        """Test structured queries and syntax errors through /search/"""
+        client = create_app(TestConfig).test_client()
+        response = client.post('/search/', json={'query': 'ext:md OR ext:docx', 'paths': [self.root],
+                                                 'match_mode': 'structured'})
+        self.assertEqual(sorted(r['filename'] for r in response.get_json()['results']),
+                         ['notes.md', 'report.docx'])
+
+        response = client.post('/search/', json={'query': '(report', 'paths': [self.root],
+                                                 'match_mode': 'structured'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.get_json())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+# fastique/tests/test_query_planner.py
+# Tests for the name pattern planner and index-served searches
+
+import unittest
+import os
+import re
+import fnmatch
+import tempfile
+from app.search.query_planner import plan_name_pattern
+from app.search.indexer import SearchIndex
+from app.search.search_engine import SearchEngine
+
+class TestQueryPlanner(unittest.TestCase):
+    """Test case for pattern classification and matching"""
+    
+    NAMES = ['report.txt', 'Report_2024.TXT', 'myreport', 'report', 'notes.md',
+             'archive.tar.gz', 'a.txt.bak', '.txt', 'REPORT']
+    
+    def test_classification(self):
+        """Test that trivial patterns avoid the regex engine"""
+        cases = {
+            '*': 'all',
+            '': 'all',
+            'report.txt': 'exact',
+            'report*': 'prefix',
+            '*.txt': 'suffix',
+            'rep*.txt': 'prefix_suffix',
+            '*port*': 'substring',
+            'rep?rt': 'regex',
+            '*a*b*': 'regex',
+        }
+        for query, kind in cases.items():
+            self.assertEqual(plan_name_pattern(query).kind, kind, query)
+        
+        self.assertEqual(plan_name_pattern('*.txt').extension, 'txt')
+        self.assertIsNone(plan_name_pattern('*.tar.gz').extension)
+        self.assertEqual(plan_name_pattern('report', use_regex=True).kind, 'substring')
+        self.assertEqual(plan_name_pattern('file\\d', use_regex=True).kind, 'regex')
+    
+    def test_patterns_are_cached(self):
+        """Test that compiled patterns are reused across searches"""
+        self.assertIs(plan_name_pattern('*.py', False, False), plan_name_pattern('*.py', False, False))
+    
+    def test_equivalent_to_fnmatch(self):
+        """Test that every strategy agrees with a full-name fnmatch"""
+        for query in ['*.txt', 'report*', 'report', '*port*', 'rep*.txt', 'r?port', '*a*t*']:
+            for case_sensitive in (True, False):
+                flags = 0 if case_sensitive else re.IGNORECASE
+                expected = re.compile(fnmatch.translate(query), flags)
+                pattern = plan_name_pattern(query, False, case_sensitive)
+                for name in self.NAMES:
+                    self.assertEqual(pattern.match(name), bool(expected.match(name)),
+                                     (query, case_sensitive, name))
+                    self.assertEqual(pattern.match_folded(name.casefold()) if not case_sensitive
+                                     else pattern.match(name), bool(expected.match(name)))
+
+class TestIndexedSearch(unittest.TestCase):
+    """Test case for searches answered from a SearchIndex"""
+    
+    def setUp(self):
+        """Set up test environment"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.temp_path = self.test_dir.name
+        self.root = os.path.join(self.temp_path, 'root')
+        for file_path in ['a.txt', 'b.pdf', 'sub/c.txt', 'sub/deep/d.txt', 'sub/report.pdf']:
+            full_path = os.path.join(self.root, file_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'w') as f:
+                f.write(file_path)
+        
+        self.index = SearchIndex(cache_dir=os.path.join(self.temp_path, 'cache'))
+        self.index.get_index(self.root)
+    
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+    
+    def _names(self, engine, **kwargs):
+        return sorted(r['filename'] for r in engine.search(**kwargs))
+    
+    def test_index_matches_live_walk(self):
+        """Test that indexed and live searches return the same results"""
+        indexed = SearchEngine(index=self.index)
+        live = SearchEngine()
+        for query in ['*.txt', 'report.pdf', 'sub', '*e*', 'c.t?t']:
+            self.assertEqual(self._names(indexed, query=query, paths=[self.root]),
+                             self._names(live, query=query, paths=[self.root]), query)
+        self.assertEqual(self._names(indexed, query='*.txt', paths=[self.root], max_depth=1),
+                         ['a.txt', 'c.txt'])
+    
+    def test_ancestor_index_covers_subdirectory(self):
+        """Test that an index of a parent serves searches of a subdirectory"""
+        sub = os.path.join(self.root, 'sub')
+        self.assertEqual(self.index.find_indexed_root(sub), self.root)
+        
+        engine = SearchEngine(index=self.index)
+        self.assertEqual(self._names(engine, query='*.txt', paths=[sub]), ['c.txt', 'd.txt'])
+    
+    def test_extension_lookup(self):
+        """Test that extension patterns use the posting list"""
+        lookup = self.index.get_lookup(self.root)
+        candidates = lookup.candidates(plan_name_pattern('*.pdf'))
+        self.assertEqual(sorted(lookup.files[i]['name'] for i in candidates), ['b.pdf', 'report.pdf'])
+    
+    def test_filter_driven_queries_use_secondary_indexes(self):
+        """Test size, mtime and extension predicates answered from sorted columns"""
+        big = os.path.join(self.root, 'sub', 'big.pdf')
+        with open(big, 'wb') as f:
+            f.write(b'x' * 5000)
+        old = os.path.join(self.root, 'old.txt')
+        with open(old, 'w') as f:
+            f.write('old')
+        os.utime(old, (1000000000, 1000000000))
+        self.index.invalidate_index(self.root)
+        self.index.get_index(self.root)
+        
+        lookup = self.index.get_lookup(self.root)
+        pattern = plan_name_pattern('*')
+        
+        # mtime is the most selective predicate here: a single entry
+        candidates = lookup.candidates(pattern, file_types=['txt'], timestamp_range=(0, 1000000001))
+        self.assertEqual([lookup.files[i]['name'] for i in candidates], ['old.txt'])
+        
+        # Size only narrows files; directories always pass it
+        candidates = lookup.candidates(pattern, size_range=(1000, float('inf')))
+        self.assertEqual(sorted(lookup.files[i]['name'] for i in candidates), ['big.pdf', 'deep', 'sub'])
+        
+        engine = SearchEngine(index=self.index)
+        self.assertEqual(self._names(engine, query='', paths=[self.root], file_types=['pdf'],
+                                     size_range=(1000, float('inf'))), ['big.pdf'])
+        
+        from datetime import datetime
+        results = self._names(engine, query='*', paths=[self.root],
+                              date_range=(None, datetime.fromtimestamp(1000000001)))
+        self.assertEqual(results, ['old.txt'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+# fastique/tests/test_results.py
+# Tests for result records and columnar result batches
+
+import unittest
+import os
+from app.search.results import SearchResult, ResultBatch, file_extension
+
+class TestResults(unittest.TestCase):
+    """Test case for SearchResult and ResultBatch"""
+
+    ROWS = [
+        ('/data', 'report.PDF', 2048, 1700000000.5, False, None),
+        ('/data', 'archive.tar.gz', 5 * 1024 ** 3, 1700000000.9, False, None),
+        ('/data/sub', 'photos', 0, 1600000000.0, True, None),
+        ('/data/sub', '.bashrc', 12, 1600000000.0, False, 3.14159),
+    ]
+
+    def test_extension_matches_splitext(self):
+        """Test that the fast extension helper agrees with os.path.splitext"""
+        for name in ['a.txt', 'A.TXT', '.bashrc', '..a', 'a.', 'noext', 'x.tar.gz', '...', '.a.b']:
+            self.assertEqual(file_extension(name), os.path.splitext(name)[1][1:].lower(), name)
+
+    def test_batch_matches_single_results(self):
+        """Test that bulk conversion produces the same dictionaries as single results"""
+        batch = ResultBatch.from_rows(self.ROWS)
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.to_dicts(), [SearchResult(*row).to_dict() for row in self.ROWS])
+        self.assertEqual([result.full_path for result in batch][2], '/data/sub/photos')
+        self.assertEqual(batch.to_dicts()[1]['size_formatted'], '5.00 GB')
+        self.assertFalse(hasattr(batch[0], '__dict__'))
+
+    def test_compact(self):
+        """Test the compact columnar encoding"""
+        compact = ResultBatch.from_rows(self.ROWS).compact()
+        self.assertEqual(compact['columns'], ['dir', 'name', 'size', 'mtime', 'is_dir', 'score'])
+        self.assertEqual(compact['directories'], ['/data', '/data/sub'])
+        self.assertEqual(compact['rows'][2], [1, 'photos', 0, 1600000000.0, 1, None])
+        self.assertEqual(compact['rows'][3][5], 3.142)
+        self.assertEqual(ResultBatch().compact()['rows'], [])
+
+if __name__ == '__main__':
+    unittest.main()
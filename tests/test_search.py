@@ -142,5 +142,25 @@ class TestSearchEngine(unittest.TestCase):
         self.assertEqual(dir_dict['icon_class'], 'folder-icon')
         self.assertEqual(dir_dict['size_formatted'], 'Directory')
 
+    def test_overlapping_roots_are_walked_once(self):
+        """Test that nested and duplicate roots don't duplicate results"""
+        subfolder = os.path.join(self.temp_path, 'subfolder')
+        results = self.search_engine.search(
+            query="*.txt",
+            paths=[self.temp_path, subfolder, self.temp_path + os.sep]
+        )
+        
+        full_paths = [r['full_path'] for r in results]
+        self.assertEqual(len(full_paths), len(set(full_paths)))
+        self.assertEqual(len(full_paths), 2)
+    
+    def test_symlink_loop_is_not_followed(self):
+        """Test that a directory symlink cycle is walked only once"""
+        os.symlink(self.temp_path, os.path.join(self.temp_path, 'subfolder', 'loop'))
+        
+        results = self.search_engine.search(query="subfile.txt", paths=[self.temp_path])
+        
+        self.assertEqual(len(results), 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
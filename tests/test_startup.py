@@ -0,0 +1,80 @@
+# fastique/tests/test_startup.py
+# Tests for the startup preload and the health endpoint
+
+import unittest
+import os
+import tempfile
+import threading
+from app import create_app
+from app.config import Config
+from app.search.indexer import SearchIndex
+from app.startup import StartupState, IndexPreloader
+
+class TestStartup(unittest.TestCase):
+    """Test case for IndexPreloader and /health"""
+
+    def setUp(self):
+        """Persist an index for one of two roots"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.test_dir.name)
+        self.indexed = os.path.join(self.root, 'indexed')
+        self.unindexed = os.path.join(self.root, 'unindexed')
+        for directory in (self.indexed, self.unindexed):
+            os.makedirs(directory)
+            with open(os.path.join(directory, 'file.txt'), 'w') as f:
+                f.write('content')
+        self.cache_dir = os.path.join(self.root, '.cache')
+        SearchIndex(cache_dir=self.cache_dir).get_index(self.indexed)
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def test_preload_loads_persisted_indexes(self):
+        """Test that a fresh process picks up persisted indexes in the background"""
+        index = SearchIndex(cache_dir=self.cache_dir)
+        state = StartupState()
+        preloader = IndexPreloader(index, [self.indexed, self.unindexed], state)
+        self.assertEqual(state.to_dict()['roots'][self.indexed], 'pending')
+
+        preloader.start()
+        self.assertTrue(state.ready.wait(5))
+        self.assertEqual(state.to_dict()['roots'], {self.indexed: 'loaded', self.unindexed: 'missing'})
+        self.assertIn(self.indexed, index.index_cache)
+        self.assertIn(self.indexed, index.lookups)
+
+    def test_health(self):
+        """Test the /health endpoint"""
+        cache_dir = self.cache_dir
+        paths = [self.indexed, self.unindexed]
+
+        class TestConfig(Config):
+            TESTING = True
+            INDEX_CACHE_DIR = cache_dir
+            DEFAULT_SEARCH_PATHS = paths
+
+        app = create_app(TestConfig)
+        client = app.test_client()
+        index = app.extensions['search_index']
+        data = client.get('/health').get_json()
+        self.assertEqual(data['status'], 'ok')
+        self.assertTrue(data['startup']['ready'])
+        # Only in-memory indexes count; /health never loads one from disk
+        self.assertEqual((data['index']['covered'], data['index']['total']), (0, 2))
+        self.assertNotIn(self.indexed, index.index_cache)
+
+        self.assertTrue(index.preload(self.indexed))
+        data = client.get('/health').get_json()
+        self.assertEqual((data['index']['covered'], data['index']['total']), (1, 2))
+        self.assertEqual(data['index']['loaded'][self.indexed]['entries'], 1)
+
+        # Nor does it wait for the index lock (held by loads and builds)
+        responses = []
+        with index.lock:
+            request = threading.Thread(target=lambda: responses.append(client.get('/health')))
+            request.start()
+            request.join(5)
+        self.assertEqual(responses[0].status_code, 200)
+
+if __name__ == '__main__':
+    unittest.main()
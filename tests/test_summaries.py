@@ -0,0 +1,162 @@
+# fastique/tests/test_summaries.py
+# Tests for subtree summaries and pruning of live walks
+
+import unittest
+import os
+import time
+import tempfile
+import threading
+from app import create_app
+from app.config import Config
+from app.metrics import DIRECTORIES_SCANNED, SUBTREES_PRUNED
+from app.search.query_language import plan_query
+from app.search.query_planner import plan_name_pattern
+from app.search.search_engine import SearchEngine
+from app.search.summaries import SubtreeFilter, SummaryStore, bloom_of, name_tokens, rules_key
+
+class TestSummaries(unittest.TestCase):
+    """Test case for Bloom subtree summaries"""
+
+    def setUp(self):
+        """Create two subtrees with unrelated names, old enough to be summarized"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.join(os.path.realpath(self.temp_dir.name), 'tree')
+        for word in ('alpha', 'beta'):
+            for sub in ('', 'deep', 'deep/er'):
+                directory = os.path.join(self.root, word, sub)
+                os.makedirs(directory, exist_ok=True)
+                for index in range(40):
+                    open(os.path.join(directory, f'{word}_{index:02d}_{index * 37 % 100:02d}.txt'), 'w').close()
+        self.age_directories()
+        self.store = SummaryStore(os.path.join(self.temp_dir.name, 'summaries.sqlite'))
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def age_directories(self):
+        past = time.time() - 600
+        for directory, _, _ in os.walk(self.root):
+            os.utime(directory, (past, past))
+
+    def search(self, query, **kwargs):
+        engine = SearchEngine(max_results=1000, summaries=self.store)
+        scanned = DIRECTORIES_SCANNED.get(source='search')
+        pruned = SUBTREES_PRUNED.get()
+        results = engine.search(query, [self.root], **kwargs)
+        self.store.flush()
+        return (sorted(result['filename'] for result in results),
+                DIRECTORIES_SCANNED.get(source='search') - scanned, SUBTREES_PRUNED.get() - pruned)
+
+    def test_filter(self):
+        """Test which queries can be decided on a summary"""
+        bloom = bloom_of(name_tokens('report_2024.pdf', False))
+        self.assertTrue(SubtreeFilter.for_pattern(plan_name_pattern('*report*')).might_match(bloom))
+        self.assertTrue(SubtreeFilter.for_pattern(plan_name_pattern('REPORT*')).might_match(bloom))
+        self.assertFalse(SubtreeFilter.for_pattern(plan_name_pattern('*invoice*')).might_match(bloom))
+        self.assertFalse(SubtreeFilter.for_pattern(plan_name_pattern('*'), ['docx']).might_match(bloom))
+        self.assertTrue(SubtreeFilter.for_plan(plan_query('invoice OR ext:pdf')).might_match(bloom))
+        # Nothing to rule out with regexes, short literals and fuzzy-like match-all
+        self.assertIsNone(SubtreeFilter.for_pattern(plan_name_pattern('re.*t', use_regex=True)))
+        self.assertIsNone(SubtreeFilter.for_pattern(plan_name_pattern('*ab*')))
+        self.assertIsNone(SubtreeFilter.for_plan(plan_query('type:dir OR report')))
+
+    def test_prunes_unrelated_subtrees(self):
+        """Test that a repeated selective search skips subtrees without matching names"""
+        first, scanned_first, _ = self.search('alpha_1*')
+        self.assertEqual(len(first), 30)
+        self.assertEqual(scanned_first, 7)
+
+        second, scanned_second, pruned = self.search('alpha_1*')
+        self.assertEqual(second, first)
+        self.assertEqual(pruned, 1)
+        self.assertEqual(scanned_second, 4)
+
+        # Structured queries prune on their name and extension requirements
+        structured, _, pruned = self.search('alpha ext:txt', match_mode='structured')
+        self.assertEqual(len(structured), 120)
+        self.assertEqual(pruned, 1)
+
+    def test_change_invalidates_summary(self):
+        """Test that a new entry deep in a pruned subtree is found"""
+        self.search('alpha_1*')
+        open(os.path.join(self.root, 'beta', 'deep', 'er', 'alpha_1_moved.txt'), 'w').close()
+        results, scanned, pruned = self.search('alpha_1*')
+        self.assertIn('alpha_1_moved.txt', results)
+        self.assertEqual(pruned, 0)
+        self.assertEqual(scanned, 7)
+
+    def test_hidden_entries_need_hidden_summaries(self):
+        """Test that summaries built without hidden entries aren't used for hidden searches"""
+        os.makedirs(os.path.join(self.root, 'beta', '.config'))
+        open(os.path.join(self.root, 'beta', '.config', 'alpha_1_secret.txt'), 'w').close()
+        self.age_directories()
+        self.search('alpha_1*')
+        results, _, pruned = self.search('alpha_1*', include_hidden=True)
+        self.assertIn('alpha_1_secret.txt', results)
+        self.assertEqual(pruned, 0)
+
+    def test_exclude_rules_key_summaries(self):
+        """Test that summaries are only used under the exclude rules they were built with"""
+        os.makedirs(os.path.join(self.root, 'beta', 'build'))
+        open(os.path.join(self.root, 'beta', 'build', 'alpha_1_artifact.txt'), 'w').close()
+        self.age_directories()
+        self.search('alpha_1*', exclude=['build/'])
+        results, _, pruned = self.search('alpha_1*', exclude=['build/'])
+        self.assertEqual(pruned, 1)
+        self.assertNotIn('alpha_1_artifact.txt', results)
+
+        # Without the rule, beta's summary (which left build/ out) cannot be trusted
+        results, _, pruned = self.search('alpha_1*')
+        self.assertEqual(pruned, 0)
+        self.assertIn('alpha_1_artifact.txt', results)
+        self.assertNotEqual(rules_key(['build/']), rules_key([]))
+
+    def test_worker_connections_closed(self):
+        """Test that walk workers close the summary connections they open"""
+        opened, closed = set(), set()
+        connection, close_connection = self.store._connection, self.store.close_connection
+
+        def tracked_connection():
+            if threading.current_thread().name.startswith('fastique-search'):
+                opened.add(threading.get_ident())
+            return connection()
+
+        def tracked_close():
+            closed.add(threading.get_ident())
+            close_connection()
+
+        self.store._connection, self.store.close_connection = tracked_connection, tracked_close
+        self.search('alpha_1*')
+        self.search('alpha_1*')
+        deadline = time.monotonic() + 5
+        while not opened <= closed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(opened)
+        self.assertLessEqual(opened, closed)
+
+    def test_route_with_default_config(self):
+        """Test that /search prunes under the shipped exclude patterns"""
+        temp_dir = self.temp_dir.name
+
+        class TestConfig(Config):
+            TESTING = True
+            INDEX_CACHE_DIR = os.path.join(temp_dir, 'index')
+            SUMMARY_CACHE_PATH = os.path.join(temp_dir, 'route-summaries.sqlite')
+
+        self.assertTrue(TestConfig.EXCLUDE_PATTERNS)
+        app = create_app(TestConfig)
+        client = app.test_client()
+        body = {'query': 'alpha_1*', 'paths': [self.root]}
+        first = client.post('/search/', json=body).get_json()
+        app.extensions['summaries'].flush()
+        pruned = SUBTREES_PRUNED.get()
+        second = client.post('/search/', json=body).get_json()
+        self.assertEqual(SUBTREES_PRUNED.get() - pruned, 1)
+        self.assertEqual(len(second['results']), len(first['results']))
+        self.assertEqual(len(first['results']), 30)
+        app.extensions['summaries'].close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+# fastique/tests/test_usage.py
+# Tests for usage tracking and index warming
+
+import unittest
+import os
+import time
+import tempfile
+from unittest import mock
+from app.search.usage import UsageTracker, IndexWarmer
+from app.search.indexer import SearchIndex
+
+class TestUsage(unittest.TestCase):
+    """Test case for UsageTracker and IndexWarmer"""
+
+    def setUp(self):
+        """Create two directories to track"""
+        self.test_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.test_dir.name)
+        self.hot = os.path.join(self.root, 'hot')
+        self.cold = os.path.join(self.root, 'cold')
+        for directory in (self.hot, self.cold):
+            os.makedirs(directory)
+            with open(os.path.join(directory, 'file.txt'), 'w') as f:
+                f.write('content')
+
+    def tearDown(self):
+        """Clean up after tests"""
+        self.test_dir.cleanup()
+
+    def test_decayed_counts(self):
+        """Test that old accesses count less than recent ones"""
+        tracker = UsageTracker(half_life=100, persist_path=os.path.join(self.root, 'usage.json'))
+        now = time.time()
+        with mock.patch('app.search.usage.time.time', return_value=now - 300):
+            for _ in range(4):
+                tracker.record(self.cold)
+        tracker.record(self.hot)
+        tracker.record(os.path.join(self.hot, 'file.txt'))
+
+        self.assertAlmostEqual(tracker.score(self.cold, now), 0.5, places=2)
+        self.assertAlmostEqual(tracker.score(self.hot, now), 2.0, places=2)
+        self.assertEqual([path for path, _ in tracker.top(2)], [self.hot, self.cold])
+
+        tracker.save()
+        reloaded = UsageTracker(half_life=100, persist_path=tracker.persist_path)
+        self.assertAlmostEqual(reloaded.score(self.hot, now), 2.0, places=2)
+
+    def test_autosave(self):
+        """Test that scores are saved on a timer and on close, without a warmer"""
+        path = os.path.join(self.root, 'usage.json')
+        tracker = UsageTracker(half_life=100, persist_path=path)
+        tracker.start_autosave(interval=0.05)
+        try:
+            tracker.record(self.hot)
+            deadline = time.monotonic() + 5
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(path))
+        finally:
+            tracker.close()
+
+        tracker = UsageTracker(half_life=100, persist_path=path)
+        tracker.record(self.cold)
+        tracker.close()
+        self.assertGreater(UsageTracker(half_life=100, persist_path=path).score(self.cold), 0.9)
+
+    def test_warmer_keeps_hot_roots_indexed(self):
+        """Test that hot roots are indexed and cold ones unloaded"""
+        tracker = UsageTracker(half_life=1000)
+        index = SearchIndex(cache_dir=os.path.join(self.root, '.cache'))
+        warmer = IndexWarmer(index, tracker, top_n=1, duty_cycle=1.0, min_score=0.5)
+
+        for _ in range(3):
+            tracker.record(self.cold)
+        self.assertEqual(warmer.run_once(), [self.cold])
+        self.assertIsNotNone(index.index_age(self.cold))
+        # Fresh indexes are left alone
+        self.assertEqual(warmer.run_once(), [])
+
+        for _ in range(5):
+            tracker.record(self.hot)
+        self.assertEqual(warmer.run_once(), [self.hot])
+        self.assertIsNone(index.index_age(self.cold))
+        self.assertEqual(index.find_indexed_root(os.path.join(self.hot)), self.hot)
+
+    def test_hot_roots_drop_covered_children(self):
+        """Test that a hot child is not warmed separately from its selected parent"""
+        tracker = UsageTracker(half_life=1000)
+        warmer = IndexWarmer(SearchIndex(cache_dir=os.path.join(self.root, '.cache')), tracker, top_n=3)
+        for _ in range(5):
+            tracker.record(self.hot)
+        for _ in range(2):
+            tracker.record(self.root)
+        tracker.record(self.cold)
+        self.assertEqual(warmer.hot_roots(), [self.root])
+
+if __name__ == '__main__':
+    unittest.main()